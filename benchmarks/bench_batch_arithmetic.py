@@ -0,0 +1,61 @@
+# main.py のバッチ演算（add_batch など）と、スカラー関数をPythonのループで呼び出した場合の所要時間を比較するベンチマークです。
+# 入力はリスト・array.array・NumPy配列（NumPyがある場合）で、整数と浮動小数点数のそれぞれについて計測し、
+# チャンクごとに処理する divide_chunks も計測します。バッチ演算の結果はスカラー関数の結果と一致することを確認します。
+#
+# 使い方:
+#   python benchmarks/bench_batch_arithmetic.py --size 1000000
+
+import argparse
+from array import array
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from main import add, subtract, multiply, divide
+from main import add_batch, subtract_batch, multiply_batch, divide_batch, divide_chunks
+
+OPERATIONS = (("add", add, add_batch), ("subtract", subtract, subtract_batch),
+              ("multiply", multiply, multiply_batch), ("divide", divide, divide_batch))
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def inputs(size, seed):
+    """(ラベル, a, b) の列を返す（除数に0は含まない）"""
+    rng = random.Random(seed)
+    ints_a = [rng.randint(-10**6, 10**6) for _ in range(size)]
+    ints_b = [rng.choice((-1, 1)) * rng.randint(1, 10**6) for _ in range(size)]
+    floats_a = [rng.uniform(-1e6, 1e6) for _ in range(size)]
+    floats_b = [rng.choice((-1, 1)) * rng.uniform(1e-3, 1e6) for _ in range(size)]
+    cases = [("list int", ints_a, ints_b), ("list float", floats_a, floats_b),
+             ("array('q')", array('q', ints_a), array('q', ints_b)), ("array('d')", array('d', floats_a), array('d', floats_b))]
+    if main.np is not None:
+        cases.append(("ndarray float64", main.np.array(floats_a), main.np.array(floats_b)))
+    return cases
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="バッチ演算とスカラー関数のループの所要時間を比較する")
+    parser.add_argument("--size", type=int, default=1000000, help="要素数")
+    parser.add_argument("--chunk-size", type=int, default=main.DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.size} 要素（NumPy: {'あり' if main.np is not None else 'なし'}）")
+    print(f"{'入力':<16} {'演算':<9} {'ループ':>10} {'バッチ':>10} {'倍率':>7}")
+    for label, a, b in inputs(args.size, args.seed):
+        for name, scalar, batch in OPERATIONS:
+            expected, loop_seconds = timed(lambda: [scalar(x, y) for x, y in zip(a, b)])
+            result, batch_seconds = timed(lambda: batch(a, b))
+            if list(result) != expected:
+                raise AssertionError(f"{label} {name}: バッチ演算の結果がスカラー関数と一致しません")
+            print(f"{label:<16} {name:<9} {loop_seconds * 1000:8.1f}ms {batch_seconds * 1000:8.1f}ms "
+                  f"{loop_seconds / batch_seconds:6.1f}x")
+    _, a, b = inputs(args.size, args.seed)[1]
+    _, seconds = timed(lambda: sum(len(chunk) for chunk in divide_chunks(iter(a), iter(b), args.chunk_size, zero="nan")))
+    print(f"divide_chunks（イテレーター, チャンク {args.chunk_size}）: {seconds * 1000:.1f}ms")
@@ -0,0 +1,73 @@
+# 特徴量テーブル（workflow_features.py）の集計にかかる時間を計測するベンチマークです。
+# 指定した行数のテーブルを乱数で直接作成し（YAMLの解析は含みません）、主な集計をそれぞれ実行します。
+# NumPyがない環境でも実行できますが、行数は小さくしてください。
+#
+# 使い方:
+#   python benchmarks/bench_feature_table.py --rows 1000000
+
+import argparse
+from array import array
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import workflow_features
+from workflow_features import COLUMN_TYPES, FeatureTable, SPARSE_COLUMNS
+
+def synthetic_table(rows, seed=0, triggers=12, runners=20, languages=9, actions=3000):
+    """乱数で特徴量テーブルを作成する"""
+    rng = random.Random(seed)
+    columns = {name: array(code) for name, code in COLUMN_TYPES.items()}
+    for offsets, _ in SPARSE_COLUMNS.values():
+        columns[offsets].append(0)
+    for _ in range(rows):
+        columns["triggers"].append(rng.getrandbits(triggers))
+        columns["runners"].append(1 << rng.randrange(runners))
+        columns["language"].append(rng.randrange(-1, languages))
+        columns["jobs"].append(rng.randint(1, 10))
+        columns["steps"].append(rng.randint(1, 50))
+        columns["size"].append(rng.randint(100, 9000))
+        columns["flags"].append(0)
+        columns["top_level"].append(1)
+        for _ in range(rng.randrange(6)):
+            columns["action_ids"].append(rng.randrange(actions))
+        columns["action_offsets"].append(len(columns["action_ids"]))
+        columns["rare_triggers_offsets"].append(0)
+        columns["rare_runners_offsets"].append(0)
+    if workflow_features.np is not None:
+        np = workflow_features.np
+        columns = {name: np.frombuffer(column, dtype=column.typecode) for name, column in columns.items()}
+    vocabularies = {
+        "language": [f"lang{i}" for i in range(languages)],
+        "triggers": [f"trigger{i}" for i in range(triggers)],
+        "runners": [f"runner{i}" for i in range(runners)],
+        "actions": [f"owner/action{i}" for i in range(actions)],
+        "rare_triggers": [],
+        "rare_runners": [],
+    }
+    return FeatureTable([str(i) for i in range(rows)], vocabularies, columns)
+
+def measure(label, func):
+    start = time.perf_counter()
+    func()
+    print(f"{label:<36} {(time.perf_counter() - start) * 1000:10.1f} ミリ秒")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="特徴量テーブルの集計時間を計測する")
+    parser.add_argument("--rows", type=int, default=1000000, help="テーブルの行数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    table = synthetic_table(args.rows, args.seed)
+    print(f"{len(table)} 行（NumPy: {'あり' if workflow_features.np is not None else 'なし'}）")
+    measure("count_by language", lambda: table.count_by("language"))
+    measure("count_by triggers", lambda: table.count_by("triggers"))
+    measure("count_by actions (top 20)", lambda: table.count_by("actions", top=20))
+    measure("select trigger & language", lambda: table.select(trigger="trigger3", language="lang2"))
+    measure("group_by language / steps / mean", lambda: table.group_by("language", "steps", "mean"))
+    measure("group_by triggers / size / max", lambda: table.group_by("triggers", "size", "max"))
+    measure("crosstab language x triggers", lambda: table.crosstab("language", "triggers"))
+    measure("crosstab triggers x actions", lambda: table.crosstab("triggers", "actions"))
@@ -0,0 +1,189 @@
+# 言語検出のスループットを、従来のif/elifチェーンとルール表をコンパイルしたマッチャー（language_rules.py）で比較するベンチマークです。
+# --directory を指定すると、そのディレクトリのワークフローのステップを使います。省略すると、実際のワークフローに近い
+# 合成コーパス（ほとんどのファイルの言語は1つで、同じ run / uses が多くのファイルで繰り返し使われ、runの一部は
+# ファイルごとに異なる）を使います。マッチャーはステップの文字列ごとに照合結果をキャッシュするため、
+# 初めて現れる文字列だけのときの性能（キャッシュなし）も計測します。
+# マッチャーはチェーンの判定に加えて言語ごとのスコアを集計するため、言語が2つ以上のワークフローでは順位を求める分だけ
+# 遅くなります（--mixed-ratio 1 ですべてのファイルを複数の言語にできます）。
+#
+# 使い方:
+#   python benchmarks/bench_language_rules.py --workflows 50000
+#   python benchmarks/bench_language_rules.py --directory github_workflows_dataset --repeat 20
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from language_rules import LanguageMatcher
+from workflow_parser import YAML_LOADER, iter_steps
+
+# 言語 -> (セットアップのアクション, その言語のrunコマンド)
+LANGUAGE_STEPS = {
+    "Python": (["actions/setup-python", "pytorch/test-infra/.github/actions/setup-python"],
+               ["python -m pip install --upgrade pip\npip install -r requirements.txt", "pytest -q",
+                "python setup.py sdist"]),
+    "Node.js": (["actions/setup-node"],
+                ["npm ci", "npm test", "npm run build", "yarn install --frozen-lockfile", "pnpm install"]),
+    "Java": (["actions/setup-java"], ["./gradlew build", "mvn -B package --file pom.xml"]),
+    "Go": (["actions/setup-go"], ["go build ./...", "go test -v ./..."]),
+    "Ruby": (["ruby/setup-ruby"], ["bundle install\nbundle exec rake"]),
+    "PHP": (["shivammathur/setup-php"], ["composer install --no-progress"]),
+    "C#": (["actions/setup-dotnet"], ["dotnet build --no-restore"]),
+    "Rust": (["dtolnay/rust-toolchain"], ["cargo build --verbose", "cargo test --verbose"]),
+}
+USES_ACTIONS = ["actions/checkout", "actions/cache", "actions/upload-artifact", "codecov/codecov-action"]
+RUN_STEPS = [
+    "make -j4", "echo \"done\"",
+    "git config user.name github-actions\ngit config user.email github-actions@github.com",
+]
+SCRIPT_LINES = [
+    "set -euo pipefail", "echo \"sha=${GITHUB_SHA}\" >> \"$GITHUB_OUTPUT\"", "if [ -f .env ]; then cat .env; fi",
+    "curl -sSfL https://example.com/install.sh | sh -s -- -b /usr/local/bin", "git diff --exit-code",
+    "export PATH=\"$HOME/.local/bin:$PATH\"", "ls -la dist/", "tar -czf artifacts.tar.gz build/",
+]
+
+def legacy_detect_language(steps):
+    """language_rules 導入前の if/elif チェーン（比較用）"""
+    detected_language = None
+    for step in steps:
+        if 'uses' in step:
+            action_path = step['uses'].lower()
+            if 'setup-python' in action_path:
+                detected_language = 'Python'
+            elif 'setup-node' in action_path or 'actions/setup-node' in action_path:
+                detected_language = 'Node.js'
+            elif 'setup-java' in action_path:
+                detected_language = 'Java'
+            elif 'setup-go' in action_path:
+                detected_language = 'Go'
+            elif 'actions/checkout' in action_path:
+                pass
+            elif 'docker/build-push-action' in action_path:
+                detected_language = 'Docker/Container'
+            elif 'ruby/setup-ruby' in action_path:
+                detected_language = 'Ruby'
+            elif 'php/setup-php' in action_path:
+                detected_language = 'PHP'
+        elif 'run' in step:
+            run_command = step['run'].lower()
+            if 'python' in run_command and 'pip' in run_command:
+                detected_language = 'Python'
+            elif 'npm' in run_command or 'node' in run_command:
+                detected_language = 'Node.js'
+            elif 'java' in run_command or 'maven' in run_command or 'gradle' in run_command:
+                detected_language = 'Java'
+            elif 'go build' in run_command or 'go run' in run_command:
+                detected_language = 'Go'
+            elif 'bundle install' in run_command or 'rake' in run_command:
+                detected_language = 'Ruby'
+            elif 'composer install' in run_command:
+                detected_language = 'PHP'
+            elif 'dotnet' in run_command:
+                detected_language = 'C#'
+            elif 'cargo build' in run_command:
+                detected_language = 'Rust'
+    return detected_language
+
+def generate_corpus(count, seed=0, unique_ratio=0.5, mixed_ratio=0.1):
+    """
+    ステップのリストからなる合成ワークフローをcount個生成する
+
+    ステップの数と種類の割合は、サンプルのデータセット（1ファイルあたり約13ステップで、約半数がuses。runステップの
+    約半数は1回しか現れない文字列で、その約半数は複数行のスクリプト。繰り返し現れるrunの約2割も複数行のスクリプト）に
+    合わせています。各ワークフローは1つの言語のアクションとコマンドを使い、mixed_ratio の割合のワークフローは
+    2つ目の言語も使います（サンプルのデータセットでは、約93%のワークフローで検出される言語が1つです）。
+    unique_ratio はほかと重ならないrunステップの割合です。
+    """
+    rng = random.Random(seed)
+    languages = sorted(LANGUAGE_STEPS)
+    # 多くのファイルで共通の複数行のスクリプト（コピーされたワークフローなど）
+    shared_scripts = {language: ["\n".join(rng.sample(SCRIPT_LINES, rng.randint(1, 4)) + [rng.choice(commands)])
+                                 for _ in range(20)]
+                      for language, (_, commands) in LANGUAGE_STEPS.items()}
+    corpus = []
+    for n in range(count):
+        chosen = rng.sample(languages, 2 if rng.random() < mixed_ratio else 1)
+        steps = [{"uses": "actions/checkout@v4"}]
+        for i in range(rng.randint(4, 20)):
+            language = rng.choice(chosen)
+            actions, commands = LANGUAGE_STEPS[language]
+            if rng.random() < 0.45:
+                action = rng.choice(actions if rng.random() < 0.5 else USES_ACTIONS)
+                steps.append({"uses": f"{action}@v{rng.randint(1, 5)}"})
+                continue
+            command = rng.choice(commands if rng.random() < 0.6 else RUN_STEPS)
+            if rng.random() < unique_ratio:
+                if rng.random() < 0.5:
+                    run = f"{command} build/{n}/{i}"
+                else:
+                    run = "\n".join(rng.sample(SCRIPT_LINES, rng.randint(1, 4)) + [command, f"echo build/{n}/{i}"])
+            elif rng.random() < 0.35:
+                run = rng.choice(shared_scripts[language])
+            else:
+                run = command
+            steps.append({"run": run})
+        corpus.append(steps)
+    return corpus
+
+def load_corpus(directory):
+    """
+    ディレクトリのワークフローのステップのリストを読み込む
+
+    解析できないファイルと、従来のチェーンがエラーになる（文字列以外の uses / run がある）ファイルは除きます。
+    """
+    corpus = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith((".yml", ".yaml")):
+            continue
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                steps = list(iter_steps(yaml.load(f.read(), Loader=YAML_LOADER)))
+            legacy_detect_language(steps)
+        except Exception:
+            continue
+        corpus.append(steps)
+    return corpus
+
+def measure(func, corpus):
+    start = time.perf_counter()
+    for steps in corpus:
+        func(steps)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="言語検出のスループットを比較する")
+    parser.add_argument("--directory", help="計測に使うワークフローのディレクトリ（省略時は合成コーパス）")
+    parser.add_argument("--workflows", type=int, default=50000, help="合成ワークフローの数")
+    parser.add_argument("--unique-ratio", type=float, default=0.5, help="ほかと重ならないrunステップの割合")
+    parser.add_argument("--mixed-ratio", type=float, default=0.1, help="2つ目の言語を使うワークフローの割合")
+    parser.add_argument("--repeat", type=int, default=10, help="計測の回数（それぞれの最短の時間を比較する）")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.directory:
+        corpus = load_corpus(args.directory)
+    else:
+        corpus = generate_corpus(args.workflows, args.seed, args.unique_ratio, args.mixed_ratio)
+    print(f"{len(corpus)} ワークフロー、{sum(map(len, corpus))} ステップ")
+    matcher = LanguageMatcher()
+    for steps in corpus:
+        if matcher.classify(steps)[0] != legacy_detect_language(steps):
+            raise AssertionError("LanguageMatcher の主要言語が if/elif チェーンと一致しません")
+    # キャッシュはコーパス内で繰り返し現れる文字列だけに効くように、計測ごとに新しいマッチャーを使う
+    # （キャッシュなしは、すべてのステップが初めて現れる文字列の場合の性能）
+    labels = ("if/elif チェーン", "LanguageMatcher.classify", "キャッシュなし")
+    best = dict.fromkeys(labels, float("inf"))
+    for _ in range(args.repeat):
+        for label, func in zip(labels, (legacy_detect_language, LanguageMatcher().classify,
+                                        LanguageMatcher(cache_size=0).classify)):
+            best[label] = min(best[label], measure(func, corpus))
+    for label, elapsed in best.items():
+        print(f"{label:<24} {elapsed:8.3f} 秒  {len(corpus) / elapsed:12,.0f} ワークフロー/秒")
+    legacy = best[labels[0]]
+    print(f"速度比: {legacy / best[labels[1]]:.2f} 倍（キャッシュなし: {legacy / best[labels[2]]:.2f} 倍）")
@@ -0,0 +1,125 @@
+# インデックスのないコーパスに対するトリガー検索の所要時間とメモリ使用量を計測するベンチマークです。
+# ファイル全体を解析する通常の経路（summarize_workflow_bytes）と、`on` 以外の値を構築しない高速な経路
+# （summarize_triggers_bytes、fast=True）を、次の2つの段階で比較し、両者の結果が一致することを確認します。
+#   - ファイル1つの解析: メモリ上のファイルの内容を解析する時間だけ（ファイルの読み込みやインデックスを含まない）
+#   - 検索全体: search_workflows_trigger の所要時間（ファイルの読み込みと、通常の経路ではインデックスの保存を含む）
+# 所要時間は --repeat 回の最短の時間で、tracemalloc を止めて計測します。メモリは別の1回の実行を tracemalloc で
+# 計測したPythonのオブジェクトの割り当てのピークです。
+# 高速な経路もイベント列を最後まで読むため、速度の差は値を構築する処理の分だけです。libyaml がない環境
+# （純Python実装のローダー）では字句解析と構文解析の時間が大部分を占めるため、ほとんど速くなりません
+# （--pure-python でlibyamlがあっても純Python実装のローダーで計測できます）。
+# --directory を省略すると、synthetic_corpus.py で合成したコーパスを一時ディレクトリに作成して使います。
+#
+# 使い方:
+#   python benchmarks/bench_trigger_search.py --files 20000
+#   python benchmarks/bench_trigger_search.py --directory github_workflows_dataset --trigger schedule
+#   python benchmarks/bench_trigger_search.py --directory github_workflows_dataset --pure-python
+
+import argparse
+import contextlib
+import glob
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from get_workflow_utils import search_workflows_trigger
+import workflow_parser
+from workflow_parser import summarize_triggers_bytes, summarize_workflow_bytes
+from synthetic_corpus import write_corpus
+
+def best_time(func, setup=None, repeat=3):
+    """setup() のあとに func() を repeat 回実行し、最短の所要時間（秒）を返す（setup の時間は含めない）"""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+    return best
+
+def peak_memory(func, setup=None):
+    """setup() のあとに func() を tracemalloc を有効にして1回実行し、(戻り値, 割り当てのピーク（バイト）) を返す"""
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+def remove_index(corpus):
+    """コーパスのインデックス（.workflow_* ファイル）を削除する"""
+    for path in glob.glob(os.path.join(corpus, ".workflow_*")):
+        os.remove(path)
+
+def read_contents(corpus):
+    contents = []
+    for name in sorted(os.listdir(corpus)):
+        if name.endswith((".yml", ".yaml")):
+            with open(os.path.join(corpus, name), "rb") as f:
+                contents.append(f.read())
+    return contents
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="トリガー検索の通常の経路と高速な経路を比較する")
+    parser.add_argument("--directory", help="計測に使うワークフローのディレクトリ（省略時は合成コーパス）")
+    parser.add_argument("--files", type=int, default=20000, help="合成コーパスのファイル数")
+    parser.add_argument("--trigger", default="push")
+    parser.add_argument("--workers", type=int, default=None, help="解析に使うワーカープロセス数（0はCPUコア数）")
+    parser.add_argument("--repeat", type=int, default=3, help="計測の回数（それぞれの最短の時間を比較する）")
+    parser.add_argument("--pure-python", action="store_true", help="libyamlがあっても純Python実装のローダーを使う")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.pure_python:
+        workflow_parser.YAML_LOADER = yaml.SafeLoader
+
+    work_dir = tempfile.mkdtemp(prefix="bench_trigger_")
+    try:
+        corpus = os.path.join(work_dir, "corpus")
+        if args.directory:
+            shutil.copytree(args.directory, corpus, ignore=shutil.ignore_patterns(".workflow_*"))
+        else:
+            write_corpus(corpus, args.files, seed=args.seed)
+        contents = read_contents(corpus)
+        print(f"{corpus}（{len(contents)}ファイル、トリガー: {args.trigger}、"
+              f"ローダー: {workflow_parser.YAML_LOADER.__name__}、{args.repeat}回の最短）")
+
+        for raw in contents:
+            summary = summarize_triggers_bytes(raw)
+            full_summary = summarize_workflow_bytes(raw)
+            if summary != {key: full_summary[key] for key in summary}:
+                raise AssertionError("summarize_triggers_bytes の結果が summarize_workflow_bytes と一致しません")
+        fast_parse = best_time(lambda: [summarize_triggers_bytes(raw) for raw in contents], repeat=args.repeat)
+        full_parse = best_time(lambda: [summarize_workflow_bytes(raw) for raw in contents], repeat=args.repeat)
+        print(f"{'ファイル1つの解析: トリガーだけ':<32} {fast_parse * 1000:10.1f} ミリ秒")
+        print(f"{'ファイル1つの解析: ファイル全体':<32} {full_parse * 1000:10.1f} ミリ秒")
+
+        def search(fast):
+            return lambda: search_workflows_trigger(args.trigger, corpus, workers=args.workers, fast=fast)
+        fast_search = best_time(search(True), repeat=args.repeat)
+        # 通常の経路は毎回インデックスを作り直す
+        full_search = best_time(search(False), setup=lambda: remove_index(corpus), repeat=args.repeat)
+        fast, fast_peak = peak_memory(search(True))
+        full, full_peak = peak_memory(search(False), setup=lambda: remove_index(corpus))
+        print(f"{'検索全体: fast=True（インデックスなし）':<32} {fast_search * 1000:10.1f} ミリ秒 {fast_peak / 1024 / 1024:8.1f} MiB")
+        print(f"{'検索全体: 通常（インデックスを作成）':<32} {full_search * 1000:10.1f} ミリ秒 {full_peak / 1024 / 1024:8.1f} MiB")
+        if sorted(fast) != sorted(full):
+            raise AssertionError("高速な経路の結果が通常の経路と一致しません")
+        print(f"一致: {len(full)}個, 高速化: ファイル1つの解析 {full_parse / fast_parse:.1f}倍、"
+              f"検索全体 {full_search / fast_search:.1f}倍")
+    finally:
+        shutil.rmtree(work_dir)
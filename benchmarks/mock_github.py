@@ -0,0 +1,288 @@
+# ベンチマーク用の、GitHub REST API（検索・リポジトリ・contents）のローカルな代替サーバーです。
+# 合成コーパス（synthetic_corpus.py）のワークフローを持つリポジトリを返し、レスポンスごとの遅延と
+# レートリミット（X-RateLimit-* ヘッダーと、上限到達時の403）を設定できます。
+# リポジトリとワークフロー一覧のレスポンスにはETagを付け、条件付きリクエストには304を返します。
+# 検索は stars: と created: の修飾子で絞り込み、GitHubと同じく1つのクエリで取得できるのは先頭の search_cap 件までです。
+# collect_github_workflows.get_github_workflow_files の base_url や repo_info_tool.API_URL に url を指定して使います。
+#
+# 使い方:
+#   python benchmarks/mock_github.py --repos 100 --latency 0.05 --rate-limit 5000
+
+import argparse
+import base64
+import datetime
+import hashlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import json
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs, quote, urlsplit
+
+from synthetic_corpus import iter_corpus
+
+_QUALIFIER_RE = re.compile(r"(stars|created):(\S+)")
+
+def _match_range(value, spec, parse):
+    """GitHubの検索の範囲指定（>N, >=N, <N, <=N, A..B, A..*, N）に value が含まれるか"""
+    for prefix, compare in ((">=", lambda a, b: a >= b), ("<=", lambda a, b: a <= b),
+                            (">", lambda a, b: a > b), ("<", lambda a, b: a < b)):
+        if spec.startswith(prefix):
+            return compare(value, parse(spec[len(prefix):]))
+    if ".." in spec:
+        low, high = spec.split("..", 1)
+        return (low == "*" or value >= parse(low)) and (high == "*" or value <= parse(high))
+    return value == parse(spec)
+
+class _Quota:
+    """固定ウィンドウのレートリミット（GitHub APIと同じく、ウィンドウの終わりに残り回数が戻る）"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.reset_at = time.time() + window
+        self.remaining = limit
+        self.lock = threading.Lock()
+
+    def take(self):
+        """1回分を消費し、(許可されたかどうか, 残り回数, リセット時刻) を返す"""
+        with self.lock:
+            now = time.time()
+            if now >= self.reset_at:
+                self.reset_at = now + self.window
+                self.remaining = self.limit
+            if self.remaining <= 0:
+                return False, 0, self.reset_at
+            self.remaining -= 1
+            return True, self.remaining, self.reset_at
+
+class MockGitHub:
+    """
+    GitHub REST APIの代替サーバー
+
+    リポジトリ名 owner/name ごとに {ファイル名: 内容} を持ち（None はワークフローのディレクトリがないリポジトリ）、
+    スター数の降順で検索結果を返します。stats に受け付けたリクエスト数などを記録します。
+    """
+
+    def __init__(self, repos, latency=0.0, rate_limit=5000, search_rate_limit=30, window=60.0, per_page=30, search_cap=1000):
+        """
+        Args:
+            repos (dict): リポジトリ名 -> {ファイル名: 内容} または None
+            latency (float): 各レスポンスを返すまでの遅延（秒）
+            rate_limit (int): ウィンドウあたりのコアAPIのリクエスト数
+            search_rate_limit (int): ウィンドウあたりの検索APIのリクエスト数
+            window (float): レートリミットのウィンドウ（秒）
+            per_page (int): 検索結果の1ページあたりの件数（リクエストで per_page を指定した場合はそちらを優先）
+            search_cap (int): 1つの検索クエリで取得できる結果の上限（total_count は上限を超えても全件数を返す）
+        """
+        self.repos = repos
+        self.stars = {name: 100000 // (i + 1) for i, name in enumerate(repos)}
+        # 作成日は2008年から約16年の範囲にばらつかせる
+        self.created = {name: datetime.date(2008, 1, 1) + datetime.timedelta(days=(i * 7919) % 6000)
+                        for i, name in enumerate(repos)}
+        self.search_cap = search_cap
+        self.latency = latency
+        self.per_page = per_page
+        self.core = _Quota(rate_limit, window)
+        self.search = _Quota(search_rate_limit, window)
+        self.stats = {"requests": 0, "rate_limited": 0, "not_modified": 0}
+        self._stats_lock = threading.Lock()
+        self._server = None
+
+    @classmethod
+    def from_corpus(cls, repo_count, files_per_repo=(1, 6), seed=0, empty_ratio=0.1, **options):
+        """合成コーパスのワークフローを repo_count 個のリポジトリに割り振ったサーバーを作る"""
+        rng = random.Random(seed)
+        counts = [0 if rng.random() < empty_ratio else rng.randint(*files_per_repo) for _ in range(repo_count)]
+        corpus = iter_corpus(sum(counts), seed)
+        repos = {}
+        for i, count in enumerate(counts):
+            repos[f"owner{i}/repo{i}"] = dict(next(corpus) for _ in range(count)) if count else None
+        return cls(repos, **options)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def file_count(self):
+        """ワークフローファイルの総数"""
+        return sum(len(files) for files in self.repos.values() if files)
+
+    def start(self):
+        """別スレッドでサーバーを起動する（ポートは空いているものを使う）"""
+        mock = self
+
+        class Handler(_Handler):
+            server_mock = mock
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def search_names(self, q):
+        """検索クエリの stars: と created: の修飾子に一致するリポジトリ名をスター数の降順で返す"""
+        names = list(self.repos)
+        for qualifier, spec in _QUALIFIER_RE.findall(q):
+            if qualifier == "stars":
+                names = [name for name in names if _match_range(self.stars[name], spec, int)]
+            else:
+                names = [name for name in names if _match_range(self.created[name], spec, datetime.date.fromisoformat)]
+        return names
+
+class _Handler(BaseHTTPRequestHandler):
+    server_mock = None
+    protocol_version = "HTTP/1.1"
+    # ヘッダーと本文を別々に書き込むため、Nagleアルゴリズムによる遅延が計測値に混ざらないようにする
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def base(self):
+        return f"http://{self.headers['Host']}"
+
+    def _send(self, code, body=None, headers=None, quota=None):
+        data = body if isinstance(body, bytes) else (json.dumps(body).encode() if body is not None else b"")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if quota is not None:
+            limit, remaining, reset_at = quota
+            self.send_header("X-RateLimit-Limit", str(limit))
+            self.send_header("X-RateLimit-Remaining", str(remaining))
+            self.send_header("X-RateLimit-Reset", str(int(reset_at) + 1))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _repo_json(self, name):
+        owner, repo = name.split("/")
+        return {
+            "id": abs(hash(name)) % 10 ** 9, "name": repo, "full_name": name, "owner": {"login": owner},
+            "stargazers_count": self.server_mock.stars[name], "forks_count": 0, "description": f"{name} (mock)",
+            "created_at": f"{self.server_mock.created[name].isoformat()}T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z", "pushed_at": "2024-01-01T00:00:00Z", "url": f"{self.base}/repos/{name}",
+        }
+
+    def do_GET(self):
+        mock = self.server_mock
+        mock._count("requests")
+        if mock.latency:
+            time.sleep(mock.latency)
+        parts = urlsplit(self.path)
+        path = parts.path.rstrip("/")
+        query = parse_qs(parts.query)
+        # raw.githubusercontent.com に相当するダウンロードはレートリミットの対象外
+        if path.startswith("/raw/"):
+            _, _, owner, repo, file_name = path.split("/", 4)
+            return self._send(200, mock.repos[f"{owner}/{repo}"][file_name].encode('utf-8'))
+        quota = mock.search if path.startswith("/search/") else mock.core
+        allowed, remaining, reset_at = quota.take()
+        quota_headers = (quota.limit, remaining, reset_at)
+        if not allowed:
+            mock._count("rate_limited")
+            retry_after = max(1, int(reset_at - time.time()) + 1)
+            return self._send(403, {"message": "API rate limit exceeded (mock)"}, {"Retry-After": str(retry_after)}, quota_headers)
+
+        if path == "/user":
+            return self._send(200, {"login": "benchmark"}, quota=quota_headers)
+        if path == "/rate_limit":
+            resources = {
+                name: {"limit": q.limit, "remaining": q.remaining, "reset": int(q.reset_at)}
+                for name, q in (("core", mock.core), ("search", mock.search))
+            }
+            return self._send(200, {"resources": resources, "rate": resources["core"]}, quota=quota_headers)
+        if path == "/search/repositories":
+            q = query.get("q", [""])[0]
+            names = mock.search_names(q)
+            reachable = names[:mock.search_cap]
+            per_page = int(query.get("per_page", [mock.per_page])[0])
+            page = int(query.get("page", ["1"])[0])
+            items = [self._repo_json(name) for name in reachable[(page - 1) * per_page:page * per_page]]
+            headers = {}
+            if page * per_page < len(reachable):
+                headers["Link"] = f'<{self.base}/search/repositories?q={quote(q)}&per_page={per_page}&page={page + 1}>; rel="next"'
+            return self._send(200, {"total_count": len(names), "incomplete_results": False, "items": items}, headers, quota_headers)
+        if path.startswith("/repos/"):
+            segments = path.split("/")
+            name = "/".join(segments[2:4])
+            if name not in mock.repos:
+                return self._send(404, {"message": "Not Found"}, quota=quota_headers)
+            if len(segments) == 4:
+                return self._send_with_etag(self._repo_json(name), quota_headers)
+            rest = "/".join(segments[5:]) if segments[4] == "contents" else None
+            files = mock.repos[name]
+            if rest is None or files is None or not rest.startswith(".github/workflows"):
+                return self._send(404, {"message": "Not Found"}, quota=quota_headers)
+            if rest == ".github/workflows":
+                return self._listing(name, files, quota_headers)
+            file_name = rest.rsplit("/", 1)[-1]
+            if file_name not in files:
+                return self._send(404, {"message": "Not Found"}, quota=quota_headers)
+            content = files[file_name].encode('utf-8')
+            return self._send(200, {
+                "name": file_name, "path": rest, "sha": str(abs(hash(content))), "type": "file", "size": len(content),
+                "encoding": "base64", "content": base64.b64encode(content).decode(),
+                "url": f"{self.base}/repos/{name}/contents/{rest}", "download_url": f"{self.base}/raw/{name}/{file_name}",
+            }, quota=quota_headers)
+        return self._send(404, {"message": "Not Found"}, quota=quota_headers)
+
+    def _send_with_etag(self, body, quota_headers):
+        """ETagを付けて返す。If-None-Match が一致する場合は304を返す"""
+        data = json.dumps(body, sort_keys=True).encode()
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.server_mock._count("not_modified")
+            return self._send(304, headers={"ETag": etag}, quota=quota_headers)
+        return self._send(200, data, {"ETag": etag}, quota_headers)
+
+    def _listing(self, name, files, quota_headers):
+        items = [
+            {
+                "name": file_name, "path": f".github/workflows/{file_name}", "sha": str(abs(hash(content))), "type": "file",
+                "size": len(content), "url": f"{self.base}/repos/{name}/contents/.github/workflows/{file_name}",
+                "download_url": f"{self.base}/raw/{name}/{file_name}",
+            }
+            for file_name, content in files.items()
+        ]
+        return self._send_with_etag(items, quota_headers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GitHub REST APIのモックサーバーを起動する")
+    parser.add_argument("--repos", type=int, default=100, help="リポジトリ数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="レスポンスごとの遅延（秒）")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="ウィンドウあたりのコアAPIのリクエスト数")
+    parser.add_argument("--window", type=float, default=60.0, help="レートリミットのウィンドウ（秒）")
+    args = parser.parse_args()
+
+    mock = MockGitHub.from_corpus(args.repos, seed=args.seed, latency=args.latency, rate_limit=args.rate_limit, window=args.window)
+    with mock:
+        print(f"{mock.url} で待ち受けています（リポジトリ {len(mock.repos)}、ワークフロー {mock.file_count}）。Ctrl+Cで終了します")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,194 @@
+# 主要な処理の所要時間を合成コーパスとモックのGitHub APIで計測し、結果をJSONに記録するベンチマークスイートです。
+# 計測対象:
+#   - show_workflows_summary（インデックスなしの初回と、インデックスを再利用する2回目）
+#   - remove_duplicate_files_in_dir
+#   - get_github_workflow_files（mock_github.py のサーバーから収集）
+#   - count_workflow_files（リポジトリごとに逐次呼び出し）と count_workflow_files_many（並行・キャッシュなし）
+# 結果は benchmarks/results/<コミット>.json に保存されます。--compare に以前の結果を指定すると、
+# 計測値の比を表示し、--threshold を超えて遅くなったものがあれば終了コード1で終了します。
+#
+# 使い方:
+#   python benchmarks/run_benchmarks.py --files 10000 --repos 200 --latency 0.02
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from collect_github_workflows import get_github_workflow_files
+from get_workflow_utils import remove_duplicate_files_in_dir, show_workflows_summary
+from github_client import GitHubClient
+import repo_info_tool
+from mock_github import MockGitHub
+from synthetic_corpus import write_corpus
+
+BENCHMARKS = ("show_workflows_summary_cold", "show_workflows_summary_warm", "remove_duplicate_files_in_dir",
+              "get_github_workflow_files", "count_workflow_files", "count_workflow_files_many")
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(func, setup=None, repeat=3):
+    """
+    setup() の戻り値を引数に func を repeat 回実行し、所要時間（秒）を返す（setup の時間は含めない）
+
+    Returns:
+        dict: 'min', 'median', 'runs'（各回の秒数）と、最後の実行で func が返した dict の内容
+    """
+    runs = []
+    extra = {}
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        # 計測対象の関数は進捗をprintするため、出力は捨てる
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            extra = func(arg) or {}
+            runs.append(time.perf_counter() - start)
+    return dict({"min": min(runs), "median": statistics.median(runs), "runs": runs}, **extra)
+
+def run_suite(args, work_dir):
+    corpus_dir = os.path.join(work_dir, "corpus")
+    write_corpus(corpus_dir, args.files, args.seed)
+    results = {}
+
+    def fresh_copy():
+        target = os.path.join(work_dir, "dataset")
+        shutil.rmtree(target, ignore_errors=True)
+        shutil.copytree(corpus_dir, target)
+        return target
+
+    def summary(directory):
+        show_workflows_summary(directory, workers=args.workers)
+        return {"files": args.files}
+
+    if "show_workflows_summary_cold" in args.only:
+        results["show_workflows_summary_cold"] = measure(summary, fresh_copy, args.repeat)
+    if "show_workflows_summary_warm" in args.only:
+        warm_dir = fresh_copy()
+        with contextlib.redirect_stdout(io.StringIO()):
+            show_workflows_summary(warm_dir, workers=args.workers)
+        results["show_workflows_summary_warm"] = measure(summary, lambda: warm_dir, args.repeat)
+
+    def dedupe(directory):
+        remove_duplicate_files_in_dir(directory)
+        return {"files": args.files, "remaining": len(os.listdir(directory))}
+
+    if "remove_duplicate_files_in_dir" in args.only:
+        results["remove_duplicate_files_in_dir"] = measure(dedupe, fresh_copy, args.repeat)
+
+    mock = MockGitHub.from_corpus(args.repos, seed=args.seed, latency=args.latency, rate_limit=args.rate_limit,
+                                  search_rate_limit=args.rate_limit, window=args.window, per_page=100)
+    with mock:
+        def collect(output_dir):
+            before = dict(mock.stats)
+            files = get_github_workflow_files("benchmark-token", 0, args.repos, output_dir, args.crawl_workers, base_url=mock.url)
+            return {"repos": args.repos, "files": len(files), "expected_files": mock.file_count,
+                    "requests": mock.stats["requests"] - before["requests"],
+                    "rate_limited": mock.stats["rate_limited"] - before["rate_limited"]}
+
+        def collect_dir():
+            target = os.path.join(work_dir, "collected")
+            shutil.rmtree(target, ignore_errors=True)
+            return target
+
+        if "get_github_workflow_files" in args.only:
+            results["get_github_workflow_files"] = measure(collect, collect_dir, args.repeat)
+
+        def new_client():
+            return GitHubClient(api_url=mock.url, cache_dir=None)
+
+        def count_files(client):
+            total = sum(repo_info_tool.count_workflow_files(*name.split("/"), client=client) for name in mock.repos)
+            return {"repos": len(mock.repos), "files": total}
+
+        def count_files_many(client):
+            total = sum(count for _, count in repo_info_tool.count_workflow_files_many(mock.repos, client, args.crawl_workers))
+            return {"repos": len(mock.repos), "files": total}
+
+        if "count_workflow_files" in args.only:
+            results["count_workflow_files"] = measure(count_files, new_client, args.repeat)
+        if "count_workflow_files_many" in args.only:
+            results["count_workflow_files_many"] = measure(count_files_many, new_client, args.repeat)
+    return results
+
+def compare(results, baseline_path, threshold):
+    """
+    以前の結果と median を比較して表示する
+
+    Returns:
+        bool: threshold 倍を超えて遅くなった計測があればTrue
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n=== {baseline.get('commit')} との比較（median の比。1より大きいほど遅い） ===")
+    regressed = False
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            print(f"- {name}: 比較対象なし")
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        mark = ""
+        if ratio > threshold:
+            mark = "  <-- 遅くなりました"
+            regressed = True
+        print(f"- {name}: {old['median']:.3f} 秒 -> {result['median']:.3f} 秒（{ratio:.2f} 倍）{mark}")
+    return regressed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ベンチマークスイートを実行し、結果をJSONに記録する")
+    parser.add_argument("--files", type=int, default=10000, help="合成コーパスのファイル数（1000〜1000000程度）")
+    parser.add_argument("--repos", type=int, default=200, help="モックサーバーのリポジトリ数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="各ベンチマークの実行回数")
+    parser.add_argument("--workers", type=int, default=None, help="show_workflows_summary の解析に使うワーカープロセス数")
+    parser.add_argument("--crawl-workers", type=int, default=8, help="get_github_workflow_files の並行数")
+    parser.add_argument("--latency", type=float, default=0.02, help="モックサーバーのレスポンスごとの遅延（秒）")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="モックサーバーのウィンドウあたりのリクエスト数")
+    parser.add_argument("--window", type=float, default=60.0, help="モックサーバーのレートリミットのウィンドウ（秒）")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS), help="実行するベンチマーク")
+    parser.add_argument("--output", help="結果のJSONファイル（省略時は benchmarks/results/<コミット>.json）")
+    parser.add_argument("--compare", help="比較する以前の結果のJSONファイル")
+    parser.add_argument("--threshold", type=float, default=1.2, help="遅くなったとみなす median の比")
+    args = parser.parse_args()
+
+    commit = _git_commit()
+    with tempfile.TemporaryDirectory(prefix="workflow-bench-") as work_dir:
+        results = run_suite(args, work_dir)
+
+    for name, result in results.items():
+        details = ", ".join(f"{key}={value}" for key, value in result.items() if key not in ("min", "median", "runs"))
+        print(f"{name:<32} median {result['median']:8.3f} 秒  min {result['min']:8.3f} 秒  {details}")
+
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "threshold")},
+        "results": results,
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
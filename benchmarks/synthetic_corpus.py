@@ -0,0 +1,179 @@
+# ベンチマーク用に、github_workflows_dataset に近い形の合成ワークフローコーパスを生成するスクリプトです。
+# 再利用可能なワークフロー（_*.yml、on: workflow_call）とそれを呼び出すワークフロー、マトリックス、
+# スケジュール（cron）、言語ごとのセットアップ手順を、実データとほぼ同じ割合で含みます。
+# 同じシードからは常に同じコーパスが生成されます。重複排除の計測用に、完全一致の複製も一定割合で含めます。
+#
+# 使い方:
+#   python benchmarks/synthetic_corpus.py /tmp/corpus --files 100000 --seed 0
+
+import argparse
+import os
+import random
+
+# 実データ（github_workflows_dataset）でのおおよその割合
+REUSABLE_RATIO = 0.14
+MATRIX_RATIO = 0.33
+SCHEDULE_RATIO = 0.23
+DUPLICATE_RATIO = 0.05
+
+NAME_WORDS = [
+    "test", "check", "build", "update", "release", "docker", "publish", "pipeline", "lint", "deploy",
+    "nightly", "docs", "bench", "stale", "labeler", "codeql", "coverage", "e2e", "integration", "pr",
+]
+# トリガーごとの出現確率
+TRIGGERS = {
+    "push": 0.6, "pull_request": 0.55, "workflow_dispatch": 0.45, "release": 0.1,
+    "pull_request_target": 0.05, "merge_group": 0.05, "issue_comment": 0.05,
+}
+RUNNERS = ["ubuntu-latest", "ubuntu-22.04", "ubuntu-24.04", "windows-latest", "macos-latest", "macos-14", "self-hosted"]
+
+# 言語ごとの (セットアップのuses, マトリックスのキー, マトリックスの値, runコマンド)（LANGUAGE_WEIGHTS の重みで選ぶ）
+LANGUAGES = [
+    ("actions/setup-python@v5", "python-version", ["'3.9'", "'3.10'", "'3.11'", "'3.12'"],
+     ["python -m pip install --upgrade pip", "pip install -r requirements.txt", "pytest -q"]),
+    ("actions/setup-node@v4", "node-version", ["18", "20", "22"], ["npm ci", "npm run build --if-present", "npm test"]),
+    ("actions/setup-java@v4", "java", ["11", "17", "21"], ["./gradlew build", "mvn -B package --file pom.xml"]),
+    ("actions/setup-go@v5", "go-version", ["'1.21'", "'1.22'"], ["go build -v ./...", "go test -v ./..."]),
+    ("ruby/setup-ruby@v1", "ruby-version", ["'3.1'", "'3.2'", "'3.3'"], ["bundle install", "bundle exec rake"]),
+    ("shivammathur/setup-php@v2", "php-version", ["'8.1'", "'8.2'", "'8.3'"], ["composer install --no-progress"]),
+    ("actions/setup-dotnet@v4", "dotnet-version", ["'6.0.x'", "'8.0.x'"], ["dotnet restore", "dotnet build --no-restore"]),
+    ("dtolnay/rust-toolchain@stable", "toolchain", ["stable", "beta", "nightly"], ["cargo build --verbose", "cargo test --verbose"]),
+]
+LANGUAGE_WEIGHTS = [25, 30, 12, 10, 5, 5, 6, 7]
+EXTRA_USES = [
+    "actions/cache@v4", "actions/upload-artifact@v4", "actions/download-artifact@v4", "codecov/codecov-action@v4",
+    "docker/setup-buildx-action@v3", "docker/login-action@v3", "docker/build-push-action@v6", "github/codeql-action/init@v3",
+    "peaceiris/actions-gh-pages@v4", "softprops/action-gh-release@v2", "actions/github-script@v7",
+]
+EXTRA_RUNS = ["make -j4", "echo \"done\"", "git diff --exit-code", "./scripts/ci.sh", "ls -la"]
+
+def _file_name(rng, used, prefix=""):
+    while True:
+        words = rng.sample(NAME_WORDS, rng.randint(1, 2))
+        name = f"{prefix}{'-'.join(words)}-{rng.randrange(100000)}{rng.choice(('.yml', '.yml', '.yml', '.yaml'))}"
+        if name not in used:
+            used.add(name)
+            return name
+
+def _steps(rng, language, matrix_key=None):
+    setup_uses, key, values, runs = language
+    lines = ["      - uses: actions/checkout@v4"]
+    version = "${{ matrix.%s }}" % matrix_key if matrix_key else values[-1]
+    lines += [f"      - uses: {setup_uses}", "        with:", f"          {key}: {version}"]
+    for uses in rng.sample(EXTRA_USES, rng.randint(0, 3)):
+        lines.append(f"      - uses: {uses}")
+    for run in runs + rng.sample(EXTRA_RUNS, rng.randint(0, 2)):
+        lines.append(f"      - run: {run}")
+    return lines
+
+def _on_block(rng, reusable):
+    if reusable:
+        lines = ["on:", "  workflow_call:", "    inputs:"]
+        for name in rng.sample(["build-environment", "docker-image", "test-matrix", "timeout-minutes", "sync-tag"], rng.randint(1, 4)):
+            lines += [f"      {name}:", "        required: false", "        type: string", "        default: \"\""]
+        return lines
+    lines = ["on:"]
+    triggers = [trigger for trigger, p in TRIGGERS.items() if rng.random() < p] or ["push"]
+    for trigger in triggers:
+        if trigger in ("push", "pull_request"):
+            lines += [f"  {trigger}:", "    branches: [ main ]"]
+        else:
+            lines.append(f"  {trigger}:")
+    if rng.random() < SCHEDULE_RATIO:
+        lines += ["  schedule:", f"    - cron: '{rng.randrange(60)} {rng.randrange(24)} * * {rng.randrange(7)}'"]
+    return lines
+
+def generate_workflow(rng, reusable=False, reusable_names=()):
+    """
+    合成ワークフローを1つ生成する
+
+    Args:
+        rng (random.Random): 乱数生成器
+        reusable (bool): 再利用可能なワークフロー（on: workflow_call）にするかどうか
+        reusable_names (sequence): 呼び出し先にできる再利用可能なワークフローのファイル名
+
+    Returns:
+        str: ワークフローのYAML
+    """
+    language = rng.choices(LANGUAGES, LANGUAGE_WEIGHTS)[0]
+    lines = [f"name: {rng.choice(NAME_WORDS)}", ""] + _on_block(rng, reusable) + [""]
+    if rng.random() < 0.3:
+        lines += ["permissions:", "  contents: read", ""]
+    if rng.random() < 0.3:
+        lines += ["concurrency:", "  group: ${{ github.workflow }}-${{ github.ref }}", "  cancel-in-progress: true", ""]
+    lines.append("jobs:")
+    for job in range(rng.randint(1, 3)):
+        lines.append(f"  job{job}:")
+        if not reusable and reusable_names and rng.random() < 0.3:
+            lines += [f"    uses: ./.github/workflows/{rng.choice(reusable_names)}", "    with:", "      build-environment: linux", "    secrets: inherit"]
+            continue
+        matrix_key = None
+        if rng.random() < MATRIX_RATIO:
+            matrix_key = language[1]
+            runners = rng.sample(RUNNERS[:6], rng.randint(1, 3))
+            lines += [
+                "    runs-on: ${{ matrix.os }}",
+                "    strategy:",
+                "      fail-fast: false",
+                "      matrix:",
+                f"        os: [{', '.join(runners)}]",
+                f"        {matrix_key}: [{', '.join(rng.sample(language[2], rng.randint(1, len(language[2]))))}]",
+            ]
+        else:
+            lines.append(f"    runs-on: {rng.choice(RUNNERS)}")
+        lines.append("    steps:")
+        lines += _steps(rng, language, matrix_key)
+    return "\n".join(lines) + "\n"
+
+def iter_corpus(files, seed=0, duplicate_ratio=DUPLICATE_RATIO):
+    """
+    (ファイル名, 内容) を files 個生成する
+
+    再利用可能なワークフローは _*.yml とし、それ以外のワークフローの一部から呼び出されます。
+    duplicate_ratio の割合で、それまでに生成した内容と完全に一致する複製を別名で含めます。
+    """
+    rng = random.Random(seed)
+    used = set()
+    reusable_names = []
+    recent = []
+    for _ in range(files):
+        if recent and rng.random() < duplicate_ratio:
+            yield _file_name(rng, used), rng.choice(recent)
+            continue
+        reusable = rng.random() < REUSABLE_RATIO
+        name = _file_name(rng, used, "_" if reusable else "")
+        content = generate_workflow(rng, reusable, reusable_names[-50:])
+        if reusable:
+            reusable_names.append(name)
+        # 複製元は直近のものから選ぶ（全件を保持しない）
+        recent.append(content)
+        if len(recent) > 1000:
+            recent.pop(0)
+        yield name, content
+
+def write_corpus(directory, files, seed=0, duplicate_ratio=DUPLICATE_RATIO):
+    """
+    合成コーパスをディレクトリに書き込む
+
+    Returns:
+        int: 書き込んだバイト数
+    """
+    os.makedirs(directory, exist_ok=True)
+    total = 0
+    for name, content in iter_corpus(files, seed, duplicate_ratio):
+        data = content.encode('utf-8')
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(data)
+        total += len(data)
+    return total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="合成ワークフローコーパスを生成する")
+    parser.add_argument("directory")
+    parser.add_argument("--files", type=int, default=1000, help="生成するファイル数（1000〜1000000程度）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duplicate-ratio", type=float, default=DUPLICATE_RATIO, help="完全一致の複製の割合")
+    args = parser.parse_args()
+
+    total = write_corpus(args.directory, args.files, args.seed, args.duplicate_ratio)
+    print(f"{args.files} ファイル（{total / 1024 / 1024:.1f} MB）を生成しました: {args.directory}")
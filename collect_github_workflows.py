@@ -4,139 +4,668 @@
 # `.github/workflows` ディレクトリ内のワークフローファイル（`.yml` または `.yaml`）を取得し、
 # それらのメタデータと内容をローカルディレクトリに保存します。
 ## 収集されたワークフローファイルは、データセットとして利用可能になります。 
+# 進捗はロガー（logging）に出力し、各段階（検索・一覧取得・ファイル取得・デコード・保存・再試行の待機）の
+# 所要時間、エンドポイントごとのAPI呼び出し回数、ダウンロードしたバイト数、レートリミットで待った秒数は
+# instrumentation.Metrics に記録して、実行の最後にプロファイルとして出力します。
 
+import logging
+import math
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+import requests
 from github import Github
 from github.GithubException import UnknownObjectException, RateLimitExceededException, BadCredentialsException, GithubException
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 import yaml
 from collections import defaultdict
 
-from get_workflow_utils import remove_duplicate_files_in_dir, show_workflows_summary # 分析用にインポート
+from get_workflow_utils import remove_duplicate_files_in_dir # 分析用にインポート
+from rate_limiter import RateLimitScheduler
+from github_graphql import fetch_workflow_files_graphql, fetch_workflow_tree_shas_graphql, graphql_url_for
+from crawl_state import CrawlState
+from workflow_store import WorkflowStore
+from workflow_pack import PackWriter, DEFAULT_SHARD_BYTES
+from instrumentation import Metrics, configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = "https://api.github.com"
+GRAPHQL_BATCH_SIZE = 20 # GraphQLバックエンドで1回のクエリにまとめるリポジトリ数
+MAX_PENDING_TASKS_PER_WORKER = 4 # 未完了のタスクをワーカーあたりこの数までに抑え、結果を保持し続けないようにする
 
 def get_github_workflow_files(
     github_token: str,
     min_stars: int,
     max_repos: int,
-    output_dir: str = "github_workflows_dataset" # このフォルダの中に直接保存
+    output_dir: str = "github_workflows_dataset", # このフォルダの中に直接保存
+    workers: int = 1,
+    max_retries: int = 3,
+    base_url: Optional[str] = None,
+    backend: str = "rest",
+    state_path: Optional[str] = None,
+    content_addressed: bool = False,
+    pack_dir: Optional[str] = None,
+    pack_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    pack_compress: bool = False,
+    metrics: Optional[Metrics] = None,
+    metrics_path: Optional[str] = None,
+    query: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     GitHubの指定されたスター数以上のリポジトリから、.github/workflowsフォルダ内の
     ワークフローファイル (.ymlまたは.yaml) をデータセットとして取得します。
 
+    取得したファイルをすべてリストとして返します。件数が多い場合は、結果をメモリに保持しない
+    iter_github_workflow_files を利用してください。引数は iter_github_workflow_files と同じです。
+
     Args:
         github_token (str): GitHub Personal Access Token (PAT)。
         min_stars (int): 検索対象リポジトリの最小スター数。
         max_repos (int): 取得を試みる最大リポジトリ数。
         output_dir (str): 取得したワークフローファイルを保存するディレクトリ名。この中にファイルが直接保存されます。
+        workers (int): 並行して処理するリポジトリ数。送信ペースはレートリミットのヘッダーに合わせて自動調整されます。
+        max_retries (int): 失敗したリポジトリを再試行する回数。
+        base_url (Optional[str]): GitHub APIのベースURL。ローカルのモックサーバーで計測する場合などに指定します。
+        backend (str): ワークフローの取得方法。"rest" はリポジトリごとに get_contents と各ファイルの取得を行い、
+                       "graphql" は複数リポジトリのワークフロー一覧と内容を1回のGraphQLクエリでまとめて取得します。
+                       GraphQLで取得できなかったリポジトリやファイルはRESTで取得し直します。
+        state_path (Optional[str]): クロール状態を保存するJSONファイルのパス。指定した場合、中断したクロールを
+                                    再開し、前回から変更のないリポジトリ（pushed_at・ETag・ツリーSHAで判定）を
+                                    スキップします。戻り値には今回新たに取得したファイルだけが含まれます。
+        content_addressed (bool): Trueの場合、ファイルを内容のSHA-256で名前付けして保存し（workflow_store.WorkflowStore）、
+                                  (リポジトリ, パス, コミット) との対応を output_dir/manifest.jsonl に記録します。
+                                  同名ファイルの上書きが起きず、同じ内容は一度だけ書き込まれます。
+        pack_dir (Optional[str]): 指定した場合、ファイルを個別に保存する代わりに、このディレクトリのパックシャード
+                                  （workflow_pack.PackWriter）に owner/repo/パス をキーとして追記します。
+        pack_shard_bytes (int): パックの1シャードあたりの最大バイト数。
+        pack_compress (bool): パックの内容をレコード単位でzlib圧縮するかどうか。
+        metrics (Optional[Metrics]): 計測値を記録する instrumentation.Metrics。Noneの場合は実行ごとに新しく作ります。
+        metrics_path (Optional[str]): 指定した場合、終了時に計測値を書き出すファイル（拡張子が .prom / .txt なら
+                                      Prometheusのテキスト形式、それ以外はJSON）。
+        query (Optional[str]): 指定した場合、min_stars の代わりにこのリポジトリの検索クエリを使います
+                               （crawl_planner.py が分割した "stars:100..199 created:2020-01-01..2020-06-30" など）。
 
     Returns:
         List[Dict[str, Any]]: 取得されたワークフローファイルのメタデータと内容のリスト。
                                各辞書には 'repo_full_name', 'file_path', 'file_content' が含まれます。
     """
-    
+    return list(iter_github_workflow_files(
+        github_token, min_stars, max_repos, output_dir, workers, max_retries, base_url, backend,
+        state_path, content_addressed, pack_dir, pack_shard_bytes, pack_compress, metrics, metrics_path, query
+    ))
+
+def iter_github_workflow_files(
+    github_token: str,
+    min_stars: int,
+    max_repos: int,
+    output_dir: str = "github_workflows_dataset",
+    workers: int = 1,
+    max_retries: int = 3,
+    base_url: Optional[str] = None,
+    backend: str = "rest",
+    state_path: Optional[str] = None,
+    content_addressed: bool = False,
+    pack_dir: Optional[str] = None,
+    pack_shard_bytes: int = DEFAULT_SHARD_BYTES,
+    pack_compress: bool = False,
+    metrics: Optional[Metrics] = None,
+    metrics_path: Optional[str] = None,
+    query: Optional[str] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    get_github_workflow_files のジェネレーター版。取得したワークフローを保存しながら1件ずつ返します。
+
+    結果をリストに溜めず、未完了のタスクも一定数に抑えるため、収集するファイル数によらずメモリ使用量は一定です。
+    pack_dir と組み合わせると、数十万件のワークフローも少数のシャードファイルに追記しながら収集できます。
+
+    Yields:
+        Dict[str, Any]: 'repo_full_name', 'file_path', 'file_content' を含む辞書。
+    """
+    metrics = metrics or Metrics()
     # PyGithubクライアントの初期化
     try:
-        g = Github(github_token)
+        # 送信ペースは RateLimitScheduler が調整するため、PyGithubの固定の送信間隔（既定0.25秒）は使わない
+        options = {"seconds_between_requests": None}
+        if base_url:
+            options["base_url"] = base_url
+        g = Github(github_token, **options)
         # トークンが有効か確認（初回API呼び出しで認証エラーを早期検出）
-        user = g.get_user()
-        print(f"Authenticated as: {user.login}")
+        with metrics.timer("collector_stage", stage="authenticate"):
+            user = g.get_user()
+            login = user.login
+        metrics.inc("github_api_requests", endpoint="user")
+        logger.info("Authenticated as: %s", login, extra={"login": login})
     except BadCredentialsException:
-        print("Error: Invalid GitHub token. Please check your token.")
-        return []
+        logger.error("Invalid GitHub token. Please check your token.")
+        return
     except GithubException as e:
-        print(f"Error initializing GitHub client: {e}")
-        return []
+        logger.error("Error initializing GitHub client: %s", e)
+        return
+
+    if backend not in ("rest", "graphql"):
+        logger.error("Unknown backend '%s'. Use 'rest' or 'graphql'.", backend)
+        return
+    if pack_dir and content_addressed:
+        logger.error("pack_dir and content_addressed cannot be used together.")
+        return
 
-    workflow_data = []
-    processed_repos_count = 0
+    collected = 0
+    pack = None
 
-    print(f"Searching for repositories with more than {min_stars} stars...")
+    # スター数でリポジトリを検索
+    query = query or f"stars:>{min_stars}"
+    logger.info("Searching for repositories: %s", query, extra={"query": query})
 
     try:
-        # スター数でリポジトリを検索
-        query = f"stars:>{min_stars}"
         repositories = g.search_repositories(query=query)
 
         # 出力ディレクトリの作成（ここがファイルの直接保存先になります）
-        os.makedirs(output_dir, exist_ok=True)
+        if pack_dir:
+            pack = PackWriter(pack_dir, pack_shard_bytes, pack_compress)
+        else:
+            os.makedirs(output_dir, exist_ok=True)
 
-        for repo in repositories:
-            if processed_repos_count >= max_repos:
-                print(f"Reached maximum repository limit ({max_repos}). Stopping.")
-                break
+        state = None
+        if state_path:
+            state = CrawlState(state_path)
+            resumed = state.begin_crawl(query)
+            if resumed:
+                logger.info("Resuming crawl: %d repositories already processed.", resumed, extra={"resumed": resumed})
 
-            print(f"Processing repository: {repo.full_name} (Stars: {repo.stargazers_count})")
-
-            try:
-                # .github/workflows ディレクトリの内容を取得
-                contents = repo.get_contents(".github/workflows/")
-                
-                # contents が単一のファイルオブジェクトの場合もあるのでリスト化
-                if not isinstance(contents, list):
-                    contents = [contents]
-
-                for content_file in contents:
-                    if content_file.type == "file" and \
-                       (content_file.name.endswith(".yml") or content_file.name.endswith(".yaml")):
-                        
-                        try:
-                            file_content = content_file.decoded_content.decode('utf-8')
-
-                            workflow_info = {
-                                "repo_full_name": repo.full_name,
-                                "file_path": content_file.path,
-                                "file_content": file_content
-                            }
-                            workflow_data.append(workflow_info)
-
-                            # ファイルを直接 output_dir に保存
-                            # ファイル名が重複する場合、後から保存されるファイルで上書きされます
-                            file_save_path = os.path.join(output_dir, content_file.name)
-                            with open(file_save_path, 'w', encoding='utf-8') as f:
-                                f.write(file_content)
-                            print(f"  - Saved: {file_save_path}")
-
-                        except UnicodeDecodeError:
-                            print(f"  - Warning: Could not decode content of {content_file.path} in {repo.full_name} (possible binary file). Skipping.")
-                        except Exception as e:
-                            print(f"  - Error reading file {content_file.path} in {repo.full_name}: {e}")
-
-            except UnknownObjectException:
-                print(f"  - No .github/workflows directory found in {repo.full_name}")
-            except RateLimitExceededException:
-                rate_limit = g.get_rate_limit()
-                reset_time = rate_limit.core.reset.timestamp()
-                sleep_duration = max(0, reset_time - time.time() + 5) # 5秒余裕を持たせる
-                print(f"  - Rate limit exceeded. Waiting for {sleep_duration:.0f} seconds until {rate_limit.core.reset}...")
-                time.sleep(sleep_duration)
-                continue # レートリミット後に現在のリポジトリを再試行するためにループを継続
-            except GithubException as e:
-                print(f"  - Error accessing {repo.full_name}: {e}")
+        # リポジトリごとの取得はスケジューラがレートリミットに合わせてペースを調整する
+        store = WorkflowStore(output_dir) if content_addressed else None
+        crawler = _WorkflowCrawler(g, github_token, output_dir, workers, max_retries, base_url, backend, state, store, pack,
+                                   metrics)
+        for workflow_info in crawler.iter_collect(islice(repositories, max_repos)):
+            collected += 1
+            yield workflow_info
 
-            processed_repos_count += 1
-            time.sleep(0.5) # APIへの負荷を減らすため、リポジトリ処理ごとに少し待つ
-            
     except RateLimitExceededException:
         rate_limit = g.get_rate_limit()
         reset_time = rate_limit.search.reset.timestamp() # 検索APIのレートリミットは別
         sleep_duration = max(0, reset_time - time.time() + 5)
-        print(f"Global search rate limit exceeded. Waiting for {sleep_duration:.0f} seconds until {rate_limit.search.reset}...")
+        logger.warning("Global search rate limit exceeded. Waiting for %.0f seconds until %s...", sleep_duration,
+                       rate_limit.search.reset, extra={"wait_seconds": sleep_duration})
         time.sleep(sleep_duration)
-        print("Please retry running the script after the reset time.")
+        metrics.inc("rate_limit_wait_seconds", sleep_duration, api="search")
+        if state_path:
+            logger.info("Please retry running the script after the reset time. The crawl will resume from the last checkpoint.")
+        else:
+            logger.info("Please retry running the script after the reset time.")
     except GithubException as e:
-        print(f"An unexpected GitHub API error occurred: {e}")
+        logger.error("An unexpected GitHub API error occurred: %s", e)
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred: %s", e)
+    finally:
+        if pack is not None:
+            pack.close()
+
+    logger.info("Finished. Total workflow files collected: %d", collected, extra={"files": collected})
+    logger.info("Files saved to: %s", os.path.abspath(pack_dir or output_dir))
+    metrics.log_summary(logger)
+    if metrics_path:
+        metrics.write(metrics_path)
+        logger.info("Metrics written to: %s", metrics_path)
+
+def _core_quota(g: Github):
+    """直近のレスポンスヘッダーから (残りリクエスト数, リセット時刻のUNIX秒, 上限) を返す"""
+    remaining, limit = g.rate_limiting
+    return remaining, g.rate_limiting_resettime, limit
+
+class _WorkflowCrawler:
+    """
+    検索結果のリポジトリからワークフローを取得する処理をまとめたクラス
+
+    リポジトリはスレッドプールで並行して処理され、送信ペースはレスポンスの
+    X-RateLimit-* ヘッダーを元に RateLimitScheduler が調整します。
+    CrawlState を渡した場合は、前回から変更のないリポジトリを pushed_at・ETag・ツリーSHAで
+    見分けてスキップし、中断したクロールを再開できます。
+    各段階の所要時間とAPIの呼び出し回数は Metrics（collector_stage・github_api_requests など）に記録します。
+    """
+
+    def __init__(self, g: Github, github_token: str, output_dir: str, workers: int, max_retries: int,
+                 base_url: Optional[str] = None, backend: str = "rest", state: Optional[CrawlState] = None,
+                 store: Optional[WorkflowStore] = None, pack: Optional[PackWriter] = None,
+                 metrics: Optional[Metrics] = None):
+        self.g = g
+        self.github_token = github_token
+        self.output_dir = output_dir
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backend = backend
+        self.state = state
+        self.store = store
+        self.pack = pack
+        self.metrics = metrics or Metrics()
+        self.api_url = (base_url or DEFAULT_API_URL).rstrip("/")
+        self.graphql_url = graphql_url_for(base_url)
+        self.session = requests.Session()
+        # requests で送信するリクエスト（一覧の条件付き取得・raw・GraphQL）はレスポンスごとに回数とバイト数を数える
+        self.session.hooks["response"].append(self._record_response)
+        self.scheduler = RateLimitScheduler()
+        self.scheduler.update(*_core_quota(g))
+        # GraphQL APIのクォータはREST APIとは別に管理される
+        self.graphql_scheduler = RateLimitScheduler()
+        self.skipped_repos = 0
+
+    def _record_response(self, response, *args, **kwargs):
+        """requests のレスポンスフック。エンドポイントごとのリクエスト数・ダウンロードしたバイト数・304の数を記録する"""
+        if response.url == self.graphql_url:
+            endpoint = "graphql"
+        elif response.url.startswith(self.api_url) and "/contents/" in response.url:
+            endpoint = "contents"
+        else:
+            endpoint = "raw"
+        self.metrics.inc("github_api_requests", endpoint=endpoint)
+        self.metrics.inc("github_downloaded_bytes", len(response.content), endpoint=endpoint)
+        if response.status_code == 304:
+            self.metrics.inc("github_not_modified", endpoint=endpoint)
+
+    def _backoff(self, attempt: int, reason: str) -> None:
+        """再試行の前に 2**attempt 秒待つ（待った時間は retry_backoff として記録する）"""
+        self.metrics.inc("collector_retries", reason=reason)
+        with self.metrics.timer("collector_stage", stage="retry_backoff"):
+            time.sleep(2 ** attempt)
+
+    def save_workflow(self, workflow_info: Dict[str, Any], commit: Optional[str] = None, commit_kind: str = "commit") -> None:
+        """
+        ワークフローファイルを output_dir（ストアがあればコンテンツアドレス型ストア、パックがあればパック）に保存する
+
+        commit は取得元のデフォルトブランチのコミットSHA（commit_kind="commit"）か、
+        ファイルのblob SHA（commit_kind="blob"）で、ストアのマニフェストには種類とともに記録します。
+        """
+        with self.metrics.timer("collector_stage", stage="write") as timing:
+            timing.items = 1
+            self._save_workflow(workflow_info, commit, commit_kind)
+        self.metrics.inc("collector_files_saved")
+
+    def _save_workflow(self, workflow_info: Dict[str, Any], commit: Optional[str] = None, commit_kind: str = "commit") -> None:
+        log_extra = {"repo": workflow_info["repo_full_name"], "path": workflow_info["file_path"]}
+        if self.pack is not None:
+            key = f"{workflow_info['repo_full_name']}/{workflow_info['file_path']}"
+            # パックのエントリには種類を記録できないため、コミットSHAだけを記録する
+            shard, offset, _ = self.pack.add(key, workflow_info["file_content"], commit if commit_kind == "commit" else None)
+            logger.debug("Packed: %s (%s@%s)", key, shard, offset, extra=log_extra)
+            return
+        if self.store is not None:
+            sha256, written = self.store.put(workflow_info["file_content"], workflow_info["repo_full_name"],
+                                             workflow_info["file_path"], commit, commit_kind)
+            logger.debug("%s: %s", "Saved" if written else "Already stored", self.store.blob_path(sha256), extra=log_extra)
+            return
+        # ファイルを直接 output_dir に保存
+        # ファイル名が重複する場合、後から保存されるファイルで上書きされます
+        file_save_path = os.path.join(self.output_dir, os.path.basename(workflow_info["file_path"]))
+        with open(file_save_path, 'w', encoding='utf-8') as f:
+            f.write(workflow_info["file_content"])
+        logger.debug("Saved: %s", file_save_path, extra=log_extra)
+
+    def _skip_unchanged(self, repo) -> None:
+        self.skipped_repos += 1
+        self.metrics.inc("collector_repos", result="unchanged")
+        logger.info("Unchanged since last crawl: %s", repo.full_name, extra={"repo": repo.full_name})
+
+    def _unchanged_since_last_crawl(self, repo) -> bool:
+        """検索結果の pushed_at が前回と同じであれば、APIを呼ばずに変更なしと判断する"""
+        if self.state is None or repo.pushed_at is None:
+            return False
+        entry = self.state.get_repo(repo.full_name)
+        if entry.get("pushed_at") == repo.pushed_at.isoformat():
+            self.state.update_repo(repo.full_name)
+            self._skip_unchanged(repo)
+            return True
+        return False
 
-    print(f"\nFinished. Total workflow files collected: {len(workflow_data)}")
-    print(f"Files saved to: {os.path.abspath(output_dir)}")
-    return workflow_data
+    def collect_repo(self, repo) -> List[Dict[str, Any]]:
+        """
+        1つのリポジトリの .github/workflows 内のYAMLファイルを取得して保存する
+
+        API呼び出しの前にスケジューラからトークンを取得し、呼び出し後に残りクォータを反映します。
+        レートリミット等のGitHubExceptionは呼び出し元で再試行できるようにそのまま送出します。
+        """
+        if self.state is not None:
+            return self.collect_repo_incremental(repo)
+        repo_workflows = []
+        self.scheduler.acquire()
+        try:
+            # .github/workflows ディレクトリの内容を取得
+            with self.metrics.timer("collector_stage", stage="list_contents"):
+                self.metrics.inc("github_api_requests", endpoint="contents")
+                contents = repo.get_contents(".github/workflows/")
+        except UnknownObjectException:
+            logger.info("No .github/workflows directory found in %s", repo.full_name, extra={"repo": repo.full_name})
+            return repo_workflows
+        finally:
+            self.scheduler.update(*_core_quota(self.g))
+
+        # contents が単一のファイルオブジェクトの場合もあるのでリスト化
+        if not isinstance(contents, list):
+            contents = [contents]
+
+        for content_file in contents:
+            if content_file.type == "file" and \
+               (content_file.name.endswith(".yml") or content_file.name.endswith(".yaml")):
+                self.scheduler.acquire()
+                try:
+                    with self.metrics.timer("collector_stage", stage="fetch_file") as timing:
+                        self.metrics.inc("github_api_requests", endpoint="file")
+                        raw_content = content_file.decoded_content
+                        timing.items = 1
+                finally:
+                    self.scheduler.update(*_core_quota(self.g))
+                self.metrics.inc("github_downloaded_bytes", len(raw_content), endpoint="file")
+                file_content = self._decode(raw_content, repo.full_name, content_file.path)
+                if file_content is None:
+                    continue
+
+                workflow_info = {
+                    "repo_full_name": repo.full_name,
+                    "file_path": content_file.path,
+                    "file_content": file_content
+                }
+                # 一覧で取得済みのblob SHAを記録する（コミットSHAを求めるにはAPI呼び出しが増える）
+                self.save_workflow(workflow_info, content_file.sha, "blob")
+                repo_workflows.append(workflow_info)
+        return repo_workflows
+
+    def _decode(self, raw_content: bytes, repo_full_name: str, path: str) -> Optional[str]:
+        """ファイルの内容をUTF-8としてデコードする（デコードできない場合はNone）"""
+        with self.metrics.timer("collector_stage", stage="decode") as timing:
+            try:
+                file_content = raw_content.decode('utf-8')
+            except UnicodeDecodeError:
+                self.metrics.inc("collector_decode_errors")
+                logger.warning("Could not decode content of %s in %s (possible binary file). Skipping.", path, repo_full_name,
+                               extra={"repo": repo_full_name, "path": path})
+                return None
+            timing.items = 1
+        return file_content
+
+    def collect_repo_incremental(self, repo) -> List[Dict[str, Any]]:
+        """
+        前回の取得状態を使って、変更のあったワークフローファイルだけを取得する
+
+        ワークフローディレクトリの一覧は If-None-Match 付きの条件付きリクエストで取得し、
+        304（変更なし）の場合はコアAPIのクォータを消費せずにスキップします。
+        一覧が変わっていた場合も、blob SHAが前回と同じファイルは取得しません。
+        """
+        pushed_at = repo.pushed_at.isoformat() if repo.pushed_at else None
+        entry = self.state.get_repo(repo.full_name)
+        headers = {"Authorization": f"token {self.github_token}", "Accept": "application/vnd.github+json"}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+
+        self.scheduler.acquire()
+        with self.metrics.timer("collector_stage", stage="list_contents"):
+            response = self.session.get(f"{self.api_url}/repos/{repo.full_name}/contents/.github/workflows", headers=headers)
+        self.scheduler.update_from_headers(response.headers)
+        if response.status_code == 304:
+            self.state.update_repo(repo.full_name, pushed_at=pushed_at)
+            self._skip_unchanged(repo)
+            return []
+        if response.status_code == 404:
+            logger.info("No .github/workflows directory found in %s", repo.full_name, extra={"repo": repo.full_name})
+            self.state.update_repo(repo.full_name, pushed_at=pushed_at, etag=None, files={})
+            return []
+        if response.status_code in (403, 429) and \
+           (response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers):
+            raise RateLimitExceededException(response.status_code, response.text, dict(response.headers))
+        response.raise_for_status()
+
+        listing = response.json()
+        if not isinstance(listing, list):
+            listing = [listing]
+        old_files = entry.get("files", {})
+        files = {}
+        repo_workflows = []
+        for item in listing:
+            name = item["name"]
+            if item["type"] != "file" or not (name.endswith(".yml") or name.endswith(".yaml")):
+                continue
+            files[item["path"]] = item["sha"]
+            if old_files.get(item["path"]) == item["sha"]:
+                continue
+            # download_url（raw.githubusercontent.com）からの取得はコアAPIのクォータを消費しない
+            with self.metrics.timer("collector_stage", stage="fetch_file") as timing:
+                raw = self.session.get(item["download_url"], headers={"Authorization": f"token {self.github_token}"})
+                raw.raise_for_status()
+                timing.items = 1
+            file_content = self._decode(raw.content, repo.full_name, item["path"])
+            if file_content is None:
+                continue
+            workflow_info = {
+                "repo_full_name": repo.full_name,
+                "file_path": item["path"],
+                "file_content": file_content
+            }
+            self.save_workflow(workflow_info, item["sha"], "blob")
+            repo_workflows.append(workflow_info)
+        self.state.update_repo(repo.full_name, pushed_at=pushed_at, etag=response.headers.get("ETag"), files=files)
+        return repo_workflows
+
+    def collect_repo_with_retry(self, repo) -> Optional[List[Dict[str, Any]]]:
+        """
+        collect_repo を実行し、レートリミットや一時的なエラーの場合は待機して再試行する
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 取得したワークフロー。再試行しても失敗した場合はNone。
+        """
+        log_extra = {"repo": repo.full_name}
+        for attempt in range(self.max_retries + 1):
+            log_extra["attempt"] = attempt + 1
+            try:
+                return self.collect_repo(repo)
+            except RateLimitExceededException as e:
+                # ヘッダーにリセット時刻（またはRetry-After）があればそれまで全スレッドを止める
+                self.scheduler.update_from_headers(e.headers)
+                if self.scheduler.paused_until <= time.time():
+                    self.scheduler.pause_for(60)
+                self.metrics.inc("collector_retries", reason="rate_limit")
+                logger.warning("Rate limit exceeded while processing %s. (attempt %d/%d)", repo.full_name, attempt + 1,
+                               self.max_retries + 1, extra=log_extra)
+            except GithubException as e:
+                if e.status is not None and e.status < 500 and e.status not in (403, 429):
+                    logger.warning("Error accessing %s: %s", repo.full_name, e, extra=log_extra)
+                    return []
+                self.scheduler.update_from_headers(e.headers)
+                logger.warning("Temporary error accessing %s: %s. (attempt %d/%d)", repo.full_name, e, attempt + 1,
+                               self.max_retries + 1, extra=log_extra)
+                self._backoff(attempt, "github_error")
+            except Exception as e:
+                logger.warning("Error processing %s: %s. (attempt %d/%d)", repo.full_name, e, attempt + 1,
+                               self.max_retries + 1, extra=log_extra)
+                self._backoff(attempt, "error")
+        return None
+
+    def collect_repo_task(self, repo) -> tuple:
+        """RESTで1つのリポジトリを処理し、(ワークフローのリスト, 失敗したリポジトリのリスト) を返す"""
+        if self._unchanged_since_last_crawl(repo):
+            return [], []
+        with self.metrics.timer("collector_stage", stage="repository") as timing:
+            timing.items = 1
+            repo_workflows = self.collect_repo_with_retry(repo)
+        if repo_workflows is None:
+            return [], [repo]
+        self.metrics.inc("collector_repos", result="collected")
+        return repo_workflows, []
+
+    def collect_batch_graphql(self, repos: list) -> tuple:
+        """
+        複数リポジトリのワークフローを1回のGraphQLクエリで取得して保存する
+
+        CrawlState がある場合は、先にツリーSHAだけを問い合わせて変更のないリポジトリを除外します。
+        GraphQLで取得できなかったリポジトリや、内容が返らなかったファイルを含むリポジトリは
+        collect_repo_with_retry（REST）で取得し直します。
+
+        Returns:
+            tuple: (取得したワークフローのリスト, 再試行しても失敗したリポジトリのリスト)
+        """
+        repos = [repo for repo in repos if not self._unchanged_since_last_crawl(repo)]
+        try:
+            if self.state is not None and repos:
+                with self.metrics.timer("collector_stage", stage="graphql_tree_shas"):
+                    tree_shas = fetch_workflow_tree_shas_graphql(self.session, self.github_token, [r.full_name for r in repos],
+                                                                 self.graphql_url, self.graphql_scheduler)
+                changed = []
+                for repo in repos:
+                    tree_sha = tree_shas.get(repo.full_name)
+                    if tree_sha is not None and self.state.get_repo(repo.full_name).get("tree_sha") == tree_sha:
+                        self.state.update_repo(repo.full_name, pushed_at=repo.pushed_at.isoformat() if repo.pushed_at else None)
+                        self._skip_unchanged(repo)
+                    else:
+                        changed.append(repo)
+                repos = changed
+            results = {}
+            if repos:
+                with self.metrics.timer("collector_stage", stage="graphql_files") as timing:
+                    timing.items = len(repos)
+                    results = fetch_workflow_files_graphql(self.session, self.github_token, [r.full_name for r in repos],
+                                                           self.graphql_url, self.graphql_scheduler)
+        except Exception as e:
+            self.metrics.inc("collector_graphql_fallbacks")
+            logger.warning("GraphQL request failed (%s). Falling back to REST for %d repositories.", e, len(repos))
+            results = {}
+
+        workflows, failed = [], []
+        for repo in repos:
+            result = results.get(repo.full_name)
+            if result is None or result["incomplete"]:
+                repo_workflows = self.collect_repo_with_retry(repo)
+                if repo_workflows is None:
+                    failed.append(repo)
+                else:
+                    self.metrics.inc("collector_repos", result="collected")
+                    workflows.extend(repo_workflows)
+                continue
+            if result["tree_sha"] is None:
+                logger.info("No .github/workflows directory found in %s", repo.full_name, extra={"repo": repo.full_name})
+            for workflow_info in result["workflows"]:
+                self.save_workflow(workflow_info, result["commit"])
+                workflows.append(workflow_info)
+            self.metrics.inc("collector_repos", result="collected")
+            if self.state is not None:
+                self.state.update_repo(repo.full_name, pushed_at=repo.pushed_at.isoformat() if repo.pushed_at else None,
+                                       tree_sha=result["tree_sha"], files=result["files"])
+        return workflows, failed
+
+    def _iter_search(self, repos):
+        """
+        検索結果のリポジトリを1件ずつ返す
+
+        ページの取得は PyGithub が次の要素を求められたときに行うため、次の要素を待った時間を search として記録します。
+        """
+        # 失敗したリポジトリの再試行ではリストが渡される（APIは呼ばない）
+        from_search = not isinstance(repos, list)
+        repos = iter(repos)
+        seen = 0
+        try:
+            while True:
+                with self.metrics.timer("collector_stage", stage="search"):
+                    repo = next(repos, None)
+                if repo is None:
+                    return
+                seen += 1
+                yield repo
+        finally:
+            # 検索結果は per_page 件ずつのページで取得される
+            if seen and from_search:
+                self.metrics.inc("github_api_requests", math.ceil(seen / self.g.per_page), endpoint="search")
+
+    def _iter_tasks(self, repos):
+        """リポジトリ（GraphQLの場合はリポジトリのまとまり）ごとに (関数, 引数) を返す"""
+        batch = []
+        try:
+            for repo in self._iter_search(repos):
+                if self.state is not None and self.state.is_processed(repo.full_name):
+                    continue # 中断前のクロールで処理済み
+                logger.info("Processing repository: %s (Stars: %d)", repo.full_name, repo.stargazers_count,
+                            extra={"repo": repo.full_name, "stars": repo.stargazers_count})
+                if self.backend != "graphql":
+                    yield self.collect_repo_task, repo
+                    continue
+                batch.append(repo)
+                if len(batch) >= GRAPHQL_BATCH_SIZE:
+                    yield self.collect_batch_graphql, batch
+                    batch = []
+        except RateLimitExceededException:
+            # 検索APIのレートリミットに達した場合は、それまでに見つかったリポジトリだけを処理する
+            logger.warning("Search rate limit exceeded. Processing the repositories found so far.")
+            self.search_interrupted = True
+        if batch:
+            yield self.collect_batch_graphql, batch
+
+    def _run(self, repos, failed_repos: list) -> Iterator[Dict[str, Any]]:
+        """
+        タスクをスレッドプールで実行し、完了した順にワークフローを返す
+
+        検索結果は未完了のタスクが workers * MAX_PENDING_TASKS_PER_WORKER 個になるまでしか先読みせず、
+        完了したタスクの結果はすぐに手放します。
+        """
+        max_pending = max(1, self.workers) * MAX_PENDING_TASKS_PER_WORKER
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for func, arg in self._iter_tasks(repos):
+                pending.add(executor.submit(func, arg))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self._drain(done, failed_repos)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self._drain(done, failed_repos)
+
+    def _drain(self, done, failed_repos: list) -> Iterator[Dict[str, Any]]:
+        for future in done:
+            repo_workflows, failed = future.result()
+            failed_repos.extend(failed)
+            yield from repo_workflows
+
+    def iter_collect(self, repositories) -> Iterator[Dict[str, Any]]:
+        """
+        リポジトリを処理し、今回取得したワークフローを1件ずつ返す
+
+        再試行しても失敗したリポジトリは、全体の処理が終わった後にもう一度まとめて再試行します。
+        すべて処理できた場合はクロールを完了として記録し、次回は最初から（変更分のみ）取得します。
+        """
+        failed_repos = []
+        self.search_interrupted = False
+        completed = False
+        try:
+            yield from self._run(repositories, failed_repos)
+            if failed_repos:
+                retry_repos = list(failed_repos)
+                failed_repos.clear()
+                logger.info("Retrying %d failed repositories...", len(retry_repos))
+                yield from self._run(retry_repos, failed_repos)
+            completed = not failed_repos and not self.search_interrupted
+        finally:
+            if self.state is not None:
+                if not completed:
+                    self.state.save()
+                    logger.info("Crawl state saved to %s. Re-run to resume.", self.state.state_path)
+                else:
+                    self.state.finish_crawl()
+            # レートリミットで待った時間（スケジューラが acquire で待機した秒数）
+            self.metrics.inc("rate_limit_wait_seconds", self.scheduler.blocked_seconds, api="rest")
+            self.metrics.inc("rate_limit_wait_seconds", self.graphql_scheduler.blocked_seconds, api="graphql")
+        for repo in failed_repos:
+            self.metrics.inc("collector_repos", result="failed")
+            logger.error("Gave up on %s after retries.", repo.full_name, extra={"repo": repo.full_name})
+        if self.skipped_repos:
+            logger.info("Skipped %d repositories unchanged since the last crawl.", self.skipped_repos)
+        if self.scheduler.blocked_seconds or self.graphql_scheduler.blocked_seconds:
+            logger.info("Waited %.1f seconds for the rate limit.", self.scheduler.blocked_seconds + self.graphql_scheduler.blocked_seconds)
+
+    def collect(self, repositories) -> List[Dict[str, Any]]:
+        """リポジトリを処理し、今回取得したワークフローのリストを返す（iter_collect を参照）"""
+        return list(self.iter_collect(repositories))
 
 # --- 使用例 ---
 if __name__ == "__main__":
+    # LOG_FORMAT=json の場合はログを1行1オブジェクトのJSONで出力する
+    configure_logging(os.environ.get("LOG_LEVEL", "INFO"), json_format=os.environ.get("LOG_FORMAT") == "json")
+
     # GitHub Personal Access Token を環境変数から取得することを強く推奨します
     github_pat = os.environ.get("GITHUB_TOKEN") 
     if not github_pat:
@@ -155,8 +684,12 @@ if __name__ == "__main__":
     collected_workflows = get_github_workflow_files(
         github_token=github_pat,
         min_stars=minimum_stars,
-        max_repos=maximum_repositories
+        max_repos=maximum_repositories,
+        workers=8, # 8リポジトリを並行して処理（ペースはレートリミットに合わせて自動調整）
+        state_path="crawl_state.json", # 中断時の再開と、変更のないリポジトリのスキップに使用
+        content_addressed=True, # 同名ファイルの上書きを防ぎ、同じ内容は一度だけ保存
+        metrics_path=os.environ.get("CRAWL_METRICS_PATH") # 例: crawl_metrics.prom（Prometheus形式）または crawl_metrics.json
     )
     #remove_duplicate_files_in_dir("github_workflows_dataset", extensions=(".yml", ".yaml")) # 重複ファイルを削除
-    show_workflows_summary(workflows_dir="github_workflows_dataset") # 分析結果を表示
+    # 分析結果は get_workflow_utils.show_workflows_summary で別途表示する（ストアのファイルは削除せずに集計から除外する）
     
\ No newline at end of file
@@ -0,0 +1,415 @@
+# このスクリプトは、検索APIの1000件の上限を超えて多数のリポジトリからワークフローを収集するための分割クロールを提供します。
+# GitHubの検索APIは1つのクエリで先頭1000件までしか返さないため、"stars:>N" の1回の検索では上位1000リポジトリしか収集できません。
+# plan_slices() は検索範囲をスター数の範囲（上限なしの範囲は倍々に、それ以外は二分して）に分割し、
+# 同じスター数でも1000件を超える場合は作成日の範囲で二分して、各スライスの件数が上限以下になるまで分割します。
+# crawl_partitioned() はスライスを複数のワーカープロセスに割り振り、各プロセスは
+# collect_github_workflows.iter_github_workflow_files でスライスごとのディレクトリ（コンテンツアドレス型ストア）に収集します。
+# トークンは残りクォータの多いものから割り当て（TokenPool）、すべてのスライスが終わると
+# (リポジトリ, パス) の重複を除いて1つのデータセット（WorkflowStore）にまとめます。
+# 計画とスライスごとの完了状態は作業ディレクトリの plan.json に保存され、中断しても続きから再開できます。
+#
+# 使い方:
+#   GITHUB_TOKENS=ghp_aaa,ghp_bbb python crawl_planner.py --min-stars 10 --processes 4 --output-dir github_workflows_dataset
+#   python crawl_planner.py --min-stars 100 --plan-only
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import datetime
+import json
+import logging
+import os
+import time
+
+import requests
+
+from collect_github_workflows import iter_github_workflow_files, DEFAULT_API_URL
+from crawl_state import CrawlState
+from github_client import GitHubClient
+from instrumentation import configure_logging
+from rate_limiter import RateLimitScheduler
+from workflow_store import WorkflowStore
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RESULT_CAP = 1000 # 1つの検索クエリで取得できる結果の上限
+PLAN_VERSION = 1
+PLAN_FILENAME = "plan.json"
+SLICES_DIRNAME = "slices"
+SLICE_STATE_FILENAME = "crawl_state.json"
+SLICE_METRICS_FILENAME = "metrics.json"
+DEFAULT_WORK_DIR = ".partitioned_crawl"
+DEFAULT_CREATED_FROM = "2008-01-01" # GitHubの公開日。これより前に作成されたリポジトリはない
+TOKEN_RESERVE = 50 # トークンごとに使い切らずに残しておくクォータ
+
+def stars_qualifier(low, high=None):
+    """スター数の範囲の検索修飾子を返す（high がNoneの場合は上限なし）"""
+    if high is None:
+        return f"stars:>={low}"
+    if low == high:
+        return f"stars:{low}"
+    return f"stars:{low}..{high}"
+
+def created_qualifier(start, end):
+    """作成日の範囲（両端を含む）の検索修飾子を返す"""
+    return f"created:{start.isoformat()}..{end.isoformat()}"
+
+def count_repositories(client, query):
+    """
+    検索クエリに一致するリポジトリ数（total_count）を返す
+
+    結果は1件だけ要求するため、転送量は件数によらずわずかです（検索APIのクォータは1回分消費します）。
+    """
+    response = client.request("GET", "/search/repositories", params={"q": query, "per_page": 1})
+    response.raise_for_status()
+    return response.json()["total_count"]
+
+def plan_slices(count, min_stars, created_from=DEFAULT_CREATED_FROM, created_to=None, cap=SEARCH_RESULT_CAP):
+    """
+    スター数が min_stars より多いリポジトリの検索範囲を、件数がそれぞれ cap 以下になるスライスに分割する
+
+    スター数の範囲を、上限なしの範囲は [low, 2*low-1] と [2*low, *] に、それ以外は二分して分割し、
+    1つのスター数でも cap を超える場合は作成日の範囲を二分します。1日の範囲でも cap を超える場合は
+    それ以上分割できないため、truncated を付けてそのまま残します（先頭 cap 件だけが収集されます）。
+    スライスはスター数の多い順に並びます。
+
+    Args:
+        count (callable): count(query) で検索クエリに一致するリポジトリ数を返す関数（count_repositories など）
+        min_stars (int): 対象とするスター数の下限（この値より多いリポジトリが対象。"stars:>N" と同じ）
+        created_from (str): 作成日で分割する場合の開始日（YYYY-MM-DD）
+        created_to (str): 作成日で分割する場合の終了日（YYYY-MM-DD）。Noneの場合は今日
+        cap (int): 1つのスライスの件数の上限
+
+    Returns:
+        list: スライスの dict（'query', 'count', 'truncated'）のリスト
+    """
+    created_from = datetime.date.fromisoformat(created_from)
+    created_to = datetime.date.fromisoformat(created_to) if created_to else datetime.date.today()
+    slices = []
+    # 後に積んだ範囲から処理するため、スター数の少ない側を先に積む
+    stack = [(min_stars + 1, None)]
+    while stack:
+        low, high = stack.pop()
+        query = stars_qualifier(low, high)
+        total = count(query)
+        logger.debug("%s: %d repositories", query, total, extra={"query": query, "count": total})
+        if total <= cap:
+            if total:
+                slices.append({"query": query, "count": total, "truncated": False})
+        elif high is None:
+            middle = max(low, 2 * low - 1)
+            stack.append((low, middle))
+            stack.append((middle + 1, None))
+        elif low < high:
+            middle = (low + high) // 2
+            stack.append((low, middle))
+            stack.append((middle + 1, high))
+        else:
+            slices.extend(_split_by_created(count, query, created_from, created_to, cap))
+    return slices
+
+def _split_by_created(count, stars_query, created_from, created_to, cap):
+    """1つのスター数のクエリを、作成日の範囲で件数が cap 以下になるまで二分する"""
+    slices = []
+    stack = [(created_from, created_to)]
+    while stack:
+        start, end = stack.pop()
+        query = f"{stars_query} {created_qualifier(start, end)}"
+        total = count(query)
+        if total <= cap or start == end:
+            if total:
+                truncated = total > cap
+                if truncated:
+                    logger.warning("%s has %d repositories; only the first %d can be collected.", query, total, cap,
+                                   extra={"query": query, "count": total})
+                slices.append({"query": query, "count": total, "truncated": truncated})
+            continue
+        middle = start + (end - start) // 2
+        stack.append((middle + datetime.timedelta(days=1), end))
+        stack.append((start, middle))
+    return slices
+
+def fetch_core_quota(token, api_url=DEFAULT_API_URL):
+    """
+    トークンのコアAPIの残りクォータを返す（/rate_limit はクォータを消費しない）
+
+    Returns:
+        dict: 'remaining', 'limit', 'reset_at'（UNIX秒）。取得できなかった場合はNone
+    """
+    try:
+        response = requests.get(f"{api_url.rstrip('/')}/rate_limit", timeout=15,
+                                headers={"Authorization": f"token {token}", "Accept": "application/vnd.github+json"})
+        response.raise_for_status()
+        core = response.json()["resources"]["core"]
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        logger.warning("Could not fetch the rate limit: %s", e)
+        return None
+    return {"remaining": core["remaining"], "limit": core["limit"], "reset_at": float(core["reset"])}
+
+class TokenPool:
+    """
+    複数のトークンの残りクォータを管理し、スライスごとに最も余裕のあるトークンを割り当てる
+
+    実行中のスライスが使う見込みのリクエスト数（スライスの件数）を予約として差し引き、
+    リセット時刻を過ぎたトークンは上限まで回復したものとして扱います。
+    ワーカープロセスからの結果を受け取る親プロセスだけで利用します。
+    """
+
+    def __init__(self, tokens, api_url=DEFAULT_API_URL, reserve=TOKEN_RESERVE):
+        """
+        Args:
+            tokens (list): Personal Access Tokenのリスト
+            api_url (str): APIのベースURL
+            reserve (int): トークンごとに使い切らずに残しておくクォータ
+        """
+        if not tokens:
+            raise ValueError("トークンを1つ以上指定してください")
+        self.api_url = api_url
+        self.reserve = reserve
+        self.quotas = {token: {"remaining": None, "limit": None, "reset_at": 0.0, "reserved": 0} for token in tokens}
+
+    def refresh(self):
+        """すべてのトークンの残りクォータを /rate_limit から取得する"""
+        for token in self.quotas:
+            self.update(token, fetch_core_quota(token, self.api_url))
+
+    def update(self, token, quota):
+        """トークンの残りクォータ（fetch_core_quota の戻り値）を反映する"""
+        if quota:
+            self.quotas[token].update(quota)
+
+    def available(self, token, now=None):
+        """トークンで使える見込みのリクエスト数（予約分と reserve を差し引いた数）"""
+        quota = self.quotas[token]
+        remaining = quota["remaining"]
+        if remaining is None or (quota["limit"] is not None and (now or time.time()) >= quota["reset_at"]):
+            remaining = quota["limit"] if quota["limit"] is not None else float("inf")
+        return remaining - quota["reserved"] - self.reserve
+
+    def acquire(self, cost, force=False):
+        """
+        最も余裕のあるトークンを返し、cost を予約する
+
+        Args:
+            cost (int): スライスが使う見込みのリクエスト数
+            force (bool): Trueの場合は、どのトークンも足りなくても最も余裕のあるトークンを返す
+                          （ワーカーのスケジューラがリセットまで待つ）
+
+        Returns:
+            str | None: トークン。足りるトークンがなく force でない場合はNone
+        """
+        now = time.time()
+        token = max(self.quotas, key=lambda token: self.available(token, now))
+        if self.available(token, now) < cost and not force:
+            return None
+        self.quotas[token]["reserved"] += cost
+        return token
+
+    def release(self, token, cost, quota=None):
+        """acquire で予約した cost を戻し、スライスの終了後の残りクォータを反映する"""
+        self.quotas[token]["reserved"] -= cost
+        self.update(token, quota)
+
+def crawl_slice(query, token, slice_dir, api_url=DEFAULT_API_URL, threads=4, backend="rest", cap=SEARCH_RESULT_CAP):
+    """
+    1つのスライスのワークフローを slice_dir（コンテンツアドレス型ストア）に収集する（ワーカープロセスで実行）
+
+    スライスごとのクロール状態を slice_dir に保存するため、中断したスライスは続きから再開し、
+    取得済みで変更のないリポジトリはスキップします。
+
+    Returns:
+        dict: 'files'（今回取得したファイル数）, 'completed'（すべてのリポジトリを処理できたか）,
+              'quota'（終了後のトークンの残りクォータ）
+    """
+    state_path = os.path.join(slice_dir, SLICE_STATE_FILENAME)
+    files = 0
+    for _ in iter_github_workflow_files(
+        token, 0, cap, output_dir=slice_dir, workers=threads,
+        base_url=None if api_url == DEFAULT_API_URL else api_url, backend=backend,
+        state_path=state_path, content_addressed=True,
+        metrics_path=os.path.join(slice_dir, SLICE_METRICS_FILENAME), query=query
+    ):
+        files += 1
+    crawl = CrawlState(state_path).crawl or {}
+    return {"files": files, "completed": bool(crawl.get("completed")), "quota": fetch_core_quota(token, api_url)}
+
+def _slice_dir(work_dir, slice_info):
+    return os.path.join(work_dir, SLICES_DIRNAME, slice_info["id"])
+
+def merge_slices(slice_dirs, output_dir):
+    """
+    スライスごとのストアを1つのストア（output_dir）にまとめる
+
+    (リポジトリ, パス) ごとに最新の内容だけを取り込み、output_dir に同じ内容が記録済みであればマニフェストにも追記しません。
+    複数のスライスに同じリポジトリがある場合（クロール中にスター数が変わった場合など）は、先のスライスを優先します。
+
+    Returns:
+        int: 新たに取り込んだ (リポジトリ, パス) の数
+    """
+    store = WorkflowStore(output_dir)
+    existing = {(entry["repo"], entry["path"]): entry["sha256"] for entry in store.iter_manifest()}
+    merged = set()
+    added = 0
+    for slice_dir in slice_dirs:
+        slice_store = WorkflowStore(slice_dir)
+        latest = {(entry["repo"], entry["path"]): entry for entry in slice_store.iter_manifest()}
+        for key, entry in latest.items():
+            if key in merged:
+                continue
+            merged.add(key)
+            if existing.get(key) == entry["sha256"]:
+                continue
+            with open(slice_store.blob_path(entry["sha256"]), 'rb') as f:
+                store.put(f.read(), entry["repo"], entry["path"], entry["commit"], entry.get("commit_kind"))
+            added += 1
+    return added
+
+def _load_plan(plan_path, params):
+    """保存済みの計画を読み込む（存在しない・パラメーターが異なる場合はNone）"""
+    if not os.path.exists(plan_path):
+        return None
+    try:
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read crawl plan %s (%s). Planning again.", plan_path, e)
+        return None
+    if plan.get("version") != PLAN_VERSION or plan.get("params") != params:
+        return None
+    return plan
+
+def _save_plan(plan_path, plan):
+    tmp_path = plan_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, plan_path)
+
+def load_or_plan(tokens, min_stars, work_dir=DEFAULT_WORK_DIR, created_from=DEFAULT_CREATED_FROM, created_to=None,
+                 api_url=DEFAULT_API_URL, cap=SEARCH_RESULT_CAP):
+    """
+    作業ディレクトリの計画を読み込み、ない場合（またはパラメーターが異なる場合）は分割して保存する
+
+    Returns:
+        dict: 'version', 'params', 'slices'（各スライスは 'id', 'query', 'count', 'truncated', 'completed', 'files'）
+    """
+    params = {"min_stars": min_stars, "created_from": created_from, "created_to": created_to, "cap": cap}
+    plan_path = os.path.join(work_dir, PLAN_FILENAME)
+    plan = _load_plan(plan_path, params)
+    if plan is not None:
+        return plan
+    os.makedirs(work_dir, exist_ok=True)
+    logger.info("Planning search slices for stars:>%d ...", min_stars)
+    # 件数の問い合わせは検索APIのクォータ（認証済みで1分あたり30回）で送信ペースが調整される。
+    # 上限が小さいため、予備を残すとほとんど送れない
+    with GitHubClient(token=tokens[0], api_url=api_url, cache_dir=None, scheduler=RateLimitScheduler(reserve=0)) as client:
+        slices = plan_slices(lambda query: count_repositories(client, query), min_stars, created_from, created_to, cap)
+    for i, slice_info in enumerate(slices):
+        slice_info.update(id=f"{i:05d}", completed=False, files=0)
+    plan = {"version": PLAN_VERSION, "params": params, "slices": slices}
+    _save_plan(plan_path, plan)
+    logger.info("Planned %d slices covering %d repositories.", len(slices), sum(s["count"] for s in slices))
+    return plan
+
+def crawl_partitioned(tokens, min_stars, output_dir="github_workflows_dataset", work_dir=DEFAULT_WORK_DIR, processes=4,
+                      threads=4, created_from=DEFAULT_CREATED_FROM, created_to=None, api_url=DEFAULT_API_URL,
+                      backend="rest", cap=SEARCH_RESULT_CAP):
+    """
+    検索範囲を分割して複数のプロセス・トークンで収集し、1つのデータセット（output_dir）にまとめる
+
+    Args:
+        tokens (list): Personal Access Tokenのリスト（スライスごとに残りクォータの多いものを割り当てる）
+        min_stars (int): 対象とするスター数の下限（この値より多いリポジトリが対象）
+        output_dir (str): まとめたデータセットのディレクトリ（コンテンツアドレス型ストア）
+        work_dir (str): 計画とスライスごとの収集結果を保存する作業ディレクトリ
+        processes (int): 並行して収集するスライス数（ワーカープロセス数）
+        threads (int): スライスごとにリポジトリを並行して処理するスレッド数
+        created_from (str): 作成日で分割する場合の開始日（YYYY-MM-DD）
+        created_to (str): 作成日で分割する場合の終了日（YYYY-MM-DD）。Noneの場合は計画した日
+        api_url (str): APIのベースURL
+        backend (str): "rest" または "graphql"（collect_github_workflows を参照）
+        cap (int): 1つのスライスの件数の上限
+
+    Returns:
+        dict: 'slices'（スライス数）, 'completed'（完了したスライス数）, 'files'（今回取得したファイル数）,
+              'merged'（データセットに新たに取り込んだファイル数）
+    """
+    plan = load_or_plan(tokens, min_stars, work_dir, created_from, created_to, api_url, cap)
+    plan_path = os.path.join(work_dir, PLAN_FILENAME)
+    pool = TokenPool(tokens, api_url)
+    pool.refresh()
+    pending = [slice_info for slice_info in plan["slices"] if not slice_info["completed"]]
+    logger.info("%d of %d slices to crawl with %d tokens.", len(pending), len(plan["slices"]), len(tokens))
+    files = 0
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=configure_logging,
+                             initargs=(logging.getLogger().getEffectiveLevel(),)) as executor:
+        running = {}
+        while pending or running:
+            # 空いているプロセスに、クォータの足りるトークンでスライスを割り当てる
+            while pending and len(running) < processes:
+                slice_info = pending[0]
+                token = pool.acquire(slice_info["count"], force=not running)
+                if token is None:
+                    break
+                pending.pop(0)
+                future = executor.submit(crawl_slice, slice_info["query"], token, _slice_dir(work_dir, slice_info), api_url,
+                                         threads, backend, cap)
+                running[future] = (slice_info, token)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                slice_info, token = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    pool.release(token, slice_info["count"])
+                    logger.error("Slice %s (%s) failed: %s", slice_info["id"], slice_info["query"], e,
+                                 extra={"slice": slice_info["id"]})
+                    continue
+                pool.release(token, slice_info["count"], result["quota"])
+                files += result["files"]
+                slice_info["files"] += result["files"]
+                slice_info["completed"] = result["completed"]
+                _save_plan(plan_path, plan)
+                finished = sum(1 for s in plan["slices"] if s["completed"])
+                logger.info("Slice %s (%s): %d files. %d/%d slices completed.", slice_info["id"], slice_info["query"],
+                            result["files"], finished, len(plan["slices"]),
+                            extra={"slice": slice_info["id"], "files": result["files"]})
+
+    slice_dirs = [_slice_dir(work_dir, s) for s in plan["slices"] if os.path.isdir(_slice_dir(work_dir, s))]
+    merged = merge_slices(slice_dirs, output_dir)
+    completed = sum(1 for s in plan["slices"] if s["completed"])
+    if completed < len(plan["slices"]):
+        logger.warning("%d slices are incomplete. Re-run to resume them.", len(plan["slices"]) - completed)
+    logger.info("Merged %d new workflow files into %s.", merged, os.path.abspath(output_dir))
+    return {"slices": len(plan["slices"]), "completed": completed, "files": files, "merged": merged}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="検索範囲を分割し、複数のトークン・プロセスでワークフローを収集する")
+    parser.add_argument("--min-stars", type=int, default=10, help="この値より多いスター数のリポジトリを対象にする")
+    parser.add_argument("--output-dir", default="github_workflows_dataset", help="まとめたデータセットのディレクトリ")
+    parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="計画とスライスごとの収集結果の作業ディレクトリ")
+    parser.add_argument("--processes", type=int, default=4, help="並行して収集するスライス数")
+    parser.add_argument("--threads", type=int, default=4, help="スライスごとのスレッド数")
+    parser.add_argument("--created-from", default=DEFAULT_CREATED_FROM, help="作成日で分割する場合の開始日")
+    parser.add_argument("--created-to", help="作成日で分割する場合の終了日（省略時は今日）")
+    parser.add_argument("--api-url", default=DEFAULT_API_URL)
+    parser.add_argument("--backend", choices=("rest", "graphql"), default="rest")
+    parser.add_argument("--plan-only", action="store_true", help="分割の計画だけを作成して表示する")
+    args = parser.parse_args()
+
+    configure_logging(os.environ.get("LOG_LEVEL", "INFO"), json_format=os.environ.get("LOG_FORMAT") == "json")
+    # 複数のトークンは GITHUB_TOKENS にカンマ区切りで指定する（なければ GITHUB_TOKEN）
+    tokens = [token.strip() for token in os.environ.get("GITHUB_TOKENS", os.environ.get("GITHUB_TOKEN", "")).split(",") if token.strip()]
+    if not tokens:
+        parser.error("GITHUB_TOKENS または GITHUB_TOKEN 環境変数にトークンを設定してください")
+
+    if args.plan_only:
+        plan = load_or_plan(tokens, args.min_stars, args.work_dir, args.created_from, args.created_to, args.api_url)
+        for slice_info in plan["slices"]:
+            mark = " (truncated)" if slice_info["truncated"] else ""
+            print(f"{slice_info['id']} {slice_info['query']}: {slice_info['count']}{mark}")
+        print(f"{len(plan['slices'])} スライス, {sum(s['count'] for s in plan['slices'])} リポジトリ")
+    else:
+        summary = crawl_partitioned(tokens, args.min_stars, args.output_dir, args.work_dir, args.processes, args.threads,
+                                    args.created_from, args.created_to, args.api_url, args.backend)
+        print(f"{summary['completed']}/{summary['slices']} スライス完了, 取得 {summary['files']} ファイル, "
+              f"データセットに追加 {summary['merged']} ファイル")
@@ -0,0 +1,115 @@
+# このスクリプトは、ワークフロー収集（collect_github_workflows.py）のクロール状態を保存するストアを提供します。
+# 処理済みリポジトリ、各リポジトリの pushed_at・ワークフローディレクトリのETag・ツリーSHA・ファイルごとのblob SHAを記録し、
+# 中断したクロールの再開や、変更のないリポジトリのスキップ（条件付きリクエスト）に利用します。
+
+import json
+import os
+import threading
+import time
+
+STATE_VERSION = 1
+
+class CrawlState:
+    """
+    クロールの進捗とリポジトリごとの取得状態を保持する永続ストア
+
+    複数スレッドから同時に更新でき、checkpoint() で一定件数ごとにディスクへ保存します。
+    """
+
+    def __init__(self, state_path, checkpoint_every=10):
+        """
+        Args:
+            state_path (str): 状態を保存するJSONファイルのパス
+            checkpoint_every (int): 何リポジトリ処理するごとにディスクへ保存するか
+        """
+        self.state_path = state_path
+        self.checkpoint_every = checkpoint_every
+        self.crawl = None
+        self.repos = {}
+        self._processed = set()
+        self._since_checkpoint = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """ディスク上の状態を読み込む（存在しない・壊れている場合は空から始める）"""
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read crawl state {self.state_path} ({e}). Starting from scratch.")
+            return
+        if data.get("version") != STATE_VERSION:
+            return
+        self.crawl = data.get("crawl")
+        self.repos = data.get("repos", {})
+        if self.crawl:
+            self._processed = set(self.crawl.get("processed", []))
+
+    def save(self):
+        """状態をディスクに書き込む（一時ファイル経由で置き換える）"""
+        with self._lock:
+            if self.crawl is not None:
+                self.crawl["processed"] = sorted(self._processed)
+            data = {"version": STATE_VERSION, "crawl": self.crawl, "repos": self.repos}
+            state_dir = os.path.dirname(self.state_path)
+            if state_dir:
+                os.makedirs(state_dir, exist_ok=True)
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+            self._since_checkpoint = 0
+
+    def begin_crawl(self, query):
+        """
+        クロールを開始する。同じ検索クエリの未完了クロールがあれば再開する
+
+        Args:
+            query (str): リポジトリの検索クエリ
+
+        Returns:
+            int: 再開した場合に処理済みのリポジトリ数（新規の場合は0）
+        """
+        if self.crawl and self.crawl.get("query") == query and not self.crawl.get("completed"):
+            return len(self._processed)
+        self.crawl = {"query": query, "started_at": time.time(), "completed": False, "processed": []}
+        self._processed = set()
+        return 0
+
+    def finish_crawl(self):
+        """クロールを完了としてマークし、保存する"""
+        if self.crawl is not None:
+            self.crawl["completed"] = True
+            self.crawl["finished_at"] = time.time()
+        self.save()
+
+    def is_processed(self, repo_full_name):
+        """現在のクロールで処理済みのリポジトリかどうか"""
+        with self._lock:
+            return repo_full_name in self._processed
+
+    def get_repo(self, repo_full_name):
+        """リポジトリの前回の取得状態を返す（未取得の場合は空の辞書）"""
+        with self._lock:
+            return dict(self.repos.get(repo_full_name, {}))
+
+    def update_repo(self, repo_full_name, **fields):
+        """
+        リポジトリの取得状態を更新し、処理済みとして記録する
+
+        Args:
+            repo_full_name (str): リポジトリ名
+            **fields: 'pushed_at', 'etag', 'tree_sha', 'files'（{ファイルパス: blob SHA}）など
+        """
+        with self._lock:
+            entry = self.repos.setdefault(repo_full_name, {})
+            entry.update(fields)
+            entry["checked_at"] = time.time()
+            self._processed.add(repo_full_name)
+            self._since_checkpoint += 1
+            due = self._since_checkpoint >= self.checkpoint_every
+        if due:
+            self.save()
@@ -1,186 +1,170 @@
 # このスクリプトは、GitHubリポジトリ内のワークフローYAMLファイルを検索・分析するための機能を提供します。
 # 主に、特定のトリガーイベントや言語に基づいてワークフローファイルを検索し、重複ファイルを削除するための関数が含まれています。
 # また、ワークフローの数を表示する機能もあります。
-# さらに、ワークフローのトリガーごとのファイル数を集計し、結果を表示する機能も含まれています。
+# さらに、ワークフローのトリガーごとのファイル数を集計し、結果を表示する機能や、
+# strategy.matrix を展開したジョブ数（ファンアウト、workflow_matrix.py）をデータセット全体で集計する機能も含まれています。
+# 各ファイルの解析結果はワークフローインデックス（workflow_index.py）に保存され、再利用されます。
+# トリガーの検索は、fast=True を指定するとインデックスにないファイルのトリガーだけを読み取ります
+# （libyamlのローダーでは検索全体で約2.5倍速くなりますが、純Python実装のローダーでは約1.2倍です）。
+# ディレクトリの代わりにパックディレクトリ（workflow_pack.py）を指定すると、シャード内のワークフローを直接分析します。
+# metrics（instrumentation.Metrics）を渡すと、各段階（インデックスの更新・特徴量テーブル・集計・重複削除・件数・ファンアウト）の
+# 所要時間と、解析・再利用したファイル数を analyzer_stage / analyzer_files として記録します。
 
 from collections import defaultdict
 import os
-import yaml
 
-def search_workflows_trigger(trigger_event, workflows_dir = "workflows"):
+from instrumentation import Metrics
+from workflow_features import FeatureTable, FLAG_LANGUAGE_ERROR, FLAG_PARSE_ERROR, FLAG_TRIGGER_ERROR, FLAG_YAML_ERROR
+from workflow_index import WorkflowIndex
+from workflow_matrix import corpus_fanout
+from workflow_pack import PackReader, is_pack_dir
+from workflow_store import dedupe_directory
+
+def _update_index(index, workers, metrics):
+    """インデックスを最新化し、所要時間と解析・再利用したファイル数を記録する"""
+    with metrics.timer("analyzer_stage", stage="index_update") as timing:
+        result = index.update(workers=workers)
+        timing.items = result["parsed"]
+    metrics.inc("analyzer_files", result["parsed"], result="parsed")
+    metrics.inc("analyzer_files", result["reused"], result="reused")
+    return result
+
+def _open_index(workflows_dir, index, workers=None, metrics=None):
+    """渡されたインデックスを返す。Noneの場合はディレクトリのインデックスを開いて最新化する"""
+    if index is None:
+        index = WorkflowIndex(workflows_dir)
+        _update_index(index, workers, metrics or Metrics())
+    return index
+
+def search_workflows_trigger(trigger_event, workflows_dir = "workflows", index=None, workers=None, metrics=None, fast=False):
     """
     workflowsフォルダ内のYAMLファイルから指定したトリガーイベントを含むワークフローファイル名を出力する
     Args:
         trigger_event (str): 検索するトリガーイベント名（例: push, pull_request など）
+        workflows_dir (str): ワークフローファイルが格納されているフォルダのパス
+        index (WorkflowIndex): 解析済みのインデックス。Noneの場合はworkflows_dirのインデックスを利用する
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        metrics (Metrics): 所要時間を記録する instrumentation.Metrics
+        fast (bool): Trueの場合、インデックスにない・古いファイルはトリガーだけを解析する
+                     （インデックスは更新しない。WorkflowIndex.scan_triggers を参照）
+
+    Returns:
+        list: トリガーイベントを含むファイル名のリスト
     """
     if not os.path.exists(workflows_dir):
         print(f"{workflows_dir}フォルダが存在しません")
         return
-    matched_files = []
-    for fname in os.listdir(workflows_dir):
-        if fname.endswith(('.yml', '.yaml')):
-            # どのファイルでもトリガーイベントを検索するかログを表示したい
-            #print(f"Checking file: {fname}")
-            fpath = os.path.join(workflows_dir, fname)
-            try:
-                with open(fpath, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                    # dataの中身を確認するログを出力して
-                    #print(f"Data in {fname}: {data}")
-                    # print("-" * 40)
-                # 'on'キーまたはTrueキーのどちらかが存在するかを判定
-                if not data or ('on' not in data and True not in data):
-                    continue
-                # 'on'またはTrueのどちらかからトリガー情報を取得
-                triggers = data.get('on') or data.get(True)
-                # triggersの中身を確認するログを出力したい
-                #print(f"Triggers in {fname}: {triggers}")
-                if isinstance(triggers, dict):
-                    if trigger_event in triggers:
-                        matched_files.append(fname)
-                elif isinstance(triggers, list):
-                    if trigger_event in triggers:
-                        matched_files.append(fname)
-                elif isinstance(triggers, str):
-                    if trigger_event == triggers:
-                        matched_files.append(fname)
-            except Exception as e:
-                print(f"{fname} の解析中にエラー: {e}")
+    if fast and index is None:
+        index = WorkflowIndex(workflows_dir)
+        with (metrics or Metrics()).timer("analyzer_stage", stage="trigger_scan") as timing:
+            records = index.scan_triggers(recursive=False, workers=workers)
+            timing.items = len(records)
+    else:
+        index = _open_index(workflows_dir, index, workers, metrics)
+        records = list(index.iter_records(recursive=False))
+    for rec in records:
+        if rec["parse_error"] or rec["trigger_error"]:
+            print(f"{rec['path']} の解析中にエラー: {rec['parse_error'] or rec['trigger_error']}")
+    matched_files = index.files_with_trigger(trigger_event, records)
     if matched_files:
         print(f"'{trigger_event}': {len(matched_files)}個")
         # for f in matched_files:
         #     print(f)
     else:
         print(f"トリガー '{trigger_event}' を含むワークフローファイルは見つかりませんでした。")
-        
-def search_workflows_languages(workflows_dir = "workflows"):
+    return matched_files
+
+def _drop_unanalyzable(index, rec):
+    """
+    解析エラーまたは言語を特定できなかったファイルを削除する（パックとストアの場合は集計から除外するだけ）
+
+    Returns:
+        bool: インデックスからレコードを削除した場合True
+    """
+    file_path = os.path.join(index.workflows_dir, rec["path"])
+    if index.pack or index.store:
+        # ストアのファイルを削除するとマニフェストが存在しないファイルを参照し、変更のないリポジトリは再取得されない
+        print(f"言語特定不可または解析エラーのため集計から除外: {rec['path']}")
+        return False
+    try:
+        if rec["yaml_error"]:
+            index.remove(rec["path"])
+            print(f"警告: ファイル '{file_path}' のYAML解析エラー: {rec['parse_error']}が発生したため削除")
+        elif rec["parse_error"] or rec["language_error"]:
+            index.remove(rec["path"])
+            print(f"警告: ファイル '{file_path}' の処理中にエラーが発生したため削除: {rec['parse_error'] or rec['language_error']}")
+        else:
+            # 言語を特定できなかった場合はファイルを削除
+            index.remove(rec["path"])
+            print(f"言語特定不可のため削除: {file_path}")
+    except OSError as e:
+        print(f"警告: ファイル '{file_path}' を削除できませんでした: {e}")
+        return False
+    return True
+
+def _print_language_usage(language_usage):
+    if language_usage:
+        for lang, count in sorted(language_usage.items(), key=lambda item: item[1], reverse=True):
+            print(f"- {lang}: {count} ファイル")
+    else:
+        print("指定されたフォルダでワークフローファイルが見つからなかったか、分析できませんでした。")
+
+def search_workflows_languages(workflows_dir = "workflows", index=None, workers=None, metrics=None):
     """
     指定されたフォルダ内のすべてのワークフローファイルで主要言語がどのくらい利用されているかを分析します。
-    言語が特定できなかったファイルは削除します。
+    言語が特定できなかったファイルは削除します（パックとストアの場合は削除せずに集計から除外します）。
     Args:
-        folder_path (str): ワークフローファイルが格納されているフォルダのパス。
+        workflows_dir (str): ワークフローファイルが格納されているフォルダ（またはパックディレクトリ）のパス。
+        index (WorkflowIndex): 解析済みのインデックス。Noneの場合はworkflows_dirのインデックスを利用する
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        metrics (Metrics): 所要時間を記録する instrumentation.Metrics
 
     Returns:
         dict: 各言語の利用回数を格納した辞書。
               例: {'Python': 5, 'Node.js': 3, 'Java': 2}
     """
     language_counts = defaultdict(int)
-    workflow_extensions = ('.yml', '.yaml') # GitHub Actionsのワークフローファイルの一般的な拡張子
 
     if not os.path.isdir(workflows_dir):
         print(f"エラー: 指定されたフォルダ '{workflows_dir}' が見つかりません。")
         return {}
 
-    for root, _, files in os.walk(workflows_dir):
-        for file_name in files:
-            if file_name.lower().endswith(workflow_extensions):
-                file_path = os.path.join(root, file_name)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        workflow_content = yaml.safe_load(f)
-
-                    detected_language = None
-                    if workflow_content:
-                        # ここに主要言語を特定するロジックを記述します。
-                        # 例: GitHub Actionsの場合、`uses` キーワードから推測
-                        # このロジックはワークフローの内容によって調整が必要です。
-                        if 'jobs' in workflow_content:
-                            for job_name, job_details in workflow_content['jobs'].items():
-                                if 'steps' in job_details:
-                                    for step in job_details['steps']:
-                                        if 'uses' in step:
-                                            action_path = step['uses'].lower()
-                                            if 'setup-python' in action_path:
-                                                detected_language = 'Python'
-                                            elif 'setup-node' in action_path or 'actions/setup-node' in action_path:
-                                                detected_language = 'Node.js'
-                                            elif 'setup-java' in action_path:
-                                                detected_language = 'Java'
-                                            elif 'setup-go' in action_path:
-                                                detected_language = 'Go'
-                                            elif 'actions/checkout' in action_path:
-                                                # checkoutアクション自体は言語を特定しないが、
-                                                # その後のステップで言語が特定されることが多い
-                                                pass
-                                            # 他のアクションや言語のパターンを追加
-                                            elif 'docker/build-push-action' in action_path:
-                                                detected_language = 'Docker/Container'
-                                            elif 'ruby/setup-ruby' in action_path:
-                                                detected_language = 'Ruby'
-                                            elif 'php/setup-php' in action_path:
-                                                detected_language = 'PHP'
-
-                                        elif 'run' in step:
-                                            # 'run' コマンド内のキーワードから推測
-                                            run_command = step['run'].lower()
-                                            if 'python' in run_command and 'pip' in run_command:
-                                                detected_language = 'Python'
-                                            elif 'npm' in run_command or 'node' in run_command:
-                                                detected_language = 'Node.js'
-                                            elif 'java' in run_command or 'maven' in run_command or 'gradle' in run_command:
-                                                detected_language = 'Java'
-                                            elif 'go build' in run_command or 'go run' in run_command:
-                                                detected_language = 'Go'
-                                            elif 'bundle install' in run_command or 'rake' in run_command:
-                                                detected_language = 'Ruby'
-                                            elif 'composer install' in run_command:
-                                                detected_language = 'PHP'
-                                            elif 'dotnet' in run_command:
-                                                detected_language = 'C#'
-                                            elif 'cargo build' in run_command:
-                                                detected_language = 'Rust'
-
-
-                    if detected_language:
-                        language_counts[detected_language] += 1
-                    else:
-                        # 言語を特定できなかった場合はファイルを削除
-                        os.remove(file_path)
-                        print(f"言語特定不可のため削除: {file_path}")
-
-                except yaml.YAMLError as e:
-                    os.remove(file_path)
-                    print(f"警告: ファイル '{file_path}' のYAML解析エラー: {e}が発生したため削除")
-                except Exception as e:
-                    os.remove(file_path)
-                    print(f"警告: ファイル '{file_path}' の処理中にエラーが発生したため削除: {e}")
-
+    metrics = metrics or Metrics()
+    index = _open_index(workflows_dir, index, workers, metrics)
+    removed = False
+    with metrics.timer("analyzer_stage", stage="aggregate") as timing:
+        for rec in list(index.iter_records()):
+            timing.items += 1
+            if rec["language"] and not (rec["yaml_error"] or rec["parse_error"] or rec["language_error"]):
+                language_counts[rec["language"]] += 1
+            elif _drop_unanalyzable(index, rec):
+                removed = True
+        if removed:
+            index.save()
 
     language_usage = dict(language_counts)
-    if language_usage:
-        for lang, count in sorted(language_usage.items(), key=lambda item: item[1], reverse=True):
-            print(f"- {lang}: {count} ファイル")
-    else:
-        print("指定されたフォルダでワークフローファイルが見つからなかったか、分析できませんでした。")
-def remove_duplicate_files_in_dir(directory, extensions=(".yml", ".yaml")):
+    _print_language_usage(language_usage)
+    return language_usage
+
+def remove_duplicate_files_in_dir(directory, extensions=(".yml", ".yaml"), metrics=None):
     """
     指定ディレクトリ内のYAMLファイルについて、内容が完全一致する重複ファイルを削除する（1つだけ残す）
 
+    内容はSHA-256で比較するため、メモリにはファイルごとのハッシュ値だけを保持します。
+
     Args:
         directory (str): チェックするディレクトリ
         extensions (tuple): 対象とする拡張子
+        metrics (Metrics): 所要時間と削除したファイル数を記録する instrumentation.Metrics
     """
-    content_map = {}
-    if not os.path.isdir(directory):
-        print(f"{directory} は存在しないかディレクトリではありません")
-        return
-    for fname in os.listdir(directory):
-        if fname.endswith(extensions):
-            fpath = os.path.join(directory, fname)
-            try:
-                with open(fpath, "r", encoding="utf-8") as f:
-                    content = f.read()
-                if content in content_map:
-                    os.remove(fpath)
-                    print(f"重複のため削除: {fpath}")
-                else:
-                    content_map[content] = fpath
-            except Exception as e:
-                print(f"{fpath} の処理中にエラー: {e}")
+    metrics = metrics or Metrics()
+    with metrics.timer("analyzer_stage", stage="dedupe"):
+        removed = dedupe_directory(directory, extensions)
+    metrics.inc("analyzer_files", removed, result="duplicate_removed")
 
 def show_workflows_count(directory="workflows", extensions=(".yml", ".yaml")):
     """
-    指定ディレクトリ内のYAMLファイルの数を表示する
+    指定ディレクトリ内のYAMLファイルの数を表示する（パックの場合はシャードのインデックスから数える）
 
     Args:
         directory (str): チェックするディレクトリ
@@ -189,23 +173,104 @@ def show_workflows_count(directory="workflows", extensions=(".yml", ".yaml")):
     if not os.path.isdir(directory):
         print(f"{directory} は存在しないかディレクトリではありません")
         return
+    if is_pack_dir(directory):
+        with PackReader(directory) as reader:
+            count = sum(1 for key in reader.keys() if key.endswith(extensions))
+        print(f"{directory} 内のYAMLファイル数: {count}")
+        return
     count = 0
     for fname in os.listdir(directory):
         if fname.endswith(extensions):
             count += 1
     print(f"{directory} 内のYAMLファイル数: {count}")
 
-def show_workflows_summary(workflows_dir):
+def show_workflows_summary(workflows_dir, workers=None, metrics=None):
     """
     workflowsディレクトリ内で主要トリガー・主要言語ごとのファイル数を出力する
+
+    各ファイルの解析はワークフローインデックスで一度だけ行い、集計は特徴量テーブル（workflow_features.py）の
+    列に対するベクトル演算で行います。言語を特定できなかったファイルの削除は search_workflows_languages と同じです。
+
+    Args:
+        workflows_dir (str): ワークフローファイルが格納されているフォルダ（またはパックディレクトリ）のパス
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        metrics (Metrics): 各段階の所要時間を記録する instrumentation.Metrics
     """
     major_triggers = ['push', 'pull_request', 'schedule', 'workflow_dispatch']
+    if not os.path.isdir(workflows_dir):
+        print(f"{workflows_dir} は存在しないかディレクトリではありません")
+        return
+    metrics = metrics or Metrics()
+    index = WorkflowIndex(workflows_dir)
+    _update_index(index, workers, metrics)
+    with metrics.timer("analyzer_stage", stage="feature_table") as timing:
+        table = FeatureTable.for_index(index)
+        timing.items = len(table.paths)
 
     print("\n=== 言語ごとのワークフローファイル数 ===")
-    search_workflows_languages(workflows_dir)
+    # YAML・解析・言語判定のエラーがなく、言語を特定できたファイルだけを集計し、それ以外は削除する
+    analyzable = dict(has_language=True, without_flags=FLAG_PARSE_ERROR | FLAG_YAML_ERROR | FLAG_LANGUAGE_ERROR)
+    with metrics.timer("analyzer_stage", stage="aggregate") as timing:
+        timing.items = len(table.paths)
+        keep = table.select(**analyzable)
+        removed = False
+        for i in table.rows(keep, invert=True):
+            if _drop_unanalyzable(index, index.records[table.paths[i]]):
+                removed = True
+        if removed:
+            index.save()
+        language_usage = table.count_by("language", where=keep)
+    _print_language_usage(language_usage)
+
     print("=== トリガーごとのワークフローファイル数 ===")
+    # パックとストアのワークフローは削除されないため、すべてを対象にする
+    trigger_filter = dict(top_level=True) if index.pack or index.store else dict(top_level=True, **analyzable)
+    with metrics.timer("analyzer_stage", stage="aggregate"):
+        trigger_rows = table.select(**trigger_filter)
+        error_rows = list(table.rows(table.select(with_flags=FLAG_PARSE_ERROR | FLAG_TRIGGER_ERROR, **trigger_filter)))
+        trigger_counts = table.count_by("triggers", where=trigger_rows)
+    for i in error_rows:
+        rec = index.records[table.paths[i]]
+        print(f"{rec['path']} の解析中にエラー: {rec['parse_error'] or rec['trigger_error']}")
     for trigger in major_triggers:
-        search_workflows_trigger(trigger, workflows_dir)
+        if trigger_counts.get(trigger):
+            print(f"'{trigger}': {trigger_counts[trigger]}個")
+        else:
+            print(f"トリガー '{trigger}' を含むワークフローファイルは見つかりませんでした。")
+
+    with metrics.timer("analyzer_stage", stage="count"):
+        show_workflows_count(workflows_dir)
+
+def show_matrix_fanout(workflows_dir, top=20, workers=None, metrics=None):
+    """
+    データセット全体と各ワークフローの、strategy.matrix を展開したジョブ数（ファンアウト）を出力する
+
+    ジョブ数は解析時に組み合わせを列挙せずに数え、ワークフローインデックスに保存されたものを集計します。
 
-    show_workflows_count(workflows_dir)
+    Args:
+        workflows_dir (str): ワークフローファイルが格納されているフォルダ（またはパックディレクトリ）のパス
+        top (int): ランナーごと・ワークフローごとに表示する件数（0はすべて）
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        metrics (Metrics): 各段階の所要時間を記録する instrumentation.Metrics
+
+    Returns:
+        dict: workflow_matrix.corpus_fanout の結果
+    """
+    if not os.path.isdir(workflows_dir):
+        print(f"{workflows_dir} は存在しないかディレクトリではありません")
+        return
+    metrics = metrics or Metrics()
+    index = _open_index(workflows_dir, None, workers, metrics)
+    with metrics.timer("analyzer_stage", stage="fanout") as timing:
+        corpus = corpus_fanout(index)
+        timing.items = len(corpus["workflows"])
 
+    print(f"\n=== ジョブのファンアウト（{len(corpus['workflows'])}ワークフロー） ===")
+    print(f"合計: {corpus['jobs']}ジョブ（マトリックスが式で決まらないジョブ: {corpus['dynamic']}個）")
+    print("=== ランナーごとのジョブ数 ===")
+    for label, count in corpus["runners"].most_common(top or None):
+        print(f"'{label}': {count}")
+    print("=== ワークフローごとのジョブ数 ===")
+    for path, count, dynamic in corpus["workflows"][:top or None]:
+        print(f"{path}: {count}" + (f"（決まらないジョブ {dynamic}個）" if dynamic else ""))
+    return corpus
@@ -0,0 +1,237 @@
+# このスクリプトは、GitHub REST APIを呼び出すための共有クライアントを提供します。
+# keep-aliveの Session とコネクションプールを使い回し、トークンがあれば認証付きで送信します。
+# レスポンスはディスクにキャッシュし、TTL内であればAPIを呼ばず、TTLを過ぎた場合もETagによる
+# 条件付きリクエスト（304ならキャッシュを再利用）で確認します。
+# 送信ペースは RateLimitScheduler がレスポンスの X-RateLimit-* ヘッダーに合わせて調整し、
+# 複数のパスをまとめて取得する get_json_many() は、その範囲で並行してリクエストを送り、完了した順に結果を返します。
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import RateLimitScheduler
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_CACHE_DIR = ".github_api_cache"
+CACHE_VERSION = 1
+CACHEABLE_STATUS = (200, 404) # 404（リポジトリやディレクトリがない）も結果としてキャッシュする
+SECONDARY_LIMIT_WAIT = 60.0 # セカンダリレートリミットで Retry-After がない場合に待つ秒数（GitHubの推奨は1分以上）
+
+class ResponseCache:
+    """
+    URLごとのレスポンス（ステータス・ETag・JSON・取得時刻）をディスクに保存するキャッシュ
+
+    URLのSHA-256をファイル名とし、エントリごとに一時ファイル経由で置き換えるため、
+    複数スレッド・複数プロセスから同時に利用できます。
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".json")
+
+    def get(self, url):
+        """キャッシュのエントリを返す（存在しない・読めない場合はNone）"""
+        try:
+            with open(self._path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != CACHE_VERSION or entry.get("url") != url:
+            return None
+        return entry
+
+    def put(self, url, status, data, etag=None):
+        entry = {"version": CACHE_VERSION, "url": url, "status": status, "etag": etag, "data": data, "fetched_at": time.time()}
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return entry
+
+class GitHubClient:
+    """
+    GitHub REST APIの共有クライアント
+
+    get_json() はキャッシュ・条件付きリクエスト・レートリミットの待機・再試行をまとめて行い、
+    エラーの場合は requests.exceptions.RequestException を送出します。複数スレッドから同時に利用できます。
+    """
+
+    def __init__(self, token=None, api_url=DEFAULT_API_URL, cache_dir=DEFAULT_CACHE_DIR, ttl=600.0,
+                 pool_size=16, scheduler=None, timeout=15, max_retries=3):
+        """
+        Args:
+            token (str): Personal Access Token。Noneの場合は認証なし（1時間あたり60リクエスト）
+            api_url (str): APIのベースURL（モックサーバーで計測する場合などに変更する）
+            cache_dir (str): レスポンスキャッシュのディレクトリ。Noneの場合はキャッシュしない
+            ttl (float): キャッシュをAPIに確認せずに使う秒数。過ぎた場合はETagで確認する
+            pool_size (int): 保持するコネクション数（並行数以上にする）
+            scheduler (RateLimitScheduler): 送信ペースの調整に使うスケジューラ。Noneの場合は新しく作る
+            timeout (float): 1リクエストのタイムアウト秒数
+            max_retries (int): レートリミットや一時的なエラーで再試行する回数
+        """
+        self.api_url = api_url.rstrip("/")
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_retries = max_retries
+        # 認証なしの上限（60リクエスト）では既定の予備（50）を残すとほとんど送れないため、予備を残さない
+        self.scheduler = scheduler or RateLimitScheduler(reserve=50 if token else 0)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        if token:
+            self.session.headers["Authorization"] = f"token {token}"
+        self.stats = {"requests": 0, "cache_hits": 0, "not_modified": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def request(self, method, path, params=None, headers=None, json_body=None):
+        """
+        キャッシュを通さずにリクエストを送信し、レスポンスをそのまま返す
+
+        レートリミットに合わせて送信し、レートリミット（セカンダリレートリミットを含む）の場合は待って再試行します。
+        5xxの場合も再試行しますが、POSTは重複して作成しないよう再試行しません。
+        ステータスコードの確認は呼び出し元で行います。
+
+        Args:
+            method (str): HTTPメソッド
+            path (str): APIのパス（例: /repos/owner/name/issues/comments）または完全なURL
+            params (dict): クエリパラメーター
+            headers (dict): 追加のヘッダー（If-None-Match など）
+            json_body: リクエストボディ（JSONに変換するオブジェクト）
+
+        Returns:
+            requests.Response: 最後に受け取ったレスポンス
+        """
+        url = path if path.startswith(("http://", "https://")) else f"{self.api_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            self.scheduler.acquire()
+            self._count("requests")
+            response = self.session.request(method, url, params=params, headers=headers, json=json_body, timeout=self.timeout)
+            self.scheduler.update_from_headers(response.headers)
+            retry_after = response.headers.get("Retry-After")
+            primary = response.headers.get("X-RateLimit-Remaining") == "0"
+            secondary = response.status_code in (403, 429) and "secondary rate limit" in response.text.lower()
+            rate_limited = response.status_code in (403, 429) and (retry_after is not None or primary or secondary)
+            if attempt < self.max_retries and rate_limited:
+                # Retry-After は update_from_headers で反映済み。プライマリのレートリミットはリセット時刻まで待つ
+                reset_at = response.headers.get("X-RateLimit-Reset")
+                if retry_after is None and primary and reset_at is not None:
+                    self.scheduler.pause_until(float(reset_at))
+                elif retry_after is None:
+                    self.scheduler.pause_for(SECONDARY_LIMIT_WAIT)
+                continue
+            if attempt < self.max_retries and response.status_code >= 500 and method.upper() != "POST":
+                time.sleep(2 ** attempt)
+                continue
+            return response
+        return response
+
+    def iter_pages(self, path, params=None, per_page=100):
+        """
+        ページ分割された一覧を per_page 件ずつ取得し、要素を1件ずつ返す（Linkヘッダーの next をたどる）
+
+        検索APIのレスポンス（{'items': [...]}）にも対応します。次のページは要素を使い切ってから取得します。
+
+        Raises:
+            requests.exceptions.HTTPError: エラーのレスポンスを受け取った場合
+        """
+        url, params = path, dict(params or {}, per_page=per_page)
+        while url:
+            response = self.request("GET", url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            yield from data["items"] if isinstance(data, dict) else data
+            url = response.links.get("next", {}).get("url")
+            params = None # next のURLにはクエリパラメーターが含まれている
+
+    def get_json(self, path):
+        """
+        APIのパス（例: /repos/owner/name）のJSONを返す
+
+        Returns:
+            dict | list: レスポンスのJSON
+
+        Raises:
+            requests.exceptions.HTTPError: 404などのエラーの場合（キャッシュした404も含む）
+            requests.exceptions.RequestException: 通信エラーの場合
+        """
+        url = f"{self.api_url}/{path.lstrip('/')}"
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            self._count("cache_hits")
+        else:
+            headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else None
+            response = self.request("GET", url, headers=headers)
+            if response.status_code == 304 and entry is not None:
+                # 変更なし（認証済みのリクエストではクォータを消費しない）
+                self._count("not_modified")
+                entry = self.cache.put(url, entry["status"], entry["data"], entry["etag"])
+            elif response.status_code in CACHEABLE_STATUS:
+                data = response.json()
+                etag = response.headers.get("ETag")
+                if self.cache:
+                    entry = self.cache.put(url, response.status_code, data, etag)
+                else:
+                    entry = {"status": response.status_code, "data": data}
+            else:
+                response.raise_for_status()
+                return response.json()
+        if entry["status"] != 200:
+            raise requests.exceptions.HTTPError(f"{entry['status']} Client Error for url: {url}")
+        return entry["data"]
+
+    def get_json_many(self, paths, workers=8):
+        """
+        複数のパスのJSONを並行して取得し、完了した順に返す
+
+        未完了のリクエストはワーカーあたり4件までに抑えるため、パスの数が多くてもメモリ使用量は一定です。
+
+        Args:
+            paths (iterable): APIのパスの列
+            workers (int): 並行して送信するリクエスト数（送信ペースはレートリミットに合わせて調整される）
+
+        Yields:
+            tuple: (パス, JSON または 発生した例外)
+        """
+        paths = iter(paths)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            while True:
+                for path in paths:
+                    pending[executor.submit(self.get_json, path)] = path
+                    if len(pending) >= workers * 4:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        yield path, future.result()
+                    except requests.exceptions.RequestException as e:
+                        yield path, e
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
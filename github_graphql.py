@@ -0,0 +1,160 @@
+# このスクリプトは、GitHub GraphQL APIを使って複数リポジトリのワークフローファイルをまとめて取得する機能を提供します。
+# 1回のクエリで複数リポジトリの .github/workflows ディレクトリの一覧と各ファイルの内容を取得するため、
+# ファイルごとに get_contents / decoded_content を呼び出すREST APIよりもリクエスト数が大幅に少なくなります。
+
+import requests
+from typing import List, Dict, Any, Optional
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+WORKFLOWS_EXPRESSION = "HEAD:.github/workflows"
+
+_REPOSITORY_FIELDS = """
+    defaultBranchRef { target { oid } }
+    object(expression: "%s") {
+      ... on Tree {
+        oid
+        entries {
+          name
+          type
+          object {
+            ... on Blob { oid text isBinary isTruncated }
+          }
+        }
+      }
+    }
+""" % WORKFLOWS_EXPRESSION
+
+def graphql_url_for(base_url: Optional[str]) -> str:
+    """REST APIのベースURLから対応するGraphQLエンドポイントを求める"""
+    if not base_url:
+        return GRAPHQL_URL
+    base_url = base_url.rstrip("/")
+    # GitHub Enterprise Server の REST は /api/v3、GraphQL は /api/graphql
+    if base_url.endswith("/api/v3"):
+        return base_url[:-len("/v3")] + "/graphql"
+    return base_url + "/graphql"
+
+# 変更確認用：ワークフローディレクトリのツリーSHAだけを取得する
+_TREE_SHA_FIELDS = """
+    object(expression: "%s") {
+      ... on Tree { oid }
+    }
+""" % WORKFLOWS_EXPRESSION
+
+def build_workflows_query(count: int, fields: str = _REPOSITORY_FIELDS) -> str:
+    """
+    count個のリポジトリのワークフローをまとめて取得するGraphQLクエリを作成する
+
+    各リポジトリは r0, r1, ... のエイリアスで、owner/nameは変数 $o0, $n0, ... で渡します。
+    """
+    variables = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(count))
+    repositories = "\n".join(
+        f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{{fields}  }}" for i in range(count)
+    )
+    return f"query({variables}) {{\n{repositories}\n}}"
+
+def _post_query(session, github_token, repo_full_names, graphql_url, scheduler, fields):
+    """リポジトリごとのエイリアス付きクエリを送信し、data部分を返す"""
+    variables = {}
+    for i, full_name in enumerate(repo_full_names):
+        owner, name = full_name.split("/", 1)
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+
+    if scheduler is not None:
+        scheduler.acquire()
+    response = session.post(
+        graphql_url,
+        json={"query": build_workflows_query(len(repo_full_names), fields), "variables": variables},
+        headers={"Authorization": f"bearer {github_token}"},
+    )
+    if scheduler is not None:
+        scheduler.update_from_headers(response.headers)
+    response.raise_for_status()
+    return response.json().get("data") or {}
+
+def fetch_workflow_tree_shas_graphql(
+    session: requests.Session,
+    github_token: str,
+    repo_full_names: List[str],
+    graphql_url: str = GRAPHQL_URL,
+    scheduler=None
+) -> Dict[str, Optional[str]]:
+    """
+    複数リポジトリの .github/workflows のツリーSHAだけを1回のGraphQLクエリで取得する
+
+    前回のクロールから変更のないリポジトリを、ファイル内容を取得せずに見分けるために使います。
+
+    Returns:
+        Dict[str, Optional[str]]: リポジトリ名をキーとしたツリーSHA（ディレクトリや
+            リポジトリが存在しない場合はNone）
+    """
+    data = _post_query(session, github_token, repo_full_names, graphql_url, scheduler, _TREE_SHA_FIELDS)
+    results = {}
+    for i, full_name in enumerate(repo_full_names):
+        tree = (data.get(f"r{i}") or {}).get("object")
+        results[full_name] = tree.get("oid") if tree else None
+    return results
+
+def fetch_workflow_files_graphql(
+    session: requests.Session,
+    github_token: str,
+    repo_full_names: List[str],
+    graphql_url: str = GRAPHQL_URL,
+    scheduler=None
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    複数リポジトリの .github/workflows 内のYAMLファイルを1回のGraphQLクエリで取得する
+
+    Args:
+        session (requests.Session): HTTPセッション
+        github_token (str): GitHub Personal Access Token (PAT)
+        repo_full_names (List[str]): "owner/name" 形式のリポジトリ名のリスト
+        graphql_url (str): GraphQLエンドポイント
+        scheduler (RateLimitScheduler): 指定した場合、送信前にトークンを取得し、レスポンスヘッダーを反映する
+
+    Returns:
+        Dict[str, Optional[Dict[str, Any]]]: リポジトリ名をキーとした辞書。値は
+            'commit'（デフォルトブランチのコミットSHA）,
+            'tree_sha'（ワークフローディレクトリのツリーSHA、ディレクトリがなければNone）,
+            'workflows'（'repo_full_name', 'file_path', 'file_content' を持つ辞書のリスト）,
+            'files'（取得したファイルパスとblob SHAの辞書）,
+            'incomplete'（内容を取得できなかったファイルがあるか）を持ちます。
+            リポジトリを取得できなかった場合はNoneです。
+
+    Raises:
+        requests.exceptions.RequestException: 通信エラーやHTTPエラーの場合
+    """
+    data = _post_query(session, github_token, repo_full_names, graphql_url, scheduler, _REPOSITORY_FIELDS)
+
+    results = {}
+    for i, full_name in enumerate(repo_full_names):
+        repository = data.get(f"r{i}")
+        if repository is None:
+            results[full_name] = None
+            continue
+        tree = repository.get("object")
+        result = {"commit": ((repository.get("defaultBranchRef") or {}).get("target") or {}).get("oid"),
+                  "tree_sha": None, "workflows": [], "files": {}, "incomplete": False}
+        if tree:
+            result["tree_sha"] = tree.get("oid")
+            for entry in tree.get("entries", []):
+                name = entry["name"]
+                if entry["type"] != "blob" or not (name.endswith(".yml") or name.endswith(".yaml")):
+                    continue
+                blob = entry.get("object") or {}
+                if blob.get("isBinary"):
+                    print(f"  - Warning: Could not decode content of .github/workflows/{name} in {full_name} (possible binary file). Skipping.")
+                    continue
+                if blob.get("text") is None or blob.get("isTruncated"):
+                    # 大きなファイルは内容が返らないため、呼び出し元でREST APIにフォールバックする
+                    result["incomplete"] = True
+                    continue
+                result["files"][f".github/workflows/{name}"] = blob.get("oid")
+                result["workflows"].append({
+                    "repo_full_name": full_name,
+                    "file_path": f".github/workflows/{name}",
+                    "file_content": blob["text"]
+                })
+        results[full_name] = result
+    return results
@@ -0,0 +1,221 @@
+# このスクリプトは、収集・分析の各段階の所要時間と件数を記録する計測機能と、構造化ログの設定を提供します。
+# Metrics は段階ごとのタイマー（回数・合計秒数・最大秒数・処理件数）とカウンター（APIの呼び出し回数、
+# ダウンロードしたバイト数、レートリミットで待った秒数など）をラベル付きで集計し、
+# JSONまたはPrometheusのテキスト形式で書き出したり、実行の最後にプロファイルの要約を表示したりできます。
+# 複数スレッドから同時に利用できます。
+#
+# 使い方:
+#   metrics = Metrics()
+#   with metrics.timer("collector_stage", stage="fetch_file") as t:
+#       ...
+#       t.items += 1
+#   metrics.inc("github_api_requests", endpoint="contents")
+#   metrics.write("crawl_metrics.prom")
+#   metrics.log_summary()
+
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_EXTENSIONS = (".prom", ".txt")
+
+# LogRecord に標準で含まれる属性（これ以外の extra で渡された属性を構造化ログのフィールドとして出力する）
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+def _labels_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else f"{value:.6f}"
+
+class _Timing:
+    """timer() のブロック内で処理件数を加算するためのオブジェクト"""
+
+    def __init__(self):
+        self.items = 0
+
+class Metrics:
+    """
+    ラベル付きのタイマーとカウンターを集計するレジストリ
+
+    タイマーは名前とラベルの組ごとに、回数（count）・合計秒数（sum）・最大秒数（max）・処理件数（items）を保持します。
+    処理件数を記録したタイマーは、要約で1秒あたりの件数（例: 解析したファイル数/秒）も表示します。
+    """
+
+    def __init__(self):
+        self.counters = defaultdict(float) # (名前, ラベル) -> 値
+        self.timers = {} # (名前, ラベル) -> {'count', 'sum', 'max', 'items'}
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """カウンターに value を加算する"""
+        with self._lock:
+            self.counters[(name, _labels_key(labels))] += value
+
+    def observe(self, name, seconds, items=0, **labels):
+        """タイマーに1回分の所要時間（秒）と処理件数を記録する"""
+        key = (name, _labels_key(labels))
+        with self._lock:
+            stat = self.timers.get(key)
+            if stat is None:
+                stat = self.timers[key] = {"count": 0, "sum": 0.0, "max": 0.0, "items": 0}
+            stat["count"] += 1
+            stat["sum"] += seconds
+            stat["max"] = max(stat["max"], seconds)
+            stat["items"] += items
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        ブロックの所要時間をタイマーに記録する（例外で抜けた場合も記録する）
+
+        Yields:
+            _Timing: items 属性に処理件数を加算すると、タイマーの処理件数として記録される
+        """
+        timing = _Timing()
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.observe(name, time.perf_counter() - start, timing.items, **labels)
+
+    def counter_value(self, name, **labels):
+        """カウンターの値を返す（ラベルを省略した場合は、その名前のすべてのラベルの合計）"""
+        with self._lock:
+            if labels:
+                return self.counters.get((name, _labels_key(labels)), 0)
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def snapshot(self):
+        """集計値を JSON に変換できる dict で返す"""
+        with self._lock:
+            return {
+                "elapsed_seconds": time.perf_counter() - self.started_at,
+                "counters": [{"name": name, "labels": dict(key), "value": value}
+                             for (name, key), value in sorted(self.counters.items())],
+                "timers": [dict({"name": name, "labels": dict(key)}, **stat)
+                           for (name, key), stat in sorted(self.timers.items())],
+            }
+
+    def to_prometheus(self):
+        """
+        集計値をPrometheusのテキスト形式で返す
+
+        カウンターは <名前>_total、タイマーは <名前>_seconds（summary の _count と _sum）、
+        <名前>_seconds_max（gauge）、<名前>_items_total（counter）として出力します。
+        """
+        snapshot = self.snapshot()
+        lines = []
+        counters = defaultdict(list)
+        for counter in snapshot["counters"]:
+            counters[counter["name"]].append(counter)
+        for name, samples in counters.items():
+            lines.append(f"# TYPE {name}_total counter")
+            for sample in samples:
+                lines.append(f"{name}_total{_format_labels(_labels_key(sample['labels']))} {_format_value(sample['value'])}")
+        timers = defaultdict(list)
+        for stat in snapshot["timers"]:
+            timers[stat["name"]].append(stat)
+        for name, samples in timers.items():
+            lines.append(f"# TYPE {name}_seconds summary")
+            for sample in samples:
+                labels = _format_labels(_labels_key(sample["labels"]))
+                lines.append(f"{name}_seconds_count{labels} {sample['count']}")
+                lines.append(f"{name}_seconds_sum{labels} {sample['sum']:.6f}")
+            lines.append(f"# TYPE {name}_seconds_max gauge")
+            for sample in samples:
+                lines.append(f"{name}_seconds_max{_format_labels(_labels_key(sample['labels']))} {sample['max']:.6f}")
+            if any(sample["items"] for sample in samples):
+                lines.append(f"# TYPE {name}_items_total counter")
+                for sample in samples:
+                    lines.append(f"{name}_items_total{_format_labels(_labels_key(sample['labels']))} {sample['items']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        集計値をファイルに書き出す（拡張子が .prom / .txt の場合はPrometheusのテキスト形式、それ以外はJSON）
+
+        一時ファイル経由で置き換えるため、node_exporter の textfile コレクターから読み込んでも途中の内容は見えません。
+        """
+        if path.endswith(PROMETHEUS_EXTENSIONS):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def summary_lines(self):
+        """プロファイルの要約（タイマーを合計秒数の多い順に、続けてカウンター）を行のリストで返す"""
+        snapshot = self.snapshot()
+        elapsed = snapshot["elapsed_seconds"]
+        lines = [f"=== プロファイル（経過 {elapsed:.2f} 秒） ==="]
+        for stat in sorted(snapshot["timers"], key=lambda stat: stat["sum"], reverse=True):
+            label = ",".join(f"{key}={value}" for key, value in stat["labels"].items())
+            line = (f"{stat['name']}[{label}]: {stat['sum']:.3f} 秒 ({stat['count']} 回, "
+                    f"平均 {stat['sum'] / stat['count'] * 1000:.1f} ms, 最大 {stat['max'] * 1000:.1f} ms")
+            if stat["items"]:
+                rate = stat["items"] / stat["sum"] if stat["sum"] else float("inf")
+                line += f", {stat['items']} 件, {rate:.1f} 件/秒"
+            lines.append(line + ")")
+        for counter in snapshot["counters"]:
+            label = ",".join(f"{key}={value}" for key, value in counter["labels"].items())
+            lines.append(f"{counter['name']}[{label}]: {_format_value(counter['value'])}")
+        return lines
+
+    def log_summary(self, log=None, level=logging.INFO):
+        """プロファイルの要約をログに出力する"""
+        log = log or logger
+        for line in self.summary_lines():
+            log.log(level, line)
+
+class JsonFormatter(logging.Formatter):
+    """ログを1行1オブジェクトのJSONで出力するフォーマッター（extra で渡した属性もフィールドとして出力する）"""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level=logging.INFO, json_format=False, stream=None):
+    """
+    ルートロガーにハンドラーを設定する（スクリプトの実行時に1回呼び出す）
+
+    Args:
+        level (int | str): 出力するログレベル
+        json_format (bool): Trueの場合は1行1オブジェクトのJSON、Falseの場合は人が読みやすい形式で出力する
+        stream: 出力先（省略時は標準エラー出力）
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if json_format:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
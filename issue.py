@@ -1,8 +1,16 @@
+import asyncio
+
 from github import Github
 
+from github_client import GitHubClient
+from issue_watcher import IssueCommentWatcher, DEFAULT_STATE_PATH
+from issue_bulk import BulkIssueOperations, print_report
+
 class IssueManager:
     def __init__(self, access_token, repo_name):
-        self.g = Github(access_token)
+        self.access_token = access_token
+        # 一覧は1ページ100件で取得する（既定の30件ではページ数だけリクエストが増える）
+        self.g = Github(access_token, per_page=100)
         self.repo = self.g.get_repo(repo_name)
 
     def list_issues(self, state="open"):
@@ -44,6 +52,45 @@ class IssueManager:
             return latest_comment.id
         return last_comment_id
 
+    def watch_new_comments(self, issue_numbers, reply_text, state_path=DEFAULT_STATE_PATH, poll_interval=60.0):
+        """
+        複数のIssueを監視し、新しいコメントがあれば自動で返信する（Ctrl+Cで終了）
+
+        auto_reply_to_new_comments と異なり、Issueごとにコメントを全件取得せず、リポジトリ単位で
+        前回以降のコメントだけを取得します（issue_watcher.IssueCommentWatcher）。
+        自分の返信には反応せず、監視の位置は state_path に保存されるため、再起動後も続きから監視します。
+        :param issue_numbers: 監視するIssue番号のリスト
+        :param reply_text: 返信するテキスト
+        :param state_path: 監視の位置を保存するJSONファイルのパス
+        :param poll_interval: ポーリング間隔（秒）
+        """
+        client = GitHubClient(token=self.access_token, cache_dir=None)
+        login = self.g.get_user().login
+        watcher = IssueCommentWatcher(client, state_path, poll_interval, ignore_users={login})
+        for number in issue_numbers:
+            watcher.watch(self.repo.full_name, number)
+
+        def reply(repo, issue_number, comment):
+            response = client.request("POST", f"/repos/{repo}/issues/{issue_number}/comments", json_body={"body": reply_text})
+            response.raise_for_status()
+            print(f"Issue #{issue_number} にコメントを追加しました。")
+
+        try:
+            asyncio.run(watcher.run(reply))
+        except KeyboardInterrupt:
+            pass
+
+    def bulk(self, workers=4):
+        """
+        このリポジトリのIssueをまとめて作成・コメント・ラベル付け・クローズする一括操作を返す
+
+        書き込みはGitHubのセカンダリレートリミットに合わせて間隔を空けて送信されます（issue_bulk.BulkIssueOperations）。
+        :param workers: 並行して処理するIssueの数
+        :return: BulkIssueOperations
+        """
+        client = GitHubClient(token=self.access_token, cache_dir=None)
+        return BulkIssueOperations(client, self.repo.full_name, workers)
+
 if __name__ == "__main__":
     ACCESS_TOKEN = "your_access_token_here"
     REPO_NAME = "asato425/github-learning"
@@ -61,7 +108,8 @@ if __name__ == "__main__":
     # # 3. Issueにコメントを追加
     # manager.comment_issue(new_issue, "PyGithubからコメントを追加しました。")
     
-    # タイトルが一致する最初のIssueをクローズ
-    for issue in manager.repo.get_issues(state="open"):
-        if issue.title == "PyGithubから作成したIssue":
-            manager.close_issue(issue)
\ No newline at end of file
+    # タイトルが一致するIssueを検索してクローズ（オープンなIssueをすべて走査しない）
+    # 検索はタイトルを含む長いタイトルにも一致するため、タイトルが完全に一致するものだけをクローズする
+    TITLE = "PyGithubから作成したIssue"
+    report = manager.bulk().close_issues_matching(f'"{TITLE}" in:title', where=lambda issue: issue["title"] == TITLE)
+    print_report(report)
\ No newline at end of file
@@ -0,0 +1,230 @@
+# このスクリプトは、多数のIssueをまとめて作成・コメント・ラベル付け・クローズする一括操作を提供します。
+# 各操作は上限付きのワーカープールで並行して処理しますが、GitHubのセカンダリレートリミットに合わせて
+# コンテンツを作成・変更するリクエスト（POST/PATCH）は間隔を空け（既定1秒に1回）、1時間あたりの件数も抑えます。
+# Retry-After やセカンダリレートリミットの403を受け取った場合は、指定された時間だけすべての書き込みを止めて再試行します。
+# 一覧・検索は per_page=100 で1ページずつ取得しながら処理するため、件数が多くても一覧をメモリに溜めません。
+# 各操作は、対象ごとの結果（成功・失敗、ステータスコード、Issue番号、エラー内容）のリストを返します。
+#
+# 使い方:
+#   python issue_bulk.py owner/repo close-matching '"PyGithubから作成したIssue" in:title' --title PyGithubから作成したIssue
+#   python issue_bulk.py owner/repo label 12 15 18 --labels triage
+#   python issue_bulk.py owner/repo comment 12 15 --body "確認しました"
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import os
+
+import requests
+
+from github_client import GitHubClient
+from rate_limiter import RateLimitScheduler
+
+DEFAULT_WRITES_PER_SECOND = 1.0 # GitHubの推奨: コンテンツを作成するリクエストは1秒以上間隔を空ける
+DEFAULT_WRITES_PER_HOUR = 500 # コンテンツを作成するリクエストの1時間あたりの上限（セカンダリレートリミット）
+
+class BulkIssueOperations:
+    """
+    1つのリポジトリのIssueに対する一括操作
+
+    結果は対象ごとの dict（'target', 'ok', 'status', 'number', 'error'）のリストで、入力と同じ順に返します。
+    """
+
+    def __init__(self, client, repo, workers=4, writes_per_second=DEFAULT_WRITES_PER_SECOND,
+                 writes_per_hour=DEFAULT_WRITES_PER_HOUR):
+        """
+        Args:
+            client (GitHubClient): APIの呼び出しに使うクライアント（読み込みの送信ペースはこのクライアントが調整する）
+            repo (str): 対象のリポジトリ（owner/name）
+            workers (int): 並行して処理する対象の数
+            writes_per_second (float): 書き込みリクエストの1秒あたりの上限
+            writes_per_hour (int): 書き込みリクエストの1時間あたりの上限。Noneの場合は制限しない
+        """
+        self.client = client
+        self.repo = repo
+        self.workers = workers
+        # 1秒ごとの間隔と1時間あたりの件数をそれぞれトークンバケットで管理する
+        self.write_schedulers = [RateLimitScheduler(rate=writes_per_second, burst=1, reserve=0)]
+        if writes_per_hour:
+            self.write_schedulers.append(RateLimitScheduler(rate=writes_per_hour / 3600, burst=writes_per_hour, reserve=0))
+
+    def _write(self, method, path, body):
+        """書き込みリクエストを間隔を空けて送信する"""
+        for scheduler in self.write_schedulers:
+            scheduler.acquire()
+        response = self.client.request(method, f"/repos/{self.repo}/{path}", json_body=body)
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            # 再試行済みでも、後続の書き込みも同じ時間だけ止める
+            try:
+                self.write_schedulers[0].pause_for(float(retry_after))
+            except ValueError:
+                pass
+        return response
+
+    def _result(self, target, response, number=None):
+        ok = response.status_code < 300
+        error = None
+        if not ok:
+            try:
+                error = response.json().get("message")
+            except ValueError:
+                error = response.text[:200]
+        if ok and number is None:
+            number = response.json().get("number")
+        return {"target": target, "ok": ok, "status": response.status_code, "number": number, "error": error}
+
+    def _run(self, items, operation):
+        """
+        items の各要素に operation を適用し、結果を入力の順に返す
+
+        未完了の処理はワーカーあたり4件までに抑えるため、items にはジェネレーター（一覧や検索結果）も渡せます。
+        """
+        results = {}
+        items = enumerate(items)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = {}
+            while True:
+                for index, item in items:
+                    pending[executor.submit(operation, item)] = (index, item)
+                    if len(pending) >= self.workers * 4:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, item = pending.pop(future)
+                    try:
+                        results[index] = future.result()
+                    except Exception as e:
+                        # 1件の失敗で残りの対象の処理を止めず、その対象の失敗として記録する
+                        error = str(e) if isinstance(e, requests.exceptions.RequestException) else f"{type(e).__name__}: {e}"
+                        results[index] = {"target": item, "ok": False, "status": None, "number": None, "error": error}
+        return [results[index] for index in sorted(results)]
+
+    # --- 一覧・検索 ---
+
+    def iter_issues(self, state="open", labels=None):
+        """
+        Issueを per_page=100 で1ページずつ取得しながら返す（プルリクエストは除く）
+
+        Args:
+            state (str): 'open', 'closed', 'all'
+            labels (list): 指定した場合、すべてのラベルを持つIssueのみ
+        """
+        params = {"state": state}
+        if labels:
+            params["labels"] = ",".join(labels)
+        for issue in self.client.iter_pages(f"/repos/{self.repo}/issues", params):
+            if "pull_request" not in issue:
+                yield issue
+
+    def search_issues(self, query):
+        """
+        検索クエリ（例: '"タイトル" in:title is:open'）に一致するこのリポジトリのIssueを返す
+
+        検索APIは1つのクエリで最大1000件まで返します。
+        """
+        q = f"repo:{self.repo} is:issue {query}"
+        yield from self.client.iter_pages("/search/issues", {"q": q})
+
+    # --- 一括操作 ---
+
+    def create_issues(self, issues):
+        """
+        Issueをまとめて作成する
+
+        Args:
+            issues (iterable): 'title' と、必要に応じて 'body', 'labels', 'assignees' を含む dict の列
+        """
+        def create(issue):
+            return self._result(issue["title"], self._write("POST", "issues", issue))
+        return self._run(issues, create)
+
+    def comment_issues(self, numbers, body):
+        """複数のIssueに同じコメントを追加する"""
+        def comment(number):
+            return self._result(number, self._write("POST", f"issues/{number}/comments", {"body": body}), number)
+        return self._run(numbers, comment)
+
+    def label_issues(self, numbers, labels):
+        """複数のIssueにラベルを追加する（既存のラベルは残す）"""
+        def label(number):
+            return self._result(number, self._write("POST", f"issues/{number}/labels", {"labels": list(labels)}), number)
+        return self._run(numbers, label)
+
+    def close_issues(self, numbers, comment=None, state_reason="completed"):
+        """
+        複数のIssueをクローズする
+
+        Args:
+            numbers (iterable): Issue番号の列
+            comment (str): 指定した場合、クローズする前にコメントを追加する
+            state_reason (str): 'completed' または 'not_planned'
+        """
+        def close(number):
+            if comment:
+                response = self._write("POST", f"issues/{number}/comments", {"body": comment})
+                if response.status_code >= 300:
+                    return self._result(number, response, number)
+            response = self._write("PATCH", f"issues/{number}", {"state": "closed", "state_reason": state_reason})
+            return self._result(number, response, number)
+        return self._run(numbers, close)
+
+    def close_issues_matching(self, query, comment=None, state_reason="completed", where=None):
+        """
+        検索クエリに一致するオープンなIssueをクローズする
+
+        クローズしたIssueは検索結果から外れ、後のページがずれるため、Issue番号をすべて取得してからクローズします。
+        検索は完全一致ではない（"タイトル" in:title はタイトルを含む長いタイトルにも一致する）ため、
+        条件を厳密にする場合は where で検索結果を絞り込みます。
+
+        Args:
+            query (str): 検索クエリ
+            comment (str): 指定した場合、クローズする前にコメントを追加する
+            state_reason (str): 'completed' または 'not_planned'
+            where (callable): 指定した場合、検索結果のIssue（dict）を受け取り、Trueを返したものだけをクローズする
+        """
+        numbers = [issue["number"] for issue in self.search_issues(f"is:open {query}") if where is None or where(issue)]
+        return self.close_issues(numbers, comment, state_reason)
+
+def print_report(results):
+    """一括操作の結果を集計して表示する（失敗したものは個別に表示する）"""
+    succeeded = sum(1 for result in results if result["ok"])
+    print(f"成功: {succeeded}件, 失敗: {len(results) - succeeded}件")
+    for result in results:
+        if not result["ok"]:
+            print(f"- {result['target']}: {result['status']} {result['error']}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Issueをまとめて操作する")
+    parser.add_argument("repo", help="対象のリポジトリ（owner/name）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    comment_parser = subparsers.add_parser("comment", help="複数のIssueにコメントを追加する")
+    comment_parser.add_argument("numbers", type=int, nargs="+")
+    comment_parser.add_argument("--body", required=True)
+    label_parser = subparsers.add_parser("label", help="複数のIssueにラベルを追加する")
+    label_parser.add_argument("numbers", type=int, nargs="+")
+    label_parser.add_argument("--labels", nargs="+", required=True)
+    close_parser = subparsers.add_parser("close", help="複数のIssueをクローズする")
+    close_parser.add_argument("numbers", type=int, nargs="+")
+    close_parser.add_argument("--comment")
+    matching_parser = subparsers.add_parser("close-matching", help="検索クエリに一致するIssueをクローズする")
+    matching_parser.add_argument("query")
+    matching_parser.add_argument("--comment")
+    matching_parser.add_argument("--title", help="指定した場合、タイトルがこの文字列と完全に一致するIssueだけをクローズする")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--writes-per-second", type=float, default=DEFAULT_WRITES_PER_SECOND)
+    args = parser.parse_args()
+
+    client = GitHubClient(token=os.environ.get("GITHUB_TOKEN"), cache_dir=None)
+    bulk = BulkIssueOperations(client, args.repo, args.workers, args.writes_per_second)
+    if args.command == "comment":
+        report = bulk.comment_issues(args.numbers, args.body)
+    elif args.command == "label":
+        report = bulk.label_issues(args.numbers, args.labels)
+    elif args.command == "close":
+        report = bulk.close_issues(args.numbers, args.comment)
+    else:
+        where = (lambda issue: issue["title"] == args.title) if args.title is not None else None
+        report = bulk.close_issues_matching(args.query, args.comment, where=where)
+    print_report(report)
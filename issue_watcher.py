@@ -0,0 +1,241 @@
+# このスクリプトは、複数のIssueへの新しいコメントを少ないAPI呼び出しで監視するウォッチャーを提供します。
+# Issueごとにコメントを全件取得する代わりに、リポジトリ単位のコメント一覧
+# （GET /repos/{owner}/{repo}/issues/comments）を since パラメーター付きで取得し、前回以降に更新された
+# コメントだけを受け取ります。新しいコメントがなければ、ETagによる条件付きリクエストで304が返り、
+# クォータを消費しません。リポジトリごとのポーリングは asyncio のタスクとして並行して実行し、
+# 送信ペースは GitHubClient の RateLimitScheduler がすべてのリポジトリで共有して調整します。
+# リポジトリごとのカーソル（since・最後に通知したコメントID・ETag）はJSONファイルに保存され、再起動後も続きから監視します。
+#
+# 使い方:
+#   python issue_watcher.py owner/repo#12 owner/repo#15 other/repo#3 --interval 60
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import re
+import time
+
+from github_client import GitHubClient
+
+STATE_VERSION = 1
+DEFAULT_STATE_PATH = "issue_watch_state.json"
+PER_PAGE = 100
+
+_ISSUE_RE = re.compile(r"^([\w.-]+/[\w.-]+)#(\d+)$")
+
+def _utc_now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+def parse_issue_ref(ref):
+    """"owner/repo#12" を ("owner/repo", 12) に変換する"""
+    match = _ISSUE_RE.match(ref)
+    if not match:
+        raise ValueError(f"Issueの指定は owner/repo#番号 の形式にしてください: {ref}")
+    return match.group(1), int(match.group(2))
+
+class IssueCommentWatcher:
+    """
+    複数のIssueの新しいコメントを監視するウォッチャー
+
+    新しいコメント（前回通知したものよりIDが大きいコメント）ごとに on_comment(repo, issue_number, comment) を
+    呼び出します。編集されただけの既存コメントは通知しません。ignore_users のユーザー（自動返信するBot自身など）の
+    コメントも通知しません。
+    """
+
+    def __init__(self, client, state_path=DEFAULT_STATE_PATH, poll_interval=60.0, max_pages=3, ignore_users=()):
+        """
+        Args:
+            client (GitHubClient): APIの呼び出しに使うクライアント（送信ペースはこのクライアントのスケジューラで共有される）
+            state_path (str): カーソルを保存するJSONファイルのパス。Noneの場合は保存しない
+            poll_interval (float): リポジトリごとのポーリング間隔（秒）
+            max_pages (int): 1回のポーリングで取得する最大ページ数。poll_interval と合わせて
+                             リポジトリあたりのリクエスト数の上限（max_pages * 3600 / poll_interval 回/時）になる
+            ignore_users (iterable): 通知しないコメントの投稿者（ログイン名）
+        """
+        self.client = client
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.max_pages = max_pages
+        self.ignore_users = set(ignore_users)
+        self.issues = {} # リポジトリ -> 監視するIssue番号の集合
+        self.cursors = {} # リポジトリ -> {'since', 'last_comment_id', 'etag'}
+        self.load()
+
+    def load(self):
+        """保存済みのカーソルと監視対象を読み込む（存在しない・壊れている場合は空から始める）"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"監視状態 {self.state_path} を読み込めなかったため、最初から監視します: {e}")
+            return
+        if data.get("version") != STATE_VERSION:
+            return
+        self.cursors = data.get("cursors", {})
+        for repo, numbers in data.get("issues", {}).items():
+            self.issues.setdefault(repo, set()).update(numbers)
+
+    def save(self):
+        """カーソルと監視対象をディスクに書き込む（一時ファイル経由で置き換える）"""
+        if not self.state_path:
+            return
+        data = {
+            "version": STATE_VERSION,
+            "issues": {repo: sorted(numbers) for repo, numbers in self.issues.items()},
+            "cursors": self.cursors,
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def watch(self, repo, issue_number):
+        """
+        Issueを監視対象に追加する
+
+        初めて監視するリポジトリは、追加した時点以降のコメントから通知します。
+        """
+        self.issues.setdefault(repo, set()).add(issue_number)
+        self.cursors.setdefault(repo, {"since": _utc_now(), "last_comment_id": 0, "etag": None})
+
+    def unwatch(self, repo, issue_number):
+        """Issueを監視対象から外す（リポジトリの監視対象がなくなった場合はカーソルも削除する）"""
+        numbers = self.issues.get(repo)
+        if numbers is None:
+            return
+        numbers.discard(issue_number)
+        if not numbers:
+            del self.issues[repo]
+            self.cursors.pop(repo, None)
+
+    def _fetch_new_comments(self, repo):
+        """
+        リポジトリのコメント一覧を since 以降について取得し、監視対象のIssueへの新しいコメントを返す（同期処理）
+
+        カーソルは更新せず、すべてのコメントを通知した後のカーソルを返します。
+
+        Returns:
+            tuple: ([(Issue番号, コメント)]（コメントID順）, 通知後のカーソル)
+        """
+        cursor = self.cursors[repo]
+        params = {"since": cursor["since"], "sort": "updated", "direction": "asc", "per_page": PER_PAGE}
+        watched = self.issues.get(repo, set())
+        new_comments = []
+        since = cursor["since"]
+        last_id = cursor["last_comment_id"]
+        etag = cursor.get("etag")
+        for page in range(1, self.max_pages + 1):
+            # 条件付きリクエストは1ページ目のみ（since が変わらない限りURLも同じ）
+            headers = {"If-None-Match": cursor["etag"]} if page == 1 and cursor.get("etag") else None
+            response = self.client.request("GET", f"/repos/{repo}/issues/comments", dict(params, page=page), headers)
+            if response.status_code == 304:
+                break
+            response.raise_for_status()
+            if page == 1:
+                etag = response.headers.get("ETag")
+            for comment in response.json():
+                since = max(since, comment["updated_at"])
+                if comment["id"] <= cursor["last_comment_id"]:
+                    continue # 通知済みのコメントが編集されたもの
+                last_id = max(last_id, comment["id"])
+                issue_number = int(comment["issue_url"].rsplit("/", 1)[-1])
+                if issue_number in watched and (comment.get("user") or {}).get("login") not in self.ignore_users:
+                    new_comments.append((issue_number, comment))
+            if "next" not in response.links:
+                break
+        if since != cursor["since"]:
+            # since が変わるとURLも変わるため、前回のETagは使えない
+            etag = None
+        new_comments.sort(key=lambda item: item[1]["id"])
+        return new_comments, {"since": since, "last_comment_id": last_id, "etag": etag}
+
+    async def poll_repo(self, repo, on_comment):
+        """
+        リポジトリを1回ポーリングし、新しいコメントごとに on_comment を呼び出す
+
+        on_comment はコルーチン関数でも通常の関数でもかまいません。通常の関数は、ブロックする処理（HTTPリクエストなど）で
+        ほかのリポジトリのポーリングを止めないよう、asyncio.to_thread で別スレッドから呼び出します。
+        カーソルは on_comment が成功したコメントまで1件ずつ進めるため、on_comment が例外を送出した場合は
+        そのコメントから次回のポーリングで通知し直します（例外は呼び出し元に送出されます）。
+
+        Returns:
+            int: 通知したコメント数
+        """
+        before = self.cursors[repo]
+        new_comments, after = await asyncio.to_thread(self._fetch_new_comments, repo)
+        try:
+            for issue_number, comment in new_comments:
+                if inspect.iscoroutinefunction(on_comment):
+                    result = on_comment(repo, issue_number, comment)
+                else:
+                    result = await asyncio.to_thread(on_comment, repo, issue_number, comment)
+                if inspect.isawaitable(result):
+                    await result
+                # since は前回のままにして、通知できなかったコメントが次回も取得されるようにする
+                self.cursors[repo] = {"since": before["since"], "etag": None,
+                                      "last_comment_id": max(before["last_comment_id"], comment["id"])}
+            self.cursors[repo] = after
+        finally:
+            if self.cursors[repo] != before:
+                self.save()
+        return len(new_comments)
+
+    async def _watch_repo(self, repo, on_comment, stop):
+        while not stop.is_set() and repo in self.issues:
+            started = time.monotonic()
+            try:
+                await self.poll_repo(repo, on_comment)
+            except Exception as e:
+                print(f"{repo} のコメントを取得できませんでした: {e}")
+            wait = max(0.0, self.poll_interval - (time.monotonic() - started))
+            try:
+                await asyncio.wait_for(stop.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, on_comment, stop=None):
+        """
+        監視対象のリポジトリごとにポーリングのタスクを起動し、stop がセットされるまで監視する
+
+        Args:
+            on_comment (callable): on_comment(repo, issue_number, comment)。新しいコメントごとに呼び出される
+            stop (asyncio.Event): 監視を終了するためのイベント。Noneの場合はキャンセルされるまで監視を続ける
+        """
+        stop = stop or asyncio.Event()
+        try:
+            await asyncio.gather(*(self._watch_repo(repo, on_comment, stop) for repo in list(self.issues)))
+        finally:
+            self.save()
+
+def _print_comment(repo, issue_number, comment):
+    login = (comment.get("user") or {}).get("login")
+    body = comment.get("body", "").strip().replace("\n", " ")
+    print(f"{repo}#{issue_number} {login}: {body[:80]}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="複数のIssueの新しいコメントを監視する")
+    parser.add_argument("issues", nargs="*", help="監視するIssue（owner/repo#番号）。省略時は保存済みの監視対象")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="カーソルを保存するJSONファイル")
+    parser.add_argument("--interval", type=float, default=60.0, help="リポジトリごとのポーリング間隔（秒）")
+    parser.add_argument("--max-pages", type=int, default=3, help="1回のポーリングで取得する最大ページ数")
+    args = parser.parse_args()
+
+    client = GitHubClient(token=os.environ.get("GITHUB_TOKEN"), cache_dir=None)
+    watcher = IssueCommentWatcher(client, args.state, args.interval, args.max_pages)
+    for ref in args.issues:
+        try:
+            watcher.watch(*parse_issue_ref(ref))
+        except ValueError as e:
+            parser.error(str(e))
+    if not watcher.issues:
+        parser.error("監視するIssueがありません")
+    watcher.save()
+    print(f"{sum(len(n) for n in watcher.issues.values())} 件のIssue（{len(watcher.issues)} リポジトリ）を監視します。Ctrl+Cで終了します")
+    try:
+        asyncio.run(watcher.run(_print_comment))
+    except KeyboardInterrupt:
+        pass
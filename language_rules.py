@@ -0,0 +1,248 @@
+# このスクリプトは、ワークフローの主要言語を推測するための宣言的なルール表と、それをコンパイルしたマッチャーを提供します。
+# ルールは (言語, 対象, パターン, 重み) の組で、対象は `uses` アクションか `run` コマンドです。
+# ルール表は、従来のif/elifチェーンと同じ順で部分文字列を検索する1つの関数（ステップの走査・照合・スコアの集計を含む）に
+# コンパイルされます。コンパイル時に、先のルールに必ず一致するため到達しないルールを除き、各キーワードの検索の前に
+# run の文字列に含まれないことの多い1文字の検索（ガード）を置いて、含まれない場合はキーワードの検索を省略します。
+# 同じ文字列のステップは多くのファイルで繰り返し現れるため、照合結果はキャッシュします。
+# 主要言語の判定は従来のif/elifチェーンと同じ結果になり、それに加えて言語ごとの重みの合計による順位を求めます。
+# 言語を追加する場合は LANGUAGE_RULES に行を追加するだけで済みます（言語を特定できないファイルは削除されるため、
+# 行の追加はどのファイルが削除されるかを変えることに注意してください）。
+
+from itertools import compress
+from operator import itemgetter
+import struct
+
+# (言語, 対象, パターン, 重み)
+# パターンは小文字にした `uses` / `run` の文字列に含まれる部分文字列で、タプルの場合はすべてを含むときに一致します。
+# ステップごとに対象が同じルールを上から順に照合し、最初に一致したルールだけを使います（従来のif/elifチェーンと同じ）。
+# 言語がNoneのルールは、一致しても言語を変えずに以降のルールの照合を止めます。
+LANGUAGE_RULES = [
+    ("Python", "uses", "setup-python", 3),
+    ("Node.js", "uses", "setup-node", 3),
+    ("Java", "uses", "setup-java", 3),
+    ("Go", "uses", "setup-go", 3),
+    # checkoutアクション自体は言語を特定しないが、その後のステップで言語が特定されることが多い
+    (None, "uses", "actions/checkout", 0),
+    ("Docker/Container", "uses", "docker/build-push-action", 3),
+    ("Ruby", "uses", "ruby/setup-ruby", 3),
+    ("PHP", "uses", "php/setup-php", 3),
+
+    ("Python", "run", ("python", "pip"), 2),
+    ("Node.js", "run", "npm", 2),
+    ("Node.js", "run", "node", 2),
+    ("Java", "run", "java", 2),
+    ("Java", "run", "maven", 2),
+    ("Java", "run", "gradle", 2),
+    ("Go", "run", "go build", 2),
+    ("Go", "run", "go run", 2),
+    ("Ruby", "run", "bundle install", 2),
+    ("Ruby", "run", "rake", 2),
+    ("PHP", "run", "composer install", 2),
+    ("C#", "run", "dotnet", 2),
+    ("Rust", "run", "cargo build", 2),
+]
+
+TARGETS = ("uses", "run")
+# 照合結果をキャッシュする文字列の最大の長さ（これより長いスクリプトはほとんど繰り返し現れない）
+CACHE_MAX_LENGTH = 4096
+# 対象ごとのガードに使う文字（サンプルのデータセットで、1回しか現れないrunステップの文字列に含まれないことの多い順）。
+# 長い文字列では1文字の検索はキーワードの検索より数倍速いため、キーワードに含まれる最初の文字を使う。
+# usesの文字列は短く、検索の速さがほとんど変わらないため、ガードを使わない
+GUARD_CHARS = {"run": "zqjwx_kvy/fbh.gdm"}
+
+# スコアの整数で1つの言語に使うビット数（1つの言語のスコアは 2**SCORE_BITS 未満でなければならない）
+SCORE_BITS = 32
+_SCORE_MASK = (1 << SCORE_BITS) - 1
+
+def _reachable(rules):
+    """先のルールに必ず一致するルール（キーワードがすべて、先のルールのキーワードを含むもの）を除く"""
+    kept = []
+    for keywords, language, weight in rules:
+        shadowed = any(all(any(earlier in keyword for keyword in keywords) for earlier in earlier_keywords)
+                       for earlier_keywords, _, _ in kept)
+        if not shadowed:
+            kept.append((keywords, language, weight))
+    return kept
+
+def _chain_source(target, rules, hits, unmatched, indent):
+    """
+    小文字にした text に最初に一致したルールの照合結果の定数名を hit に代入するif/elifチェーンのソースを返す
+
+    ガードの結果は、ルールの最初の検索で求めた場合だけ変数に代入し、以降のルールで再利用します
+    （ほかの位置では評価されないことがあるため）。
+
+    Args:
+        hits (dict): (言語, 重み) -> 照合結果の定数名
+        unmatched (str): 言語を特定できない場合に代入する値のソース
+
+    Returns:
+        list: ソースの行のリスト
+    """
+    assigned = set()
+    lines = []
+    for i, (keywords, language, weight) in enumerate(_reachable(rules)):
+        tests = []
+        for keyword in keywords:
+            guard = next((char for char in GUARD_CHARS.get(target, "") if char in keyword), None)
+            if guard is not None:
+                name = f"has_{ord(guard)}"
+                if name in assigned:
+                    tests.append(name)
+                elif not tests:
+                    tests.append(f"({name} := {guard!r} in text)")
+                    assigned.add(name)
+                else:
+                    tests.append(f"{guard!r} in text")
+            tests.append(f"{keyword!r} in text")
+        lines.append(f"{'if' if i == 0 else 'elif'} {' and '.join(tests)}:")
+        lines.append(f"    hit = {hits[language, weight] if language is not None else unmatched}")
+    if lines:
+        lines += ["else:", f"    hit = {unmatched}"]
+    else:
+        lines = [f"hit = {unmatched}"]
+    return [indent + line for line in lines]
+
+class LanguageMatcher:
+    """
+    LANGUAGE_RULES をコンパイルしたマッチャー
+
+    ルール表から、ステップを走査して照合とスコアの集計を行う関数のソースを生成してコンパイルします。
+    スコアは言語ごとに SCORE_BITS ビットの欄を持つ1つの整数に集計し、照合結果はその言語の欄に重みを置いた整数にします
+    （ステップごとの集計は整数の加算だけになります）。言語が2つ以上の場合の順位は、スコアの整数ごとにキャッシュします。
+    同じ文字列のステップは何度も現れるため、CACHE_MAX_LENGTH 以下の文字列の照合結果はキャッシュします。
+    """
+
+    def __init__(self, rules=LANGUAGE_RULES, cache_size=65536):
+        """
+        Args:
+            rules (list): (言語, 対象, パターン, 重み) のルール表
+            cache_size (int): 対象ごとのキャッシュの最大件数（超えた場合は空にする）。0の場合はキャッシュしない
+        """
+        self.cache_size = cache_size
+        grouped = {target: [] for target in TARGETS}
+        for language, target, pattern, weight in rules:
+            if target not in grouped:
+                raise ValueError(f"不明なルールの対象です: {target}")
+            # 照合結果の0は言語を特定できなかったことを表すため、重みは正の数に限る
+            if language is not None and not 0 < weight <= _SCORE_MASK:
+                raise ValueError(f"ルールの重みは1以上 {_SCORE_MASK} 以下にしてください: {language} {pattern!r}")
+            keywords = (pattern,) if isinstance(pattern, str) else tuple(pattern)
+            grouped[target].append((tuple(keyword.lower() for keyword in keywords), language, weight))
+        self._keywords = {target: sorted({keyword for keywords, _, _ in target_rules for keyword in keywords})
+                          for target, target_rules in grouped.items()}
+        # 順位の同点は、ルール表で先に現れる言語を先にする
+        self._languages = list(dict.fromkeys(language for language, _, _, _ in rules if language is not None))
+        # スコアの整数を言語ごとのスコアに分ける（欄は SCORE_BITS = 32 ビットの符号なし整数）
+        self._scores = struct.Struct(f"<{len(self._languages)}I")
+        self._rankings = {}
+        namespace = {"_SCORE_MASK": _SCORE_MASK, "_rank": self._rank, "_HIT_LANGUAGES": {}}
+        # 照合結果の定数。classify は言語の欄に重みを置いた整数（言語を特定できない場合は0）、match_<対象> は (言語, 重み) を使う
+        hits = {}
+        for language, _, _, weight in rules:
+            if language is not None and (language, weight) not in hits:
+                name = hits[language, weight] = f"_HIT{len(hits)}"
+                shift = SCORE_BITS * self._languages.index(language)
+                namespace[name] = weight << shift
+                namespace[name + "_NAMED"] = (language, weight)
+                namespace["_HIT_LANGUAGES"][weight << shift] = (language, shift)
+        self._caches = {target: {} for target in TARGETS}
+        for target in TARGETS:
+            namespace[f"{target}_cache"] = self._caches[target]
+            namespace[f"{target}_get"] = self._caches[target].get
+        exec(compile(self._source(grouped, hits), f"<language_rules:{id(self):x}>", "exec"), namespace)
+        self._classify = namespace["classify"]
+        self._matchers = {target: namespace[f"match_{target}"] for target in TARGETS}
+
+    def _source(self, grouped, hits):
+        """classify と match_<対象> 関数のソースを生成する"""
+        lines = [
+            "def classify(steps):",
+            "    total = last = 0",
+            "    for step in steps:",
+        ]
+        for n, target in enumerate(TARGETS):
+            chain = _chain_source(target, grouped[target], hits, "0", " " * 16 if self.cache_size else " " * 12)
+            lines += [
+                f"        {'if' if n == 0 else 'elif'} {target!r} in step:",
+                f"            raw = step[{target!r}]",
+            ]
+            if not self.cache_size:
+                lines += ["            text = raw.lower()"] + chain
+                continue
+            lines += [
+                "            try:",
+                f"                hit = {target}_get(raw)",
+                "            except TypeError:",
+                "                # 文字列以外の値は、従来のチェーンと同じく次の lower() で AttributeError になる",
+                "                hit = None",
+                "            if hit is None:",
+                "                text = raw.lower()",
+            ] + chain + [
+                f"                if len(raw) <= {CACHE_MAX_LENGTH}:",
+                f"                    if len({target}_cache) >= {self.cache_size}:",
+                f"                        {target}_cache.clear()",
+                f"                    {target}_cache[raw] = hit",
+            ]
+        lines += [
+            "        else:",
+            "            continue",
+            "        if hit:",
+            "            total += hit",
+            "            last = hit",
+            "    if not total:",
+            "        return None, []",
+            "    language, shift = _HIT_LANGUAGES[last]",
+            # ほとんどのワークフローは言語が1つ（スコアの整数が主要言語の欄だけ）なので、順位を求めずに返す
+            "    score = total >> shift",
+            "    if score <= _SCORE_MASK and score << shift == total:",
+            "        return language, [(language, score)]",
+            "    return language, _rank(total)",
+        ]
+        named = {key: name + "_NAMED" for key, name in hits.items()}
+        for target in TARGETS:
+            chain = _chain_source(target, grouped[target], named, "None", " " * 4)
+            lines += [f"def match_{target}(raw):", "    text = raw.lower()"] + chain + ["    return hit"]
+        return "\n".join(lines) + "\n"
+
+    def _rank(self, total):
+        """スコアの整数から [(言語, スコア), ...]（スコアの高い順）を求める"""
+        ranking = self._rankings.get(total)
+        if ranking is None:
+            scores = self._scores.unpack(total.to_bytes(self._scores.size, "little"))
+            # sorted は reverse=True でも同点の順序（ルール表の順）を保つ
+            ranking = tuple(sorted(compress(zip(self._languages, scores), scores), key=itemgetter(1), reverse=True))
+            if self.cache_size:
+                if len(self._rankings) >= self.cache_size:
+                    self._rankings.clear()
+                self._rankings[total] = ranking
+        return list(ranking)
+
+    def match_uses(self, action):
+        """usesアクションに最初に一致したルールの (言語, 重み)。言語を特定できない場合は None"""
+        return self._matchers["uses"](action)
+
+    def match_run(self, command):
+        """runコマンドに最初に一致したルールの (言語, 重み)。言語を特定できない場合は None"""
+        return self._matchers["run"](command)
+
+    def classify(self, steps):
+        """
+        ステップの一覧から主要言語と、言語ごとのスコアの順位を求める
+
+        主要言語は、言語を特定できた最後のステップの言語です（従来のif/elifチェーンと同じ判定）。
+        スコアは各ステップで一致したルールの重みの合計です。
+
+        Args:
+            steps (iterable): ステップの定義（dict）の列
+
+        Returns:
+            tuple: (主要言語 または None, [(言語, スコア), ...]（スコアの高い順、同点はルール表で先に現れる言語が先）)
+        """
+        return self._classify(steps)
+
+    def run_labels(self, command):
+        """runコマンドに含まれるパターンのキーワードの一覧を返す"""
+        text = command.lower()
+        return [keyword for keyword in self._keywords["run"] if keyword in text]
+
+DEFAULT_MATCHER = LanguageMatcher()
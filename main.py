@@ -1,3 +1,22 @@
+from array import array
+from itertools import islice, zip_longest
+import math
+import operator
+
+try:
+    import numpy as np
+except ImportError: # Without NumPy the batch functions fall back to a plain Python loop
+    np = None
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+ZERO_MODES = ("raise", "nan", "mask")
+
+# Python ints are exact, so int64 is only used when no intermediate result can overflow
+# (and true division only when both operands convert to float exactly).
+_INT64_LIMIT = 1 << 63
+_FLOAT_EXACT_LIMIT = 1 << 53
+_NUMERIC_TYPECODES = "bBhHiIlLqQfd"
+
 def add(a, b):
     """Add two numbers."""
     return a + b
@@ -15,3 +34,202 @@ def divide(a, b):
     if b == 0:
         raise ValueError("Cannot divide by zero.")
     return a / b
+
+def _is_scalar(value):
+    return not hasattr(value, "__len__") or isinstance(value, (str, bytes))
+
+def _as_python_array(values):
+    """
+    Convert a non-NumPy operand to an ndarray whose arithmetic matches Python's.
+
+    Returns None when the values need Python semantics NumPy cannot reproduce
+    (ints mixed with floats keep int results, ints outside int64, other types).
+    """
+    if _is_scalar(values):
+        if type(values) not in (int, bool, float) or (type(values) is int and not -_INT64_LIMIT <= values < _INT64_LIMIT):
+            return None
+        return np.asarray(values, dtype=np.float64 if type(values) is float else np.int64)
+    if not isinstance(values, array):
+        # array('q') only accepts ints (and bools) within int64, which is exactly the int case
+        try:
+            values = array('q', values)
+        except (TypeError, OverflowError):
+            if not values or set(map(type, values)) != {float}:
+                return None
+            values = array('d', values)
+    if values.typecode not in _NUMERIC_TYPECODES:
+        return None
+    converted = np.frombuffer(values, dtype=values.typecode)
+    if converted.dtype.kind == "f":
+        return converted.astype(np.float64, copy=False)
+    if converted.dtype.kind == "u" and converted.size and int(converted.max()) >= _INT64_LIMIT:
+        return None
+    return converted.astype(np.int64, copy=False)
+
+def _magnitude(values):
+    if values.size == 0:
+        return 0
+    return max(abs(int(values.min())), abs(int(values.max())))
+
+def _int64_safe(op, a, b):
+    """Whether op on the int64 arrays a and b gives the same result as on Python ints."""
+    if a.dtype.kind == "f" or b.dtype.kind == "f":
+        return True
+    a_max, b_max = _magnitude(a), _magnitude(b)
+    if op is operator.truediv:
+        return a_max <= _FLOAT_EXACT_LIMIT and b_max <= _FLOAT_EXACT_LIMIT
+    if op is operator.mul:
+        return a_max * b_max < _INT64_LIMIT
+    return a_max + b_max < _INT64_LIMIT
+
+def _check_lengths(a, b):
+    if not _is_scalar(a) and not _is_scalar(b) and len(a) != len(b):
+        raise ValueError(f"Operands have different lengths: {len(a)} and {len(b)}.")
+
+def _python_batch(op, a, b, zero):
+    """Apply op element by element (the reference semantics, used when NumPy cannot match them)."""
+    a_values = [a] * len(b) if _is_scalar(a) else a
+    b_values = [b] * len(a_values) if _is_scalar(b) else b
+    if zero == "raise" and any(y == 0 for y in b_values):
+        raise ValueError("Cannot divide by zero.")
+    if zero in (None, "raise"):
+        return [op(x, y) for x, y in zip(a_values, b_values)]
+    fill = math.nan if zero == "nan" else None
+    return [fill if y == 0 else op(x, y) for x, y in zip(a_values, b_values)]
+
+def _to_output(result, template):
+    """Return the result as the same kind of container as the (first non-scalar) input."""
+    if isinstance(template, array):
+        typecode = "d" if result.dtype.kind == "f" else "q"
+        return array(typecode, result.astype(typecode, copy=False).tobytes())
+    return result.tolist()
+
+def _batch(op, a, b, zero=None):
+    """
+    Apply op to every pair of elements of a and b in one vectorized pass.
+
+    Either operand may be a scalar, which is broadcast against the other.
+    zero is only used by division (see divide_batch).
+    """
+    if _is_scalar(a) and _is_scalar(b):
+        raise TypeError("At least one operand must be a sequence, array.array or NumPy array.")
+    _check_lengths(a, b)
+    if np is None:
+        return _python_batch(op, a, b, zero)
+
+    # NumPy inputs keep NumPy semantics, which are also what the scalar functions do with their elements
+    numpy_input = isinstance(a, np.ndarray) or isinstance(b, np.ndarray)
+    if numpy_input:
+        a_array, b_array = np.asarray(a), np.asarray(b)
+    else:
+        a_array, b_array = _as_python_array(a), _as_python_array(b)
+        if a_array is None or b_array is None or not _int64_safe(op, a_array, b_array):
+            return _python_batch(op, a, b, zero)
+    zeros = None
+    if zero is not None:
+        zeros = b_array == 0
+        if zero == "raise":
+            if zeros.any():
+                raise ValueError("Cannot divide by zero.")
+            zeros = None
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        result = op(a_array, b_array)
+    if zeros is not None:
+        zeros = np.broadcast_to(zeros, result.shape)
+        if zero == "mask" and not numpy_input:
+            # Masked entries become None, so the result is always a list
+            return [None if masked else value for value, masked in zip(result.tolist(), zeros.tolist())]
+        if zero == "mask":
+            return np.ma.masked_array(result, mask=zeros)
+        result = np.where(zeros, np.nan, result)
+    return result if numpy_input else _to_output(result, b if _is_scalar(a) else a)
+
+def add_batch(a, b):
+    """
+    Add two sequences element-wise.
+
+    Accepts lists, array.array, NumPy arrays or a scalar for either operand.
+    Each element equals add(a[i], b[i]). NumPy inputs return an ndarray,
+    array.array inputs an array.array and anything else a list.
+    """
+    return _batch(operator.add, a, b)
+
+def subtract_batch(a, b):
+    """Subtract two sequences element-wise (see add_batch)."""
+    return _batch(operator.sub, a, b)
+
+def multiply_batch(a, b):
+    """Multiply two sequences element-wise (see add_batch)."""
+    return _batch(operator.mul, a, b)
+
+def divide_batch(a, b, zero="raise"):
+    """
+    Divide two sequences element-wise (see add_batch).
+
+    Args:
+        zero (str): How to handle zero divisors. "raise" raises ValueError like divide()
+            before computing anything, "nan" returns NaN for those elements and
+            "mask" returns a numpy.ma.MaskedArray for NumPy inputs and None
+            for those elements otherwise.
+    """
+    if zero not in ZERO_MODES:
+        raise ValueError(f"zero must be one of {ZERO_MODES}.")
+    return _batch(operator.truediv, a, b, zero)
+
+def _is_iterable(value):
+    return hasattr(value, "__iter__") and not isinstance(value, (str, bytes))
+
+def _iter_chunks(values, chunk_size):
+    """Yield slices of values, or pull chunks from an iterator so it is never fully loaded."""
+    if not _is_iterable(values):
+        while True:
+            yield values
+    if hasattr(values, "__getitem__"):
+        for start in range(0, len(values), chunk_size):
+            yield values[start:start + chunk_size]
+        return
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _chunks(op, a, b, chunk_size, zero=None):
+    if not _is_iterable(a) and not _is_iterable(b):
+        raise TypeError("At least one operand must be iterable.")
+    chunks = (_iter_chunks(a, chunk_size), _iter_chunks(b, chunk_size))
+    # A scalar operand repeats forever, so only two iterables are checked for running out at different times
+    pairs = zip_longest(*chunks) if _is_iterable(a) and _is_iterable(b) else zip(*chunks)
+    for a_chunk, b_chunk in pairs:
+        if a_chunk is None or b_chunk is None:
+            raise ValueError("Operands have different lengths.")
+        yield _batch(op, a_chunk, b_chunk, zero)
+
+def add_chunks(a, b, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Add two iterables chunk by chunk, yielding the add_batch result of each chunk.
+
+    Iterators (e.g. values read from a file) are consumed chunk_size elements at a time
+    and sliceable inputs (lists, arrays, numpy.memmap) are sliced, so inputs larger
+    than memory can be processed.
+    """
+    return _chunks(operator.add, a, b, chunk_size)
+
+def subtract_chunks(a, b, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Subtract two iterables chunk by chunk (see add_chunks)."""
+    return _chunks(operator.sub, a, b, chunk_size)
+
+def multiply_chunks(a, b, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Multiply two iterables chunk by chunk (see add_chunks)."""
+    return _chunks(operator.mul, a, b, chunk_size)
+
+def divide_chunks(a, b, chunk_size=DEFAULT_CHUNK_SIZE, zero="raise"):
+    """
+    Divide two iterables chunk by chunk (see add_chunks and divide_batch).
+
+    With zero="raise" the ValueError is raised when the chunk containing the zero divisor is reached.
+    """
+    if zero not in ZERO_MODES:
+        raise ValueError(f"zero must be one of {ZERO_MODES}.")
+    return _chunks(operator.truediv, a, b, chunk_size, zero)
@@ -0,0 +1,116 @@
+# このスクリプトは、GitHub APIのレートリミットに合わせてリクエストの送信ペースを調整するスケジューラを提供します。
+# レスポンスの X-RateLimit-* ヘッダーから残りクォータとリセット時刻を読み取り、
+# リセットまでの残り時間にクォータを均等に配分するトークンバケットとして動作します。
+# 複数スレッドから同時に利用できます。
+
+import threading
+import time
+
+class RateLimitScheduler:
+    """
+    GitHub APIの残りクォータに合わせてリクエストを配分するトークンバケット
+
+    acquire() で1リクエスト分のトークンを取得し、レスポンスを受け取るたびに
+    update() / update_from_headers() で残りクォータを反映します。
+    残りが reserve 以下になるとリセット時刻まで待機するため、
+    RateLimitExceededException が発生する前に送信ペースが落ちます。
+    """
+
+    def __init__(self, rate=10.0, burst=10, reserve=50, reset_margin=5.0):
+        """
+        Args:
+            rate (float): クォータ情報を受け取る前の1秒あたりのリクエスト数
+            burst (int): 連続して送信できる最大リクエスト数（バケットの容量）
+            reserve (int): 使い切らずに残しておくクォータ
+            reset_margin (float): リセット時刻まで待つ場合に追加で待つ秒数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.reset_margin = reset_margin
+        self.tokens = float(burst)
+        self.remaining = None
+        self.limit = None
+        self.reset_at = None
+        self.paused_until = 0.0
+        self.blocked_seconds = 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """1リクエスト分のトークンを取得する（取得できるまで待機する）"""
+        while True:
+            with self._lock:
+                wait = self.paused_until - time.time()
+                if wait <= 0:
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate if self.rate > 0 else 1.0
+                self.blocked_seconds += wait
+            time.sleep(wait)
+
+    def update(self, remaining, reset_at, limit=None):
+        """
+        残りクォータとリセット時刻を反映し、送信ペースを再計算する
+
+        Args:
+            remaining (int): 残りリクエスト数（X-RateLimit-Remaining）
+            reset_at (float): リセット時刻のUNIX秒（X-RateLimit-Reset）
+            limit (int): 1時間あたりの上限（X-RateLimit-Limit）
+        """
+        if remaining is None or reset_at is None or remaining < 0:
+            return
+        with self._lock:
+            self._refill()
+            self.remaining = remaining
+            self.reset_at = reset_at
+            if limit is not None:
+                self.limit = limit
+            usable = remaining - self.reserve
+            seconds_left = max(1.0, reset_at - time.time())
+            if usable <= 0:
+                self.paused_until = max(self.paused_until, reset_at + self.reset_margin)
+            else:
+                self.rate = usable / seconds_left
+                self.tokens = min(self.tokens, float(usable))
+
+    def update_from_headers(self, headers):
+        """
+        レスポンスヘッダーの X-RateLimit-Remaining / Reset / Limit を反映する
+
+        Args:
+            headers (Mapping): レスポンスヘッダー（キーの大文字・小文字は問わない）
+        """
+        if not headers:
+            return
+        lowered = {str(k).lower(): v for k, v in headers.items()}
+        try:
+            remaining = int(lowered["x-ratelimit-remaining"])
+            reset_at = float(lowered["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            remaining = reset_at = None
+        limit = lowered.get("x-ratelimit-limit")
+        self.update(remaining, reset_at, int(limit) if limit is not None else None)
+        retry_after = lowered.get("retry-after")
+        if retry_after is not None:
+            try:
+                self.pause_for(float(retry_after))
+            except ValueError:
+                pass
+
+    def pause_until(self, reset_at):
+        """指定したUNIX秒（+reset_margin）まで全リクエストを止める"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, reset_at + self.reset_margin)
+
+    def pause_for(self, seconds):
+        """現在から指定秒数のあいだ全リクエストを止める"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
@@ -1,55 +1,125 @@
+import os
+
 import requests
 
-def get_repo_info(owner, repo):
+from github_client import GitHubClient
+
+API_URL = "https://api.github.com" # ローカルのモックサーバーで計測する場合などに変更する
+
+_client = None
+
+def get_client():
+    """
+    共有のGitHubClientを返す（初回に作成し、以降は同じセッション・キャッシュを使う）
+
+    環境変数 GITHUB_TOKEN があれば認証付きで送信します。
+    """
+    global _client
+    if _client is None or _client.api_url != API_URL.rstrip("/"):
+        _client = GitHubClient(token=os.environ.get("GITHUB_TOKEN"), api_url=API_URL)
+    return _client
+
+def _split_repo(repo):
+    """"owner/name" または (owner, name) を (owner, name) に変換する"""
+    return tuple(repo.split("/", 1)) if isinstance(repo, str) else tuple(repo)
+
+def _repo_info(data):
+    return {
+        "name": data.get("name"), # リポジトリ名の取得
+        "description": data.get("description"), # リポジトリの説明の取得
+        "stars": data.get("stargazers_count"), # スターの数の取得
+        "forks": data.get("forks_count"), # フォークの数の取得
+        "latest_commit": data.get("updated_at") # 最新のコミット日時の取得
+    }
+
+def _count_yaml_files(data):
+    yaml_files = [file for file in data if file['name'].endswith('.yml') or file['name'].endswith('.yaml')]
+    return len(yaml_files)
+
+def get_repo_info(owner, repo, client=None):
     """
     Fetch repository information from GitHub API.
 
     Args:
         owner (str): GitHub username or organization name.
         repo (str): Repository name.
+        client (GitHubClient): Client to use. Defaults to the shared client (get_client()).
 
     Returns:
         dict: Repository information including stars, forks, and latest commit.
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        repo_info = {
-            "name": data.get("name"), # リポジトリ名の取得
-            "description": data.get("description"), # リポジトリの説明の取得
-            "stars": data.get("stargazers_count"), # スターの数の取得
-            "forks": data.get("forks_count"), # フォークの数の取得
-            "latest_commit": data.get("updated_at") # 最新のコミット日時の取得
-        }
-        return repo_info
+        data = (client or get_client()).get_json(f"/repos/{owner}/{repo}")
+        return _repo_info(data)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching repository information: {e}")
         return None
 
-def count_workflow_files(owner, repo):
+def count_workflow_files(owner, repo, client=None):
     """
     Count the number of YAML files in the .github/workflows folder of a repository.
 
     Args:
         owner (str): GitHub username or organization name.
         repo (str): Repository name.
+        client (GitHubClient): Client to use. Defaults to the shared client (get_client()).
 
     Returns:
         int: Number of YAML files in the workflows folder.
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/.github/workflows"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        yaml_files = [file for file in data if file['name'].endswith('.yml') or file['name'].endswith('.yaml')]
-        return len(yaml_files)
+        data = (client or get_client()).get_json(f"/repos/{owner}/{repo}/contents/.github/workflows")
+        return _count_yaml_files(data)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching workflow files: {e}")
         return 0
 
+def get_repo_info_many(repos, client=None, workers=8):
+    """
+    Fetch repository information for many repositories concurrently.
+
+    Requests share one connection pool and are paced by the client's rate limit scheduler.
+    Results are yielded as soon as each request completes (not in input order).
+
+    Args:
+        repos (iterable): "owner/name" strings or (owner, name) tuples.
+        client (GitHubClient): Client to use. Defaults to the shared client (get_client()).
+        workers (int): Number of concurrent requests.
+
+    Yields:
+        tuple: ("owner/name", repository information dict, or None on error)
+    """
+    paths = (f"/repos/{'/'.join(_split_repo(repo))}" for repo in repos)
+    for path, result in (client or get_client()).get_json_many(paths, workers):
+        full_name = path[len("/repos/"):]
+        if isinstance(result, Exception):
+            print(f"Error fetching repository information for {full_name}: {result}")
+            yield full_name, None
+        else:
+            yield full_name, _repo_info(result)
+
+def count_workflow_files_many(repos, client=None, workers=8):
+    """
+    Count workflow YAML files for many repositories concurrently.
+
+    Args:
+        repos (iterable): "owner/name" strings or (owner, name) tuples.
+        client (GitHubClient): Client to use. Defaults to the shared client (get_client()).
+        workers (int): Number of concurrent requests.
+
+    Yields:
+        tuple: ("owner/name", number of YAML files; 0 if the folder does not exist or on error)
+    """
+    suffix = "/contents/.github/workflows"
+    paths = (f"/repos/{'/'.join(_split_repo(repo))}{suffix}" for repo in repos)
+    for path, result in (client or get_client()).get_json_many(paths, workers):
+        full_name = path[len("/repos/"):-len(suffix)]
+        if isinstance(result, Exception):
+            print(f"Error fetching workflow files for {full_name}: {result}")
+            yield full_name, 0
+        else:
+            yield full_name, _count_yaml_files(result)
+
 if __name__ == "__main__":
     owner = input("Enter the GitHub owner/organization name: ")
     repo = input("Enter the repository name: ")
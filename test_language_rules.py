@@ -0,0 +1,91 @@
+import os
+import unittest
+
+import yaml
+
+from language_rules import LanguageMatcher
+from workflow_parser import summarize_workflow_bytes
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "github_workflows_dataset")
+
+def legacy_detect_language(workflow_content):
+    """The if/elif chain search_workflows_languages used before language_rules.py (reference for parity)."""
+    detected_language = None
+    if workflow_content:
+        if 'jobs' in workflow_content:
+            for job_name, job_details in workflow_content['jobs'].items():
+                if 'steps' in job_details:
+                    for step in job_details['steps']:
+                        if 'uses' in step:
+                            action_path = step['uses'].lower()
+                            if 'setup-python' in action_path:
+                                detected_language = 'Python'
+                            elif 'setup-node' in action_path or 'actions/setup-node' in action_path:
+                                detected_language = 'Node.js'
+                            elif 'setup-java' in action_path:
+                                detected_language = 'Java'
+                            elif 'setup-go' in action_path:
+                                detected_language = 'Go'
+                            elif 'actions/checkout' in action_path:
+                                pass
+                            elif 'docker/build-push-action' in action_path:
+                                detected_language = 'Docker/Container'
+                            elif 'ruby/setup-ruby' in action_path:
+                                detected_language = 'Ruby'
+                            elif 'php/setup-php' in action_path:
+                                detected_language = 'PHP'
+                        elif 'run' in step:
+                            run_command = step['run'].lower()
+                            if 'python' in run_command and 'pip' in run_command:
+                                detected_language = 'Python'
+                            elif 'npm' in run_command or 'node' in run_command:
+                                detected_language = 'Node.js'
+                            elif 'java' in run_command or 'maven' in run_command or 'gradle' in run_command:
+                                detected_language = 'Java'
+                            elif 'go build' in run_command or 'go run' in run_command:
+                                detected_language = 'Go'
+                            elif 'bundle install' in run_command or 'rake' in run_command:
+                                detected_language = 'Ruby'
+                            elif 'composer install' in run_command:
+                                detected_language = 'PHP'
+                            elif 'dotnet' in run_command:
+                                detected_language = 'C#'
+                            elif 'cargo build' in run_command:
+                                detected_language = 'Rust'
+    return detected_language
+
+class TestLanguageRules(unittest.TestCase):
+
+    def test_sample_corpus_matches_legacy_chain(self):
+        # A file is deleted when the language is unknown or analysis fails, so both must agree file by file
+        names = sorted(name for name in os.listdir(DATASET_DIR) if name.endswith(('.yml', '.yaml')))
+        self.assertTrue(names)
+        for name in names:
+            with open(os.path.join(DATASET_DIR, name), 'rb') as f:
+                raw = f.read()
+            try:
+                expected = legacy_detect_language(yaml.safe_load(raw.decode('utf-8')))
+            except Exception:
+                expected = "error"
+            record = summarize_workflow_bytes(raw)
+            actual = "error" if record["parse_error"] or record["language_error"] else record["language"]
+            self.assertEqual(actual, expected, name)
+
+    def test_overlapping_patterns_and_rule_order(self):
+        matcher = LanguageMatcher()
+        steps = [{"run": "pip install -r requirements.txt && python -m pytest"}, {"uses": "actions/checkout@v4"},
+                 {"run": "npm ci"}, {"uses": "actions/setup-java@v4"}, {"run": "echo nodes"}]
+        language, ranked = matcher.classify(steps)
+        # The last identifying step wins, as in the legacy chain ('nodes' contains 'node')
+        self.assertEqual(language, "Node.js")
+        self.assertEqual(ranked, [("Node.js", 4), ("Java", 3), ("Python", 2)])
+        self.assertEqual(matcher.run_labels("./gradlew build -Pjava"), ["gradle", "java"])
+        # Each keyword is searched separately, so overlapping keywords are all found
+        self.assertEqual(matcher.match_run("pipython"), ("Python", 2))
+        self.assertEqual(matcher.run_labels("npmaven"), ["maven", "npm"])
+        # Ties are ranked in rule-table order, whichever language appeared first
+        self.assertEqual(matcher.classify([{"run": "npm ci"}, {"run": "pip install python-dateutil"}]),
+                         ("Python", [("Python", 2), ("Node.js", 2)]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import math
 import unittest
-from src.main import add, subtract, multiply, divide
+from array import array
+from main import add, subtract, multiply, divide
+from main import add_batch, subtract_batch, multiply_batch, divide_batch, add_chunks, divide_chunks
 
 class TestMainMethods(unittest.TestCase):
 
@@ -21,5 +24,32 @@ class TestMainMethods(unittest.TestCase):
         with self.assertRaises(ValueError):
             divide(5, 0)
 
+    def test_batch_matches_scalar(self):
+        a = [2, -1, 2**62, 2**70, 2.5, True]
+        b = [3, 1, 2**62, 3, 4, True]
+        for scalar, batch in ((add, add_batch), (subtract, subtract_batch), (multiply, multiply_batch), (divide, divide_batch)):
+            expected = [scalar(x, y) for x, y in zip(a, b)]
+            result = batch(a, b)
+            self.assertEqual(result, expected)
+            self.assertEqual([type(value) for value in result], [type(value) for value in expected])
+        self.assertEqual(add_batch([1.5, 2.5], [1, 2]), [2.5, 4.5])
+        self.assertEqual(multiply_batch(array('i', [1, 2, 3]), 2), array('q', [2, 4, 6]))
+
+    def test_divide_batch_zero(self):
+        with self.assertRaises(ValueError):
+            divide_batch([1, 2], [1, 0])
+        result = divide_batch([1, 2, 3], [2, 0, 3], zero="nan")
+        self.assertEqual(result[0], 0.5)
+        self.assertTrue(math.isnan(result[1]))
+        self.assertEqual(divide_batch([1, 2, 3], [2, 0, 3], zero="mask"), [0.5, None, 1.0])
+
+    def test_chunks(self):
+        chunks = list(add_chunks(iter(range(5)), 1, chunk_size=2))
+        self.assertEqual(chunks, [[1, 2], [3, 4], [5]])
+        with self.assertRaises(ValueError):
+            list(divide_chunks(iter([1, 2, 3]), iter([1, 1, 0]), chunk_size=2))
+        with self.assertRaises(ValueError):
+            list(add_chunks(iter(range(4)), iter(range(2)), chunk_size=2))
+
 if __name__ == "__main__":
     unittest.main()
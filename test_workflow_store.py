@@ -0,0 +1,57 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from get_workflow_utils import search_workflows_languages, show_workflows_summary
+from workflow_index import WorkflowIndex
+from workflow_store import WorkflowStore
+
+PYTHON_WORKFLOW = """on: push
+jobs:
+  test:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - uses: actions/setup-python@v5
+"""
+# No step identifies a language, so a plain directory would delete this file
+UNKNOWN_WORKFLOW = """on: pull_request
+jobs:
+  lint:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - run: echo lint
+"""
+
+class TestWorkflowStore(unittest.TestCase):
+
+    def test_summary_on_store_keeps_manifest_consistent(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = WorkflowStore(store_dir)
+            store.put(PYTHON_WORKFLOW, repo="octo/app", path=".github/workflows/ci.yml", commit="abc")
+            store.put(UNKNOWN_WORKFLOW, repo="octo/app", path=".github/workflows/lint.yml", commit="abc")
+            with contextlib.redirect_stdout(io.StringIO()):
+                show_workflows_summary(store_dir)
+                usage = search_workflows_languages(store_dir)
+            self.assertEqual(usage, {"Python": 1})
+            # Every manifest entry still points at an existing blob
+            for entry in store.iter_manifest():
+                self.assertTrue(os.path.exists(store.blob_path(entry["sha256"])), entry)
+            lint_blob = os.path.basename(store.blob_path(store.lookup("octo/app", ".github/workflows/lint.yml")))
+            with self.assertRaises(OSError):
+                WorkflowIndex(store_dir).remove(lint_blob)
+
+    def test_manifest_records_commit_kind(self):
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = WorkflowStore(store_dir)
+            store.put(PYTHON_WORKFLOW, repo="octo/app", path=".github/workflows/ci.yml", commit="c0ffee")
+            store.put(UNKNOWN_WORKFLOW, repo="octo/app", path=".github/workflows/lint.yml", commit="b10b", commit_kind="blob")
+            store.put(UNKNOWN_WORKFLOW, repo="octo/lib", path=".github/workflows/lint.yml")
+            kinds = [(entry["repo"], entry["commit"], entry["commit_kind"]) for entry in store.iter_manifest()]
+            self.assertEqual(kinds, [("octo/app", "c0ffee", "commit"), ("octo/app", "b10b", "blob"), ("octo/lib", None, None)])
+
+if __name__ == '__main__':
+    unittest.main()
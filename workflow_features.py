@@ -0,0 +1,520 @@
+# このスクリプトは、ワークフローインデックスの解析結果を列指向の特徴量テーブルに変換し、ベクトル化した集計を提供します。
+# 各ワークフローを1行とし、トリガー（ビット集合）・ジョブ数・ステップ数・ランナーラベル（ビット集合）・
+# 使用アクション・主要言語・ファイルサイズを列として保持します。
+# ビット集合に収まらない出現数の少ないトリガー・ランナーラベルは、"(other)" のビットに加えて、行ごとの値の一覧
+# （rare_triggers / rare_runners の列）にも記録し、select() で値を指定して正確に絞り込めるようにします。
+# 列は型付きのバイナリファイル（<workflows_dir>/.workflow_features/<列名>.bin）として保存され、インデックスが
+# 変わるまで再利用されます。NumPyがあれば列をndarrayとして読み込み、集計をベクトル演算で行います
+# （NumPyがない環境では array モジュールと標準のループで同じ結果を返します）。
+#
+# 使い方:
+#   python workflow_features.py github_workflows_dataset --count triggers
+#   python workflow_features.py github_workflows_dataset --group-by language --value steps --agg mean
+#   python workflow_features.py github_workflows_dataset --crosstab language triggers
+
+import argparse
+from array import array
+from collections import Counter
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError: # NumPyがない環境では標準ライブラリで集計する
+    np = None
+
+from workflow_index import WorkflowIndex
+
+FEATURES_DIRNAME = ".workflow_features"
+FEATURES_VERSION = 2
+MAX_BITSET_TERMS = 63 # ビット集合の列で個別のビットを割り当てる値の数。それ以外の値は OTHER_LABEL のビットにまとめ、rare_<列名> にも記録する
+OTHER_LABEL = "(other)"
+
+# 列名 -> arrayの型コード
+COLUMN_TYPES = {
+    "triggers": "Q",       # トリガーのビット集合
+    "runners": "Q",        # ランナーラベルのビット集合
+    "language": "h",       # 主要言語の番号（-1は特定不可）
+    "jobs": "I",
+    "steps": "I",
+    "size": "I",           # ファイルサイズ（バイト）
+    "flags": "B",          # 解析エラーのビット（FLAG_*）
+    "top_level": "B",      # ディレクトリ直下のファイルかどうか
+    "action_offsets": "Q", # 行ごとの action_ids の開始位置（行数+1個）
+    "action_ids": "I",     # 使用アクション（バージョン指定なし）の番号
+    "rare_triggers_offsets": "Q", # 行ごとの rare_triggers_ids の開始位置（行数+1個）
+    "rare_triggers_ids": "I",     # ビットを割り当てなかったトリガーの番号（語彙は vocabularies['rare_triggers']）
+    "rare_runners_offsets": "Q",  # 行ごとの rare_runners_ids の開始位置（行数+1個）
+    "rare_runners_ids": "I",      # ビットを割り当てなかったランナーラベルの番号（語彙は vocabularies['rare_runners']）
+}
+# 1行に複数の値を持つ可変長の列: 名前 -> (開始位置の列, 値の番号の列)
+SPARSE_COLUMNS = {
+    "actions": ("action_offsets", "action_ids"),
+    "rare_triggers": ("rare_triggers_offsets", "rare_triggers_ids"),
+    "rare_runners": ("rare_runners_offsets", "rare_runners_ids"),
+}
+NUMERIC_COLUMNS = ("jobs", "steps", "size")
+LABEL_COLUMNS = ("language", "triggers", "runners", "actions")
+AGGREGATES = ("count", "sum", "mean", "max", "min")
+
+FLAG_PARSE_ERROR = 1
+FLAG_YAML_ERROR = 2
+FLAG_TRIGGER_ERROR = 4
+FLAG_LANGUAGE_ERROR = 8
+
+def _bitset_vocabulary(values_per_row):
+    """出現数の多い順に値を並べ、ビットを割り当てる語彙を作る"""
+    counts = Counter(value for values in values_per_row for value in set(values))
+    vocabulary = [value for value, _ in counts.most_common(MAX_BITSET_TERMS)]
+    if len(counts) > MAX_BITSET_TERMS:
+        vocabulary.append(OTHER_LABEL)
+    return vocabulary
+
+def _encode_bitset(values, bits):
+    mask = 0
+    for value in values:
+        mask |= 1 << bits.get(value, MAX_BITSET_TERMS)
+    return mask
+
+def _append_sparse(columns, name, values, ids):
+    """値の一覧を可変長の列に追加する（ids は値 -> 番号の辞書で、新しい値には番号を割り当てる）"""
+    offsets, id_column = SPARSE_COLUMNS[name]
+    for value in dict.fromkeys(values):
+        columns[id_column].append(ids.setdefault(value, len(ids)))
+    columns[offsets].append(len(columns[id_column]))
+
+def _index_signature(index):
+    """インデックスファイルの (サイズ, 更新時刻) を返す（テーブルが最新かどうかの判定に使う）"""
+    try:
+        st = os.stat(index.index_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+class FeatureTable:
+    """
+    ワークフローごとの特徴量を列ごとに保持するテーブル
+
+    columns の各列は NumPy がある場合は ndarray、ない場合は array です。
+    集計メソッドの where には select() が返す行のマスクを渡せます。
+    """
+
+    def __init__(self, paths, vocabularies, columns, source=None):
+        """
+        Args:
+            paths (list): 行ごとのワークフローのパス（パックの場合はキー）
+            vocabularies (dict): 'language', 'triggers', 'runners', 'actions', 'rare_triggers', 'rare_runners' の
+                値の一覧（番号・ビット順）
+            columns (dict): 列名 -> 列のデータ
+            source: 作成元インデックスの signature（最新かどうかの判定に使う）
+        """
+        self.paths = paths
+        self.vocabularies = vocabularies
+        self.columns = columns
+        self.source = source
+        self._pairs = {}
+
+    def __len__(self):
+        return len(self.paths)
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        WorkflowIndex のレコードからテーブルを作成する
+
+        Args:
+            index (WorkflowIndex): 最新化済みのインデックス
+
+        Returns:
+            FeatureTable: 作成したテーブル
+        """
+        records = list(index.iter_records())
+        trigger_vocab = _bitset_vocabulary(rec["triggers"] or () for rec in records)
+        runner_vocab = _bitset_vocabulary(rec.get("runs_on") or () for rec in records)
+        trigger_bits = {value: bit for bit, value in enumerate(trigger_vocab)}
+        runner_bits = {value: bit for bit, value in enumerate(runner_vocab)}
+        languages = sorted({rec["language"] for rec in records if rec["language"]})
+        language_codes = {lang: code for code, lang in enumerate(languages)}
+        actions, rare_triggers, rare_runners = {}, {}, {}
+
+        columns = {name: array(code) for name, code in COLUMN_TYPES.items()}
+        for offsets, _ in SPARSE_COLUMNS.values():
+            columns[offsets].append(0)
+        for rec in records:
+            triggers, runners = rec["triggers"] or (), rec.get("runs_on") or ()
+            columns["triggers"].append(_encode_bitset(triggers, trigger_bits))
+            columns["runners"].append(_encode_bitset(runners, runner_bits))
+            _append_sparse(columns, "rare_triggers", [value for value in triggers if value not in trigger_bits], rare_triggers)
+            _append_sparse(columns, "rare_runners", [value for value in runners if value not in runner_bits], rare_runners)
+            columns["language"].append(language_codes.get(rec["language"], -1))
+            columns["jobs"].append(rec.get("jobs", 0))
+            columns["steps"].append(rec.get("steps", 0))
+            columns["size"].append(rec.get("size", 0))
+            columns["flags"].append(
+                (FLAG_PARSE_ERROR if rec["parse_error"] else 0) | (FLAG_YAML_ERROR if rec["yaml_error"] else 0)
+                | (FLAG_TRIGGER_ERROR if rec["trigger_error"] else 0) | (FLAG_LANGUAGE_ERROR if rec["language_error"] else 0)
+            )
+            columns["top_level"].append(1 if index.pack or os.sep not in rec["path"] else 0)
+            _append_sparse(columns, "actions", [uses.split("@", 1)[0] for uses in rec["uses"]], actions)
+
+        vocabularies = {"language": languages, "triggers": trigger_vocab, "runners": runner_vocab, "actions": list(actions),
+                        "rare_triggers": list(rare_triggers), "rare_runners": list(rare_runners)}
+        if np is not None:
+            columns = {name: np.frombuffer(column, dtype=column.typecode) for name, column in columns.items()}
+        return cls([rec["path"] for rec in records], vocabularies, columns, _index_signature(index))
+
+    @classmethod
+    def for_index(cls, index, table_dir=None):
+        """
+        インデックスに対応するテーブルを返す。保存済みのテーブルが最新であれば読み込み、古ければ作成し直して保存する
+
+        Args:
+            index (WorkflowIndex): 最新化済みのインデックス
+            table_dir (str): テーブルを保存するディレクトリ。Noneの場合は <workflows_dir>/.workflow_features
+
+        Returns:
+            FeatureTable: テーブル
+        """
+        table_dir = table_dir or os.path.join(index.workflows_dir, FEATURES_DIRNAME)
+        signature = _index_signature(index)
+        if signature is not None:
+            table = cls.load(table_dir)
+            if table is not None and table.source == signature:
+                return table
+        table = cls.from_index(index)
+        table.save(table_dir)
+        return table
+
+    def save(self, table_dir):
+        """列ごとのバイナリファイルと、パス・語彙を含む meta.json を書き込む"""
+        os.makedirs(table_dir, exist_ok=True)
+        for name, column in self.columns.items():
+            with open(os.path.join(table_dir, f"{name}.bin"), 'wb') as f:
+                column.tofile(f)
+        meta = {"version": FEATURES_VERSION, "source": self.source, "paths": self.paths, "vocabularies": self.vocabularies}
+        tmp_path = os.path.join(table_dir, "meta.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(table_dir, "meta.json"))
+
+    @classmethod
+    def load(cls, table_dir):
+        """
+        保存済みのテーブルを読み込む
+
+        Returns:
+            FeatureTable | None: 存在しない・形式が異なる場合はNone
+        """
+        if not os.path.exists(os.path.join(table_dir, "meta.json")):
+            return None
+        try:
+            with open(os.path.join(table_dir, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("version") != FEATURES_VERSION:
+                return None
+            columns = {}
+            for name, code in COLUMN_TYPES.items():
+                path = os.path.join(table_dir, f"{name}.bin")
+                if np is not None:
+                    columns[name] = np.fromfile(path, dtype=code)
+                else:
+                    columns[name] = array(code)
+                    with open(path, 'rb') as f:
+                        columns[name].frombytes(f.read())
+        except (OSError, ValueError) as e:
+            print(f"特徴量テーブル {table_dir} を読み込めなかったため再作成します: {e}")
+            return None
+        return cls(meta["paths"], meta["vocabularies"], columns, meta.get("source"))
+
+    # --- 行の選択 ---
+
+    def _new_mask(self, value=True):
+        if np is not None:
+            return np.full(len(self), value, dtype=bool)
+        return [value] * len(self)
+
+    def _apply(self, mask, name, predicate):
+        """列の各値に predicate（NumPyでもintでも同じ式で評価できる関数）を適用し、マスクとの論理積を返す"""
+        column = self.columns[name]
+        if np is not None:
+            return mask & predicate(column)
+        return [m and bool(predicate(v)) for m, v in zip(mask, column)]
+
+    def _vocabulary_id(self, name, value):
+        vocabulary = self.vocabularies[name]
+        return vocabulary.index(value) if value in vocabulary else None
+
+    def _sparse_mask(self, mask, name, label):
+        """可変長の列で label を含む行に限ったマスクを返す"""
+        if np is not None:
+            labels, rows = self._sparse_pairs(name)
+            hits = self._new_mask(False)
+            hits[rows[labels == label]] = True
+            return mask & hits
+        return [m and label in labels for m, labels in zip(mask, self._row_labels(name))]
+
+    def select(self, language=None, trigger=None, runner=None, action=None, top_level=None, has_language=None,
+               with_flags=0, without_flags=0):
+        """
+        条件をすべて満たす行のマスクを返す
+
+        Args:
+            language (str): 主要言語。"" を指定すると言語を特定できなかった行
+            trigger (str): トリガー名
+            runner (str): ランナーラベル（トリガーとともに、ビットを割り当てなかった値も正確に絞り込みます）
+            action (str): 使用アクション（owner/name、バージョン指定なし）
+            top_level (bool): ディレクトリ直下のファイルかどうか
+            has_language (bool): 主要言語を特定できたかどうか
+            with_flags (int): 指定したエラーのビット（FLAG_*の論理和）のいずれかが立っている行に限る
+            without_flags (int): 指定したエラーのビット（FLAG_*の論理和）がいずれも立っていない行に限る
+
+        Returns:
+            ndarray | list: 行ごとの真偽値
+        """
+        mask = self._new_mask()
+        if language is not None:
+            code = -1 if language == "" else self._vocabulary_id("language", language)
+            if code is None:
+                return self._new_mask(False)
+            mask = self._apply(mask, "language", lambda col: col == code)
+        for name, value in (("triggers", trigger), ("runners", runner)):
+            if value is not None:
+                bit = self._vocabulary_id(name, value)
+                if bit is None:
+                    # "(other)" のビットにまとめた値は可変長の列で絞り込む
+                    rare_id = self._vocabulary_id("rare_" + name, value)
+                    if rare_id is None:
+                        return self._new_mask(False)
+                    mask = self._sparse_mask(mask, "rare_" + name, rare_id)
+                    continue
+                if np is not None:
+                    bit = np.uint64(bit) # NumPy 1.x では uint64 と int のシフトが float に変換されるため
+                mask = self._apply(mask, name, lambda col, bit=bit: (col >> bit) & 1 == 1)
+        if top_level is not None:
+            mask = self._apply(mask, "top_level", lambda col: col == int(top_level))
+        if has_language is not None:
+            mask = self._apply(mask, "language", lambda col: (col >= 0) == has_language)
+        if with_flags:
+            mask = self._apply(mask, "flags", lambda col: col & with_flags != 0)
+        if without_flags:
+            mask = self._apply(mask, "flags", lambda col: col & without_flags == 0)
+        if action is not None:
+            action_id = self._vocabulary_id("actions", action)
+            if action_id is None:
+                return self._new_mask(False)
+            mask = self._sparse_mask(mask, "actions", action_id)
+        return mask
+
+    def rows(self, mask, invert=False):
+        """マスクが真（invert=Trueの場合は偽）の行番号のリストを返す"""
+        if np is not None:
+            return np.flatnonzero(~mask if invert else mask).tolist()
+        return [i for i, m in enumerate(mask) if m != invert]
+
+    # --- 行とラベルの対応 ---
+
+    def _label_masks(self, name, where=None):
+        """
+        ラベルごとの行のマスクを (ラベル番号, マスク) として返す（NumPy用。'language' とビット集合の列のみ）
+        """
+        column = self.columns[name]
+        for label in range(len(self.vocabularies[name])):
+            if name == "language":
+                mask = column == label
+            else:
+                mask = ((column >> np.uint64(label)) & np.uint64(1)).astype(bool)
+            yield label, mask if where is None else mask & where
+
+    def _sparse_pairs(self, name, where=None):
+        """可変長の列の (値の番号の配列, 行番号の配列) を返す（NumPy用。1行が複数回現れる）"""
+        if name not in self._pairs:
+            offsets, ids = SPARSE_COLUMNS[name]
+            offsets = self.columns[offsets].astype(np.int64)
+            self._pairs[name] = (self.columns[ids].astype(np.int64), np.repeat(np.arange(len(self)), np.diff(offsets)))
+        labels, rows = self._pairs[name]
+        if where is not None:
+            keep = where[rows]
+            rows, labels = rows[keep], labels[keep]
+        return labels, rows
+
+    def _row_labels(self, name):
+        """行ごとのラベル番号のリストを返す（NumPyがない場合用）"""
+        if name == "language":
+            return [[code] if code >= 0 else [] for code in self.columns["language"]]
+        if name in SPARSE_COLUMNS:
+            offsets, ids = (self.columns[column] for column in SPARSE_COLUMNS[name])
+            return [list(ids[offsets[i]:offsets[i + 1]]) for i in range(len(self))]
+        size = len(self.vocabularies[name])
+        return [[bit for bit in range(size) if value >> bit & 1] for value in self.columns[name]]
+
+    def _check_label_column(self, name):
+        if name not in LABEL_COLUMNS:
+            raise ValueError(f"ラベルの列ではありません: {name}（{', '.join(LABEL_COLUMNS)} のいずれか）")
+
+    def _labels(self, name, values):
+        """(ラベル番号, 値) の列をラベル名の辞書にし、値の大きい順に並べる（値が0のラベルは除く）"""
+        vocabulary = self.vocabularies[name]
+        # 同じ値の場合はラベル番号の順に並べる（NumPyの有無で順序が変わらないように）
+        items = sorted(((i, value) for i, value in values if value), key=lambda item: (-item[1], item[0]))
+        return {vocabulary[i]: value for i, value in items}
+
+    # --- 集計 ---
+
+    def count_by(self, name, where=None, top=None):
+        """
+        ラベルごとの行数を返す（1行が複数のラベルを持つ列では、それぞれのラベルで数える）
+
+        Args:
+            name (str): 'language', 'triggers', 'runners', 'actions' のいずれか
+            where: select() が返すマスク
+            top (int): 指定した場合は行数の多い順にこの数だけ返す
+
+        Returns:
+            dict: {ラベル: 行数}（行数の多い順）
+        """
+        self._check_label_column(name)
+        if np is None:
+            counter = Counter()
+            for i, labels in enumerate(self._row_labels(name)):
+                if where is None or where[i]:
+                    counter.update(labels)
+            counts = counter.items()
+        elif name == "actions":
+            labels, _ = self._sparse_pairs("actions", where)
+            counts = enumerate(np.bincount(labels, minlength=len(self.vocabularies[name])).tolist())
+        else:
+            counts = [(label, int(np.count_nonzero(mask))) for label, mask in self._label_masks(name, where)]
+        result = self._labels(name, counts)
+        return dict(list(result.items())[:top]) if top else result
+
+    def group_by(self, name, value, agg="mean", where=None):
+        """
+        ラベルごとに数値列を集計する
+
+        Args:
+            name (str): グループ化するラベルの列
+            value (str): 'jobs', 'steps', 'size' のいずれか
+            agg (str): 'count', 'sum', 'mean', 'max', 'min' のいずれか
+            where: select() が返すマスク
+
+        Returns:
+            dict: {ラベル: 集計値}（集計値の大きい順）
+        """
+        self._check_label_column(name)
+        if value not in NUMERIC_COLUMNS:
+            raise ValueError(f"数値の列ではありません: {value}（{', '.join(NUMERIC_COLUMNS)} のいずれか）")
+        if agg not in AGGREGATES:
+            raise ValueError(f"不明な集計方法です: {agg}（{', '.join(AGGREGATES)} のいずれか）")
+        column = self.columns[value]
+        results = []
+        if np is None:
+            groups = {}
+            for i, labels in enumerate(self._row_labels(name)):
+                if where is None or where[i]:
+                    for label in labels:
+                        groups.setdefault(label, []).append(column[i])
+            aggregate = {"count": len, "sum": sum, "max": max, "min": min, "mean": lambda v: sum(v) / len(v)}[agg]
+            results = [(label, aggregate(values)) for label, values in groups.items()]
+        elif name == "actions":
+            labels, rows = self._sparse_pairs("actions", where)
+            values = column[rows].astype(np.int64)
+            size = len(self.vocabularies[name])
+            counts = np.bincount(labels, minlength=size)
+            if agg in ("max", "min"):
+                result = np.full(size, np.iinfo(np.int64).min if agg == "max" else np.iinfo(np.int64).max)
+                (np.maximum if agg == "max" else np.minimum).at(result, labels, values)
+            elif agg == "count":
+                result = counts
+            else:
+                result = np.bincount(labels, weights=values, minlength=size)
+            for label in np.flatnonzero(counts).tolist():
+                v = result[label] / counts[label] if agg == "mean" else result[label]
+                results.append((label, float(v) if agg == "mean" else int(v)))
+        else:
+            for label, mask in self._label_masks(name, where):
+                values = column[mask].astype(np.int64)
+                if len(values):
+                    v = {"count": len, "sum": np.sum, "max": np.max, "min": np.min, "mean": np.mean}[agg](values)
+                    results.append((label, float(v) if agg == "mean" else int(v)))
+        vocabulary = self.vocabularies[name]
+        return {vocabulary[i]: v for i, v in sorted(results, key=lambda item: (-item[1], item[0]))}
+
+    def crosstab(self, rows, cols, where=None):
+        """
+        2つのラベルの列のクロス集計（両方のラベルを持つ行数）を返す
+
+        Args:
+            rows (str): 行方向のラベルの列（'language', 'triggers', 'runners' のいずれか）
+            cols (str): 列方向のラベルの列（'actions' も指定できます）
+            where: select() が返すマスク
+
+        Returns:
+            dict: {行のラベル: {列のラベル: 行数}}
+        """
+        self._check_label_column(rows)
+        self._check_label_column(cols)
+        if rows == "actions":
+            raise ValueError("行方向に 'actions' は指定できません（列方向に指定してください）")
+        result = {}
+        if np is None:
+            counters = {}
+            for i, (r_labels, c_labels) in enumerate(zip(self._row_labels(rows), self._row_labels(cols))):
+                if where is None or where[i]:
+                    for r in r_labels:
+                        counters.setdefault(r, Counter()).update(c_labels)
+            for label in sorted(counters):
+                result[self.vocabularies[rows][label]] = self._labels(cols, counters[label].items())
+            return result
+        if cols == "actions":
+            action_labels, action_rows = self._sparse_pairs("actions", where)
+            size = len(self.vocabularies[cols])
+        else:
+            col_masks = [mask for _, mask in self._label_masks(cols, where)]
+        for label, mask in self._label_masks(rows, where):
+            if not mask.any():
+                continue
+            if cols == "actions":
+                counts = enumerate(np.bincount(action_labels[mask[action_rows]], minlength=size).tolist())
+            else:
+                counts = [(c, int(np.count_nonzero(mask & col_mask))) for c, col_mask in enumerate(col_masks)]
+            result[self.vocabularies[rows][label]] = self._labels(cols, counts)
+        return result
+
+def load_feature_table(workflows_dir, workers=None):
+    """
+    ディレクトリ（またはパックディレクトリ）のインデックスを最新化し、対応する特徴量テーブルを返す
+
+    Args:
+        workflows_dir (str): ワークフローファイルが格納されているフォルダのパス
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+
+    Returns:
+        tuple: (WorkflowIndex, FeatureTable)
+    """
+    index = WorkflowIndex(workflows_dir)
+    index.update(workers=workers)
+    return index, FeatureTable.for_index(index)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークフローの特徴量テーブルを集計する")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=None, help="未解析ファイルの解析に使うワーカープロセス数（0はCPUコア数）")
+    parser.add_argument("--count", choices=LABEL_COLUMNS, help="ラベルごとの行数を表示する")
+    parser.add_argument("--top", type=int, default=None, help="--count で表示する件数")
+    parser.add_argument("--group-by", choices=LABEL_COLUMNS, help="グループ化するラベルの列")
+    parser.add_argument("--value", choices=NUMERIC_COLUMNS, default="steps", help="--group-by で集計する数値の列")
+    parser.add_argument("--agg", choices=AGGREGATES, default="mean")
+    parser.add_argument("--crosstab", nargs=2, metavar=("ROWS", "COLS"), help="2つのラベルの列をクロス集計する")
+    args = parser.parse_args()
+
+    _, table = load_feature_table(args.directory, args.workers)
+    print(f"ワークフロー数: {len(table)}")
+    if args.count:
+        for label, count in table.count_by(args.count, top=args.top).items():
+            print(f"- {label}: {count}")
+    if args.group_by:
+        for label, value in table.group_by(args.group_by, args.value, args.agg).items():
+            print(f"- {label}: {value:.2f}" if isinstance(value, float) else f"- {label}: {value}")
+    if args.crosstab:
+        for row_label, counts in table.crosstab(*args.crosstab).items():
+            print(f"{row_label}: " + ", ".join(f"{label}={count}" for label, count in counts.items()))
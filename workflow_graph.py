@@ -0,0 +1,521 @@
+# このスクリプトは、データセットのワークフローの依存グラフ（再利用可能ワークフローとアクションの呼び出し関係）を提供します。
+# ジョブの uses（jobs.<id>.uses）で呼び出す再利用可能ワークフローと、ステップの uses で使うアクションを辺とし、
+# ローカル参照（./.github/workflows/_test.yml）とリポジトリをまたぐ参照（owner/repo/.github/workflows/x.yml@ref）を
+# データセット内のワークフローに解決します。解決できない参照は外部ノードとして残します。
+# リポジトリとパスは、パックではキー（owner/repo/パス）から、コンテンツアドレス型ストアではマニフェストから求め、
+# どちらもない（ファイル名だけで保存した）ディレクトリではファイル名が一致するワークフローに解決します。
+#
+# 展開後の実効トリガー・ジョブ・アクションや、あるワークフロー・アクションに依存するすべてのワークフローは、
+# 強連結成分（Tarjanのアルゴリズム）ごとに推移閉包を計算してメモ化するため、循環があっても停止し、循環として報告します。
+# update() はワークフローインデックスとの差分（追加・変更・削除されたファイル）だけを辺に反映し、
+# 影響を受けるノードのメモだけを破棄します。ノードは整数IDで、辺は整数のリストで保持します。
+#
+# 使い方:
+#   python workflow_graph.py github_workflows_dataset expand _linux-build.yml
+#   python workflow_graph.py github_workflows_dataset dependents actions/checkout
+#   python workflow_graph.py github_workflows_dataset cycles
+
+import argparse
+from collections import defaultdict
+import os
+import posixpath
+import re
+
+from workflow_index import WorkflowIndex
+from workflow_store import MANIFEST_FILENAME, WorkflowStore
+
+# ノードの種類
+WORKFLOW = "workflow" # データセット内のワークフロー
+EXTERNAL = "external" # データセットにない（解決できなかった）再利用可能ワークフロー
+ACTION = "action" # ステップで使うアクション
+
+WORKFLOW_CALL = "workflow_call"
+
+_REMOTE_RE = re.compile(r"^([^/@\s]+)/([^/@\s]+)(?:/([^@\s]*))?(?:@(\S+))?$")
+
+def parse_uses(ref):
+    """
+    uses の参照を (リポジトリ, パス) に分解する（バージョン指定は除く）
+
+    Returns:
+        tuple | None: ローカル参照は (None, パス)、リモート参照は ("owner/repo", パス（なければ空文字列）)。
+                      docker:// などそれ以外の参照はNone
+    """
+    ref = ref.strip()
+    if ref.startswith("./"):
+        return None, posixpath.normpath(ref[2:])
+    match = _REMOTE_RE.match(ref)
+    if not match:
+        return None
+    owner, name, path, _ = match.groups()
+    return f"{owner}/{name}", (path or "").strip("/")
+
+def _record_locations(index):
+    """
+    インデックスのパスごとに、そのファイルの (リポジトリ, リポジトリ内のパス) のリストを返す
+
+    パックではキーから、コンテンツアドレス型ストアではマニフェスト（(リポジトリ, パス) ごとに最新の行）から求めます。
+    """
+    locations = defaultdict(list)
+    if index.pack:
+        for path in index.records:
+            parts = path.split("/", 2)
+            if len(parts) == 3:
+                locations[path].append((f"{parts[0]}/{parts[1]}", parts[2]))
+        return locations
+    if not os.path.exists(os.path.join(index.workflows_dir, MANIFEST_FILENAME)):
+        return locations
+    latest = {(entry["repo"], entry["path"]): entry["sha256"] for entry in WorkflowStore(index.workflows_dir).iter_manifest()
+              if entry.get("repo") and entry.get("path")}
+    for location, sha256 in latest.items():
+        locations[f"{sha256}.yml"].append(location)
+    return locations
+
+def _manifest_signature(workflows_dir):
+    try:
+        stat = os.stat(os.path.join(workflows_dir, MANIFEST_FILENAME))
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+class WorkflowGraph:
+    """
+    ワークフロー・外部ワークフロー・アクションをノードとする依存グラフ
+
+    ノード名は、データセットのワークフローはリポジトリとパスが1つに決まれば "owner/repo/パス"、
+    それ以外はインデックスのパス、外部ワークフローは "owner/repo/パス"、アクションは "owner/repo[/パス]"
+    （ローカルアクションでリポジトリが不明な場合は "./パス"）です。
+    """
+
+    def __init__(self, workflows_dir):
+        self.workflows_dir = workflows_dir
+        self._reset()
+
+    def _reset(self):
+        self.names = [] # ノードID -> 名前
+        self.kinds = [] # ノードID -> 種類（削除したワークフローはNone）
+        self.ids = {} # 名前 -> ノードID
+        self.out = [] # ノードID -> 呼び出し先のノードIDのリスト（重複なし）
+        self.rev = [] # ノードID -> 呼び出し元のノードIDの集合
+        self.records = {} # インデックスのパス -> (SHA-256, ノードID)
+        self.triggers = {} # ワークフローのノードID -> トリガーのタプル
+        self.job_ids = {} # ワークフローのノードID -> ジョブIDのタプル
+        self.refs = {} # ワークフローのノードID -> (呼び出しの [(ジョブID, uses)], ステップの uses のリスト)
+        self.calls = {} # ワークフローのノードID -> {ジョブID: 呼び出し先のノードID}
+        self.node_locations = {} # ワークフローのノードID -> [(リポジトリ, パス)]
+        self.locations = {} # (リポジトリ, パス) -> ワークフローのノードID
+        self.basenames = defaultdict(set) # ファイル名 -> ワークフローのノードIDの集合（リポジトリが不明な場合の解決用）
+        self.waiting = defaultdict(set) # 解決できなかった参照のキー -> 参照しているワークフローのノードIDの集合
+        self.waiting_keys = defaultdict(set) # ワークフローのノードID -> 登録している待ち行列のキーの集合
+        self.manifest_signature = None
+        self._forward = {} # ノードID -> 推移的な呼び出し先の frozenset
+        self._reverse = {} # ノードID -> 推移的な呼び出し元の frozenset
+        self._jobs = {} # ノードID -> 展開後のジョブのタプル
+        self._cyclic = {} # 循環に含まれるノードID -> 強連結成分（ノードIDのタプル）
+
+    # --- 構築・更新 ---
+
+    def _node(self, name, kind):
+        """名前のノードIDを返す（なければ作る）。外部ワークフローがデータセットに追加された場合は種類を更新する"""
+        node = self.ids.get(name)
+        if node is None:
+            node = len(self.names)
+            self.names.append(name)
+            self.kinds.append(kind)
+            self.out.append([])
+            self.rev.append(set())
+            self.ids[name] = node
+        elif kind == WORKFLOW:
+            self.kinds[node] = WORKFLOW
+        return node
+
+    def _add_workflow(self, rec, locations):
+        """ワークフローのノードを追加し、(ノードID, このワークフローを待っていた参照元の集合) を返す"""
+        name = f"{locations[0][0]}/{locations[0][1]}" if len(locations) == 1 else rec["path"]
+        node = self._node(name, WORKFLOW)
+        self.records[rec["path"]] = (rec["sha256"], node)
+        self.triggers[node] = tuple(rec.get("triggers") or ())
+        self.job_ids[node] = tuple(rec.get("job_ids") or ())
+        self.refs[node] = ([tuple(call) for call in rec.get("calls") or ()], list(rec.get("uses") or ()))
+        self.node_locations[node] = locations
+        waiting = set(self.waiting.pop(("", posixpath.basename(rec["path"])), ()))
+        for location in locations:
+            self.locations[location] = node
+            waiting |= self.waiting.pop(location, set())
+        self.basenames[posixpath.basename(rec["path"])].add(node)
+        return node, waiting
+
+    def _remove_workflow(self, path):
+        """ワークフローのノードを削除し、解決し直す必要のある呼び出し元の集合を返す"""
+        _, node = self.records.pop(path)
+        callers = {caller for caller in self.rev[node] if self.kinds[caller] == WORKFLOW}
+        self._set_edges(node, [])
+        for location in self.node_locations.pop(node):
+            if self.locations.get(location) == node:
+                del self.locations[location]
+        self.basenames[posixpath.basename(path)].discard(node)
+        self._unwait(node)
+        for table in (self.triggers, self.job_ids, self.refs, self.calls):
+            table.pop(node, None)
+        self.kinds[node] = None
+        del self.ids[self.names[node]]
+        callers.discard(node)
+        return callers
+
+    def _unwait(self, node):
+        """ノードを待ち行列から外す"""
+        for key in self.waiting_keys.pop(node, ()):
+            waiting = self.waiting.get(key)
+            if waiting is not None:
+                waiting.discard(node)
+                if not waiting:
+                    del self.waiting[key]
+
+    def _resolve_workflow(self, node, ref):
+        """ジョブの uses をノードIDに解決する（解決できない場合は外部ノードを返し、参照のキーを待ち行列に登録する）"""
+        parsed = parse_uses(ref)
+        if parsed is None:
+            return None
+        repo, path = parsed
+        repos = [location[0] for location in self.node_locations[node]]
+        keys = [(r, path) for r in repos] if repo is None else [(repo, path)]
+        for key in keys:
+            if key in self.locations:
+                return self.locations[key]
+        if not repos:
+            # リポジトリが不明なデータセットでは、ファイル名が一致するワークフローが1つだけであればそれに解決する
+            basename = posixpath.basename(path)
+            candidates = self.basenames.get(basename, ())
+            if len(candidates) == 1:
+                return next(iter(candidates))
+            keys.append(("", basename))
+        for key in keys:
+            self.waiting[key].add(node)
+            self.waiting_keys[node].add(key)
+        name = f"{keys[0][0]}/{path}" if keys[0][0] else ref
+        return self._node(name, EXTERNAL)
+
+    def _action_node(self, node, ref):
+        parsed = parse_uses(ref)
+        if parsed is None:
+            return self._node(ref, ACTION)
+        repo, path = parsed
+        if repo is None:
+            locations = self.node_locations[node]
+            name = f"{locations[0][0]}/{path}" if len(locations) == 1 else f"./{path}"
+        else:
+            name = f"{repo}/{path}" if path else repo
+        return self._node(name, ACTION)
+
+    def _resolve(self, node):
+        """ワークフローの参照を解決し直して辺を置き換える"""
+        calls, uses = self.refs[node]
+        self._unwait(node)
+        targets = []
+        resolved_calls = {}
+        for job_id, ref in calls:
+            target = self._resolve_workflow(node, ref)
+            if target is not None:
+                resolved_calls[job_id] = target
+                targets.append(target)
+        targets.extend(self._action_node(node, ref) for ref in uses)
+        self.calls[node] = resolved_calls
+        self._set_edges(node, list(dict.fromkeys(targets)))
+
+    def _set_edges(self, node, targets):
+        """ノードの呼び出し先を置き換え、影響を受けるノードのメモを破棄する"""
+        old = self.out[node]
+        if old == targets:
+            return
+        # 呼び出し先が変わると、このノードと呼び出し元の推移閉包、古い・新しい呼び出し先の呼び出し元の閉包が変わる
+        self._invalidate(node, self.rev, self._forward, (self._forward, self._jobs, self._cyclic))
+        self._invalidate(node, self.out, self._reverse, (self._reverse,))
+        for target in old:
+            self.rev[target].discard(node)
+        self.out[node] = targets
+        for target in targets:
+            self.rev[target].add(node)
+        self._invalidate(node, self.out, self._reverse, (self._reverse,))
+
+    def _invalidate(self, node, adjacency, memo, tables):
+        """
+        node と、adjacency でたどれるノードのうちメモのあるものについてメモを破棄する
+
+        メモのあるノードからたどれるノードにはすべてメモがあるため、メモのないノードから先はたどりません。
+        """
+        if node not in memo:
+            return
+        stack = [node]
+        seen = {node}
+        while stack:
+            current = stack.pop()
+            for table in tables:
+                table.pop(current, None)
+            for nxt in adjacency[current]:
+                if nxt not in seen and nxt in memo:
+                    seen.add(nxt)
+                    stack.append(nxt)
+
+    def update(self, index=None, workers=None):
+        """
+        ワークフローインデックスの現在の内容に追従させる
+
+        追加・変更されたワークフローと、それを参照していた（または解決できずに待っていた）ワークフローだけを
+        解決し直します。コンテンツアドレス型ストアのマニフェストが変わった場合は作成し直します。
+
+        Args:
+            index (WorkflowIndex): 最新化済みのインデックス。Noneの場合はworkflows_dirのインデックスを更新して使う
+            workers (int): 未解析ファイルの解析に使うワーカープロセス数
+
+        Returns:
+            dict: 'added'（追加数）, 'removed'（削除数）, 'resolved'（参照を解決し直したワークフロー数）
+        """
+        if index is None:
+            index = WorkflowIndex(self.workflows_dir)
+            index.update(workers=workers)
+        signature = None if index.pack else _manifest_signature(self.workflows_dir)
+        if signature != self.manifest_signature:
+            self._reset()
+            self.manifest_signature = signature
+        locations = _record_locations(index)
+        records = {rec["path"]: rec for rec in index.iter_records()}
+
+        dirty = set()
+        removed = 0
+        for path, (sha256, _) in list(self.records.items()):
+            rec = records.get(path)
+            if rec is None or rec["sha256"] != sha256:
+                dirty |= self._remove_workflow(path)
+                removed += 1
+        added = 0
+        for path, rec in records.items():
+            if path not in self.records:
+                node, waiting = self._add_workflow(rec, locations.get(path, []))
+                dirty.add(node)
+                dirty |= waiting
+                added += 1
+        dirty = {node for node in dirty if self.kinds[node] == WORKFLOW}
+        for node in dirty:
+            self._resolve(node)
+        return {"added": added, "removed": removed, "resolved": len(dirty)}
+
+    # --- 推移閉包 ---
+
+    def _closure(self, start, adjacency, memo, record_cycles=False):
+        """
+        start からたどれるノードの集合を返す（start 自身は循環に含まれる場合のみ含む）
+
+        まだメモのないノードについて、強連結成分をTarjanのアルゴリズム（反復版）で求め、
+        成分ごとに閉包を計算して成分内のすべてのノードにメモします。
+        """
+        if start in memo:
+            return memo[start]
+        order = {start: 0}
+        low = {start: 0}
+        stack = [start]
+        on_stack = {start}
+        work = [(start, iter(adjacency[start]))]
+        while work:
+            node, successors = work[-1]
+            for nxt in successors:
+                if nxt in memo:
+                    continue
+                if nxt not in order:
+                    order[nxt] = low[nxt] = len(order)
+                    stack.append(nxt)
+                    on_stack.add(nxt)
+                    work.append((nxt, iter(adjacency[nxt])))
+                    break
+                if nxt in on_stack:
+                    low[node] = min(low[node], order[nxt])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] != order[node]:
+                    continue
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                # 成分の外の呼び出し先は、Tarjanのアルゴリズムの順序により既にメモされている
+                reach = set()
+                for member in component:
+                    for nxt in adjacency[member]:
+                        reach.add(nxt)
+                        if nxt in memo:
+                            reach |= memo[nxt]
+                closure = frozenset(reach)
+                cyclic = record_cycles and (len(component) > 1 or node in reach)
+                component = tuple(sorted(component))
+                for member in component:
+                    memo[member] = closure
+                    if cyclic:
+                        self._cyclic[member] = component
+        return memo[start]
+
+    def descendants(self, node):
+        """ノードが推移的に呼び出すノードIDの集合"""
+        return self._closure(node, self.out, self._forward, record_cycles=True)
+
+    def ancestors(self, node):
+        """ノードを推移的に呼び出すノードIDの集合"""
+        return self._closure(node, self.rev, self._reverse)
+
+    # --- 問い合わせ ---
+
+    def lookup(self, name):
+        """
+        名前（ノード名、インデックスのパス、owner/repo/パス[@ref]、一意なファイル名）からノードIDを返す
+
+        Raises:
+            KeyError: 見つからない場合
+        """
+        if name in self.ids:
+            return self.ids[name]
+        if name in self.records:
+            return self.records[name][1]
+        parsed = parse_uses(name)
+        if parsed is not None:
+            repo, path = parsed
+            if repo is not None:
+                if (repo, path) in self.locations:
+                    return self.locations[(repo, path)]
+                stripped = f"{repo}/{path}" if path else repo
+                if stripped in self.ids:
+                    return self.ids[stripped]
+        candidates = self.basenames.get(posixpath.basename(name), ())
+        if len(candidates) == 1:
+            return next(iter(candidates))
+        raise KeyError(name)
+
+    def _effective_jobs(self, node):
+        """呼び出し先の再利用可能ワークフローのジョブを "ジョブ/呼び出し先のジョブ" として展開したジョブのタプル"""
+        if node in self._jobs:
+            return self._jobs[node]
+        self.descendants(node) # 循環の情報を求めておく
+        component = self._cyclic.get(node, ())
+        jobs = []
+        calls = self.calls.get(node, {})
+        for job_id in self.job_ids.get(node, ()):
+            target = calls.get(job_id)
+            if target is None or self.kinds[target] != WORKFLOW:
+                jobs.append(job_id)
+            elif target in component:
+                jobs.append(f"{job_id} (循環: {self.names[target]})")
+            else:
+                jobs.extend(f"{job_id}/{sub}" for sub in self._effective_jobs(target))
+        if not component:
+            self._jobs[node] = tuple(jobs)
+        return tuple(jobs)
+
+    def effective_triggers(self, node):
+        """
+        ワークフローが実際に実行されるトリガー
+
+        自身と推移的な呼び出し元のトリガーの和集合から workflow_call を除いたものです。
+        呼び出し元がデータセットにない再利用可能ワークフローは workflow_call のままです。
+        """
+        triggers = set(self.triggers.get(node, ()))
+        for caller in self.ancestors(node):
+            if self.kinds[caller] == WORKFLOW:
+                triggers.update(self.triggers.get(caller, ()))
+        if len(triggers) > 1 or WORKFLOW_CALL not in triggers:
+            triggers.discard(WORKFLOW_CALL)
+        return sorted(triggers)
+
+    def expand(self, name):
+        """
+        ワークフローを展開した結果を返す
+
+        Returns:
+            dict: 'name', 'triggers'（実効トリガー）, 'jobs'（展開後のジョブ）,
+                  'actions'（自身と呼び出し先で使うアクション）, 'workflows'（推移的に呼び出すワークフロー）,
+                  'unresolved'（解決できなかった呼び出し先）, 'cycles'（関係する循環のリスト）
+        """
+        node = self.lookup(name)
+        reachable = self.descendants(node)
+        by_kind = defaultdict(list)
+        for target in reachable:
+            by_kind[self.kinds[target]].append(self.names[target])
+        cycles = {self._cyclic[n] for n in (node, *reachable) if n in self._cyclic}
+        return {
+            "name": self.names[node],
+            "triggers": self.effective_triggers(node),
+            "jobs": list(self._effective_jobs(node)),
+            "actions": sorted(by_kind[ACTION]),
+            "workflows": sorted(by_kind[WORKFLOW]),
+            "unresolved": sorted(by_kind[EXTERNAL]),
+            "cycles": sorted([self.names[n] for n in component] for component in cycles),
+        }
+
+    def dependents(self, name):
+        """ワークフローまたはアクションに推移的に依存する、データセット内のすべてのワークフローの名前"""
+        node = self.lookup(name)
+        return sorted(self.names[caller] for caller in self.ancestors(node) if self.kinds[caller] == WORKFLOW)
+
+    def cycles(self):
+        """データセット内の呼び出しの循環（強連結成分ごとのノード名のリスト）"""
+        for node in self.records.values():
+            self.descendants(node[1])
+        return sorted({tuple(sorted(self.names[n] for n in component)) for component in self._cyclic.values()})
+
+    def stats(self):
+        """ノード数（種類ごと）と辺の数"""
+        counts = defaultdict(int)
+        for kind in self.kinds:
+            if kind is not None:
+                counts[kind] += 1
+        return dict(counts, edges=sum(len(targets) for targets in self.out))
+
+def load_workflow_graph(workflows_dir, workers=None):
+    """ワークフローインデックスを最新化し、依存グラフを作成して返す"""
+    graph = WorkflowGraph(workflows_dir)
+    graph.update(workers=workers)
+    return graph
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="再利用可能ワークフローとアクションの依存グラフを調べる")
+    parser.add_argument("directory")
+    parser.add_argument("command", choices=("expand", "dependents", "cycles", "stats"))
+    parser.add_argument("name", nargs="?", help="ワークフロー（パス・owner/repo/パス・ファイル名）またはアクション")
+    parser.add_argument("--workers", type=int, default=None, help="未解析ファイルの解析に使うワーカープロセス数（0はCPUコア数）")
+    args = parser.parse_args()
+    if args.command in ("expand", "dependents") and not args.name:
+        parser.error(f"{args.command} にはワークフローまたはアクションの名前が必要です")
+
+    graph = load_workflow_graph(args.directory, args.workers)
+    try:
+        if args.command == "expand":
+            result = graph.expand(args.name)
+            print(f"=== {result['name']} ===")
+            print(f"実効トリガー: {', '.join(result['triggers']) or 'なし'}")
+            print(f"ジョブ（{len(result['jobs'])}）:")
+            for job in result["jobs"]:
+                print(f"- {job}")
+            for key, label in (("workflows", "呼び出すワークフロー"), ("unresolved", "解決できなかった呼び出し先"),
+                               ("actions", "アクション")):
+                print(f"{label}（{len(result[key])}）:")
+                for name in result[key]:
+                    print(f"- {name}")
+            for component in result["cycles"]:
+                print(f"循環: {' -> '.join(component)}")
+        elif args.command == "dependents":
+            dependents = graph.dependents(args.name)
+            print(f"{args.name} に依存するワークフロー: {len(dependents)}個")
+            for name in dependents:
+                print(f"- {name}")
+        elif args.command == "cycles":
+            cycles = graph.cycles()
+            print(f"循環: {len(cycles)}個")
+            for component in cycles:
+                print(f"- {' -> '.join(component)}")
+        else:
+            for key, value in graph.stats().items():
+                print(f"{key}: {value}")
+    except KeyError:
+        parser.error(f"見つかりません: {args.name}")
@@ -0,0 +1,220 @@
+# このスクリプトは、ワークフローYAMLファイルの解析結果をディスクに永続化するインデックスを提供します。
+# 各ファイルは一度だけ解析され、パス・サイズ・更新時刻・内容のハッシュをキーとしたレコードとして保存されます。
+# 2回目以降の実行では、新規または変更されたファイルのみを再解析します。
+# パックディレクトリ（workflow_pack.py）を指定した場合は、シャード内のワークフローをキーで索引付けします。
+
+import hashlib
+import json
+import os
+
+from workflow_pack import PackReader, is_pack_dir, read_location
+from workflow_parser import read_workflow_file, summarize_triggers_bytes, summarize_workflow_files
+from workflow_store import is_store_dir
+
+INDEX_FILENAME = ".workflow_index.json"
+INDEX_VERSION = 7
+WORKFLOW_EXTENSIONS = ('.yml', '.yaml')
+
+class WorkflowIndex:
+    """
+    ワークフローディレクトリ内の各ファイルの解析結果を保持する永続インデックス
+
+    レコードはディレクトリからの相対パスをキーとし、サイズ・更新時刻(ns)・SHA-256と
+    workflow_parser.summarize_workflow_bytes の解析結果を持ちます。
+    パックディレクトリの場合はパック内のキーをパスとし、サイズと更新時刻にはレコードの長さと
+    シャードの更新時刻を使います。パック内のワークフローは削除できません。
+    WorkflowStore のストアのファイルもマニフェストから参照されるため、削除できません。
+    """
+
+    def __init__(self, workflows_dir, index_path=None):
+        self.workflows_dir = workflows_dir
+        self.pack = is_pack_dir(workflows_dir)
+        self.store = is_store_dir(workflows_dir)
+        self.index_path = index_path or os.path.join(workflows_dir, INDEX_FILENAME)
+        self.records = {}
+        self.load()
+
+    def load(self):
+        """ディスク上のインデックスを読み込む（存在しない・壊れている場合は空から始める）"""
+        self.records = {}
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"インデックス {self.index_path} を読み込めなかったため再作成します: {e}")
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.records = data.get("records", {})
+
+    def save(self):
+        """インデックスをディスクに書き込む（一時ファイル経由で置き換える）"""
+        index_dir = os.path.dirname(self.index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "records": self.records}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _scan(self):
+        """ディレクトリを走査し、(相対パス, サイズ, 更新時刻(ns), 読み込み元) を返す"""
+        if self.pack:
+            yield from self._scan_pack()
+            return
+        for root, _, files in os.walk(self.workflows_dir):
+            for file_name in files:
+                if file_name.lower().endswith(WORKFLOW_EXTENSIONS):
+                    file_path = os.path.join(root, file_name)
+                    rel_path = os.path.relpath(file_path, self.workflows_dir)
+                    try:
+                        st = os.stat(file_path)
+                    except OSError:
+                        continue
+                    yield rel_path, st.st_size, st.st_mtime_ns, file_path
+
+    def _scan_pack(self):
+        """パック内のワークフローを (キー, 長さ, シャードの更新時刻(ns), 位置) として返す"""
+        with PackReader(self.workflows_dir) as reader:
+            shard_mtimes = {}
+            for key in reader.keys():
+                location = reader.location(key)
+                shard_path = location[0]
+                if shard_path not in shard_mtimes:
+                    shard_mtimes[shard_path] = os.stat(shard_path).st_mtime_ns
+                yield key, location[2], shard_mtimes[shard_path], location
+
+    def _read(self, source):
+        return read_location(source) if self.pack else read_workflow_file(source)
+
+    def update(self, save=True, workers=None):
+        """
+        ディレクトリの現在の状態にインデックスを追従させる
+
+        サイズと更新時刻が一致するファイルは再利用し、一致しない場合でも
+        内容のハッシュが同じであれば解析結果を再利用します。
+
+        Args:
+            save (bool): 更新後にディスクへ保存するかどうか
+            workers (int): 再解析に使うワーカープロセス数（workflow_parser.summarize_workflow_files を参照）
+
+        Returns:
+            dict: 'parsed'（再解析数）, 'reused'（再利用数）, 'removed'（削除数）
+        """
+        old_records = self.records
+        by_hash = {rec["sha256"]: rec for rec in old_records.values()}
+        new_records = {}
+        stale = {}
+        reused = 0
+        changed = False
+
+        for rel_path, size, mtime_ns, source in self._scan():
+            rec = old_records.get(rel_path)
+            if rec and rec["size"] == size and rec["mtime_ns"] == mtime_ns:
+                new_records[rel_path] = rec
+                reused += 1
+                continue
+            try:
+                digest = hashlib.sha256(self._read(source)).hexdigest()
+            except (OSError, ValueError) as e:
+                print(f"{rel_path} を読み込めませんでした: {e}")
+                continue
+            meta = {"path": rel_path, "size": size, "mtime_ns": mtime_ns}
+            changed = True
+            if digest in by_hash:
+                new_records[rel_path] = dict(by_hash[digest], **meta)
+                reused += 1
+            else:
+                stale[rel_path] = (digest, meta, source)
+
+        # 同じ内容のファイルは1回だけ解析する
+        to_parse = {}
+        for rel_path, (digest, _, source) in stale.items():
+            to_parse.setdefault(digest, source)
+        read = read_location if self.pack else read_workflow_file
+        summaries = summarize_workflow_files(to_parse.values(), workers=workers, read=read)
+        for rel_path, (digest, meta, _) in stale.items():
+            new_records[rel_path] = dict(summaries[to_parse[digest]], **meta)
+
+        removed = len(old_records.keys() - new_records.keys())
+        self.records = new_records
+        if save and (changed or removed):
+            self.save()
+        return {"parsed": len(to_parse), "reused": reused + len(stale) - len(to_parse), "removed": removed}
+
+    def remove(self, rel_path, delete_file=True):
+        """
+        レコードをインデックスから外し、必要であれば実ファイルも削除する
+
+        Args:
+            rel_path (str): ディレクトリからの相対パス
+            delete_file (bool): 実ファイルも削除するかどうか
+
+        Raises:
+            OSError: パック内やストアのワークフローの削除を指定した場合など、ファイルを削除できなかった場合
+        """
+        if delete_file and self.pack:
+            raise OSError(f"パック内のワークフローは削除できません: {rel_path}")
+        if delete_file and self.store:
+            raise OSError(f"ストアのワークフローはマニフェストから参照されるため削除できません: {rel_path}")
+        self.records.pop(rel_path, None)
+        if delete_file:
+            os.remove(os.path.join(self.workflows_dir, rel_path))
+
+    def iter_records(self, recursive=True):
+        """
+        レコードをパス順に返す
+
+        Args:
+            recursive (bool): Falseの場合はディレクトリ直下のファイルのみを対象にする（パックでは常にすべて）
+        """
+        for rel_path in sorted(self.records):
+            if not recursive and not self.pack and os.sep in rel_path:
+                continue
+            yield self.records[rel_path]
+
+    def scan_triggers(self, recursive=True, workers=None):
+        """
+        トリガーだけを含むレコードを返す（インデックスは更新・保存しない）
+
+        サイズと更新時刻が一致するファイルはインデックスのレコードを使い、それ以外のファイルは
+        workflow_parser.summarize_triggers_bytes でトリガーだけを解析します（`on` 以外の値は構築しません）。
+        インデックスがない・古いディレクトリに対するトリガーだけの検索で、全体の解析を省くために使います。
+
+        Args:
+            recursive (bool): Falseの場合はディレクトリ直下のファイルのみを対象にする（パックでは常にすべて）
+            workers (int): 解析に使うワーカープロセス数（workflow_parser.summarize_workflow_files を参照）
+
+        Returns:
+            list: 'path', 'triggers', 'parse_error', 'trigger_error' を含むレコードのパス順のリスト
+        """
+        records = {}
+        to_parse = {}
+        for rel_path, size, mtime_ns, source in self._scan():
+            if not recursive and not self.pack and os.sep in rel_path:
+                continue
+            rec = self.records.get(rel_path)
+            if rec and rec["size"] == size and rec["mtime_ns"] == mtime_ns:
+                records[rel_path] = rec
+            else:
+                to_parse[source] = rel_path
+        read = read_location if self.pack else read_workflow_file
+        summaries = summarize_workflow_files(to_parse, workers=workers, read=read, summarize=summarize_triggers_bytes)
+        for source, summary in summaries.items():
+            records[to_parse[source]] = dict(summary, path=to_parse[source])
+        return [records[rel_path] for rel_path in sorted(records)]
+
+    def files_with_trigger(self, trigger_event, records=None):
+        """
+        指定したトリガーイベントを含むワークフローファイル名（パックの場合はキー）のリストを返す（ディレクトリ直下のみ）
+
+        Args:
+            records (iterable): 対象のレコード（scan_triggers の結果など）。Noneの場合はインデックスのレコード
+        """
+        if records is None:
+            records = self.iter_records(recursive=False)
+        return [
+            rec["path"] for rec in records
+            if rec["path"].endswith(WORKFLOW_EXTENSIONS) and rec["triggers"] and trigger_event in rec["triggers"]
+        ]
@@ -0,0 +1,381 @@
+# このスクリプトは、ジョブの strategy.matrix から実際に実行されるジョブ数（ファンアウト）を数える機能を提供します。
+# 組み合わせを列挙せず、include / exclude に現れる値だけで軸を分割して、同じ扱いになる組み合わせの集合ごとに
+# 件数を掛け算で求めるため、巨大なマトリックスでも正確なジョブ数・軸ごとの値の内訳・
+# ランナー（${{ matrix.os }} などを展開した runs-on）ごとの内訳を求められます。
+# 組み合わせそのものが必要な場合は Matrix.iter_combinations() で1件ずつ生成できます。
+#
+# include / exclude の扱いはGitHub Actionsと同じです。
+# - exclude は、指定したすべてのキーの値が一致する元の組み合わせを取り除く（include より先に適用される）
+# - include は、元の軸の値を上書きせずに追加できるすべての組み合わせにキーを追加する（追加したキーは後の include で上書きされる）。
+#   追加できる組み合わせがない場合は、新しい組み合わせになる
+# マトリックスや軸の値が式（${{ fromJSON(...) }} など）の場合は実行時まで決まらないため、ジョブ数は不明（None）とします。
+# 再利用可能ワークフローを呼び出すジョブは、呼び出し先のジョブを展開せずに1ジョブ（マトリックスがあればその数）と数えます。
+#
+# 使い方:
+#   python workflow_matrix.py github_workflows_dataset --top 20（get_workflow_utils.show_matrix_fanout）
+#   python workflow_matrix.py github_workflows_dataset/ci.yml
+
+import argparse
+from collections import Counter
+from itertools import product
+import json
+import os
+import re
+
+import yaml
+
+MATRIX_EXPRESSION_RE = re.compile(r"\$\{\{\s*matrix\.([A-Za-z0-9_.-]+)\s*\}\}")
+NO_RUNNER = "(なし)"
+NO_VALUE = "(なし)"
+
+def _plain(value):
+    """辞書のキーを文字列にそろえる（PyYAMLは `on` などのキーを True として読み込むため）"""
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+def _key(value):
+    """値の比較に使うキー（辞書やリストの値も比較できるようにする）"""
+    return json.dumps(_plain(value), sort_keys=True, ensure_ascii=False, default=str)
+
+def _label(value):
+    if value is None:
+        return NO_VALUE
+    return value if isinstance(value, str) else _key(value)
+
+def _is_expression(value):
+    return isinstance(value, str) and "${{" in value
+
+class Matrix:
+    """
+    strategy.matrix を数えやすい形に正規化したもの
+
+    Attributes:
+        axes (dict): 軸名 -> [(値のキー, 値, 個数)]（同じ値が複数回書かれていれば個数が増える）
+        excludes (list): 軸名 -> 値のキー の dict のリスト（元の軸にないキーを含むものは一致しないため除く）
+        includes (list): include の各要素（dict）
+    """
+
+    def __init__(self, axes, excludes, includes):
+        self.axes = axes
+        self.excludes = excludes
+        self.includes = includes
+
+    @classmethod
+    def parse(cls, matrix):
+        """
+        strategy.matrix の値から作成する
+
+        Returns:
+            Matrix | None: マトリックス・軸・include / exclude が式で指定されていてジョブ数が決まらない場合はNone
+        """
+        if not isinstance(matrix, dict):
+            return None
+        axes = {}
+        for name, values in matrix.items():
+            if name in ("include", "exclude"):
+                continue
+            if _is_expression(values):
+                return None
+            counted = {}
+            for value in values if isinstance(values, list) else [values]:
+                key = _key(value)
+                entry = counted.get(key)
+                counted[key] = (key, value, entry[2] + 1 if entry else 1)
+            axes[str(name)] = list(counted.values())
+        lists = {}
+        for name in ("exclude", "include"):
+            entries = matrix.get(name) or []
+            if not isinstance(entries, list):
+                return None
+            lists[name] = [{str(k): v for k, v in entry.items()} for entry in entries if isinstance(entry, dict)]
+        excludes = [{k: _key(v) for k, v in entry.items()} for entry in lists["exclude"]
+                    if entry and all(k in axes for k in entry)]
+        return cls(axes, excludes, lists["include"])
+
+    def _classes(self):
+        """
+        元の組み合わせを、exclude / include の一致が同じになる集合に分割する
+
+        include / exclude が値を指定している軸を1つずつ選び、指定された値ごとと、指定されていない値をまとめたものに分けます。
+        分割の数は include / exclude に現れる値の数で決まり、組み合わせの数には依存しません。
+
+        Yields:
+            tuple: (軸 -> 取りうる値のキーの集合 の dict（指定のない軸は含まない）, 除外されるかどうか, 一致する include の番号のリスト)
+        """
+        entries = [("exclude", i, entry) for i, entry in enumerate(self.excludes)]
+        entries += [("include", i, {k: _key(v) for k, v in entry.items() if k in self.axes})
+                    for i, entry in enumerate(self.includes)]
+        stack = [({}, entries)]
+        while stack:
+            allowed, active = stack.pop()
+            if any(kind == "exclude" and not constraints for kind, _, constraints in active):
+                yield allowed, True, []
+                continue
+            pending = [constraints for _, _, constraints in active if constraints]
+            if not pending:
+                yield allowed, False, sorted(i for kind, i, _ in active if kind == "include")
+                continue
+            axis = next(iter(pending[0]))
+            mentioned = {constraints[axis] for constraints in pending if axis in constraints}
+            for key, _, _ in self.axes[axis]:
+                if key in mentioned:
+                    # この値に一致する指定は軸の条件を満たし、別の値を指定したものは一致しない
+                    sub = [(kind, i, {k: v for k, v in constraints.items() if k != axis})
+                           for kind, i, constraints in active if constraints.get(axis, key) == key]
+                    stack.append((dict(allowed, **{axis: {key}}), sub))
+            others = {key for key, _, _ in self.axes[axis] if key not in mentioned}
+            if others:
+                sub = [entry for entry in active if axis not in entry[2]]
+                stack.append((dict(allowed, **{axis: others}), sub))
+
+    def _choices(self, axis, allowed):
+        """分割した集合で軸が取りうる (値, 個数) のリスト"""
+        keys = allowed.get(axis)
+        return [(value, count) for key, value, count in self.axes[axis] if keys is None or key in keys]
+
+    def analyze(self, keys=()):
+        """
+        ジョブ数と、指定したキーの値の組ごとの件数を数える（組み合わせは列挙しない）
+
+        Args:
+            keys (iterable): 内訳を求めるマトリックスのキー（元の軸でも include で追加したキーでもよい）
+
+        Returns:
+            dict: 'jobs'（ジョブ数）, 'combinations'（元の組み合わせ数）, 'excluded'（exclude で除いた数）,
+                  'added'（include で新しく作られた組み合わせ数）, 'breakdown'（[キーの値のタプル, 件数] のリスト。
+                  キーがない組み合わせの値はNone）
+        """
+        keys = list(keys)
+        combinations = 0
+        if self.axes:
+            combinations = 1
+            for values in self.axes.values():
+                combinations *= sum(count for _, _, count in values)
+        groups = {} # 値のキーのタプル -> [値のタプル, 件数]
+
+        def add(values, count):
+            group = groups.setdefault(tuple(_key(value) for value in values), [values, 0])
+            group[1] += count
+
+        excluded = 0
+        matched = set()
+        if combinations:
+            distributed = [key for key in keys if key in self.axes]
+            for allowed, is_excluded, included in self._classes():
+                # 内訳を求めない軸は件数の積だけを使い、内訳を求める軸は値ごとに分ける
+                rest = 1
+                for axis in self.axes:
+                    if axis not in distributed:
+                        rest *= sum(count for _, count in self._choices(axis, allowed))
+                choices = [self._choices(axis, allowed) for axis in distributed]
+                if is_excluded:
+                    excluded += rest * sum(_product_count(combo) for combo in product(*choices))
+                    continue
+                matched.update(included)
+                added = {}
+                for i in included:
+                    added.update((k, v) for k, v in self.includes[i].items() if k not in self.axes)
+                for combo in product(*choices):
+                    weight = rest * _product_count(combo)
+                    if weight:
+                        values = dict(added, **{axis: value for axis, (value, _) in zip(distributed, combo)})
+                        add(tuple(values.get(key) for key in keys), weight)
+        extra = [i for i in range(len(self.includes)) if i not in matched]
+        for i in extra:
+            add(tuple(self.includes[i].get(key) for key in keys), 1)
+        return {"jobs": combinations - excluded + len(extra), "combinations": combinations, "excluded": excluded,
+                "added": len(extra), "breakdown": list(groups.values())}
+
+    def count(self):
+        """ジョブ数を返す"""
+        return self.analyze()["jobs"]
+
+    def iter_combinations(self):
+        """
+        組み合わせ（キー -> 値の dict）を1件ずつ生成する（元の組み合わせ、include で作られた組み合わせの順）
+
+        include で作られる組み合わせは、元の組み合わせをすべて生成した後に分かります。
+        """
+        names = list(self.axes)
+        matched = set()
+        if names:
+            expanded = [[(key, value) for key, value, count in self.axes[name] for _ in range(count)] for name in names]
+            include_keys = [{k: _key(v) for k, v in entry.items() if k in self.axes} for entry in self.includes]
+            for combo in product(*expanded):
+                keys = dict(zip(names, (key for key, _ in combo)))
+                if any(all(keys[k] == v for k, v in entry.items()) for entry in self.excludes):
+                    continue
+                job = dict(zip(names, (value for _, value in combo)))
+                for i, constraints in enumerate(include_keys):
+                    if all(keys[k] == v for k, v in constraints.items()):
+                        job.update((k, v) for k, v in self.includes[i].items() if k not in self.axes)
+                        matched.add(i)
+                yield job
+        for i, entry in enumerate(self.includes):
+            if i not in matched:
+                yield dict(entry)
+
+    def keys(self):
+        """元の軸と include で追加されるキー（出現順）"""
+        keys = list(self.axes)
+        for entry in self.includes:
+            keys.extend(k for k in entry if k not in keys)
+        return keys
+
+def _product_count(combo):
+    count = 1
+    for _, n in combo:
+        count *= n
+    return count
+
+def _runs_on(job):
+    """ジョブの runs-on（文字列・リスト・None）"""
+    runs_on = job.get('runs-on')
+    if isinstance(runs_on, dict):
+        runs_on = runs_on.get('labels') or runs_on.get('group')
+    return runs_on
+
+def _runner_refs(runs_on):
+    """runs-on が参照するマトリックスのキー"""
+    texts = runs_on if isinstance(runs_on, list) else [runs_on]
+    return sorted({ref.split(".")[0] for text in texts if isinstance(text, str) for ref in MATRIX_EXPRESSION_RE.findall(text)})
+
+def render_runner(runs_on, values):
+    """runs-on の ${{ matrix.<キー> }} をマトリックスの値に置き換えたランナーラベル（複数ラベルはカンマ区切り）"""
+    def lookup(match):
+        value = values
+        for part in match.group(1).split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value is None:
+            return match.group(0)
+        if isinstance(value, list):
+            return ",".join(_label(v) for v in value)
+        return _label(value)
+
+    if isinstance(runs_on, str):
+        return MATRIX_EXPRESSION_RE.sub(lookup, runs_on)
+    if isinstance(runs_on, list) and runs_on:
+        return ",".join(MATRIX_EXPRESSION_RE.sub(lookup, label) for label in runs_on if isinstance(label, str))
+    return NO_RUNNER
+
+def analyze_job(job, axes=False):
+    """
+    1つのジョブのファンアウトを数える
+
+    Args:
+        job (dict): jobs.<ジョブID> の値
+        axes (bool): Trueの場合は、マトリックスのキーごとの値の内訳も求める
+
+    Returns:
+        dict: 'jobs'（ジョブ数。式で決まらない場合はNone）, 'runners'（ランナーラベル -> ジョブ数）。
+              マトリックスがある場合は 'combinations', 'excluded', 'added'、axes=True の場合は
+              'axes'（キー -> {値のラベル -> ジョブ数}）も含む
+    """
+    runs_on = _runs_on(job)
+    strategy = job.get('strategy')
+    if not isinstance(strategy, dict) or 'matrix' not in strategy:
+        return {"jobs": 1, "runners": {render_runner(runs_on, {}): 1}}
+    matrix = Matrix.parse(strategy['matrix'])
+    if matrix is None:
+        return {"jobs": None, "runners": {}}
+    refs = _runner_refs(runs_on)
+    result = matrix.analyze(refs)
+    runners = Counter()
+    for values, count in result["breakdown"]:
+        runners[render_runner(runs_on, dict(zip(refs, values)))] += count
+    summary = {key: result[key] for key in ("jobs", "combinations", "excluded", "added")}
+    summary["runners"] = dict(runners)
+    if axes:
+        summary["axes"] = {}
+        for key in matrix.keys():
+            breakdown = matrix.analyze([key])["breakdown"]
+            summary["axes"][key] = {_label(values[0]): count for values, count in breakdown}
+    return summary
+
+def workflow_fanout(workflow_content):
+    """
+    ワークフロー全体のファンアウトを数える
+
+    Args:
+        workflow_content: yaml.safe_load の結果
+
+    Returns:
+        dict: 'jobs'（ジョブ数の合計。式で決まらないジョブは含まない）, 'by_job'（ジョブID -> ジョブ数またはNone）,
+              'dynamic'（ジョブ数が決まらないジョブIDのリスト）, 'runners'（ランナーラベル -> ジョブ数）
+    """
+    fanout = {"jobs": 0, "by_job": {}, "dynamic": [], "runners": {}}
+    if not isinstance(workflow_content, dict) or not isinstance(workflow_content.get('jobs'), dict):
+        return fanout
+    runners = Counter()
+    for job_id, job in workflow_content['jobs'].items():
+        if not isinstance(job, dict):
+            continue
+        summary = analyze_job(job)
+        fanout["by_job"][str(job_id)] = summary["jobs"]
+        if summary["jobs"] is None:
+            fanout["dynamic"].append(str(job_id))
+        else:
+            fanout["jobs"] += summary["jobs"]
+            runners.update(summary["runners"])
+    fanout["runners"] = dict(runners)
+    return fanout
+
+def corpus_fanout(index):
+    """
+    ワークフローインデックスのレコード（'fanout'）からデータセット全体のファンアウトを集計する
+
+    Returns:
+        dict: 'workflows'（[パス, ジョブ数, 決まらないジョブ数] のジョブ数の多い順のリスト）, 'jobs'（合計）,
+              'dynamic'（ジョブ数が決まらないジョブの数）, 'runners'（ランナーラベル -> ジョブ数の Counter）
+    """
+    workflows = []
+    runners = Counter()
+    jobs = dynamic = 0
+    for rec in index.iter_records():
+        fanout = rec.get("fanout")
+        if not fanout or rec["parse_error"]:
+            continue
+        workflows.append([rec["path"], fanout["jobs"], len(fanout["dynamic"])])
+        jobs += fanout["jobs"]
+        dynamic += len(fanout["dynamic"])
+        runners.update(fanout["runners"])
+    workflows.sort(key=lambda item: (-item[1], item[0]))
+    return {"workflows": workflows, "jobs": jobs, "dynamic": dynamic, "runners": runners}
+
+def show_workflow_matrix(file_path):
+    """1つのワークフローファイルのジョブごとのファンアウトと、マトリックスのキーごとの内訳を出力する"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        data = yaml.safe_load(f)
+    fanout = workflow_fanout(data)
+    print(f"=== {file_path}: {fanout['jobs']}ジョブ ===")
+    for job_id, job in (data.get('jobs') or {}).items() if isinstance(data, dict) else ():
+        if not isinstance(job, dict):
+            continue
+        summary = analyze_job(job, axes=True)
+        if summary["jobs"] is None:
+            print(f"{job_id}: マトリックスが式のため決まりません")
+            continue
+        line = f"{job_id}: {summary['jobs']}"
+        if "combinations" in summary:
+            line += f"（組み合わせ {summary['combinations']} - exclude {summary['excluded']} + include {summary['added']}）"
+        print(line)
+        for label, count in summary["runners"].items():
+            print(f"  runs-on '{label}': {count}")
+        for key, values in summary.get("axes", {}).items():
+            print(f"  {key}: " + ", ".join(f"{label}={count}" for label, count in values.items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="strategy.matrix を展開したジョブ数（ファンアウト）を数える")
+    parser.add_argument("path", help="ワークフローファイル、またはワークフローのディレクトリ（パックディレクトリ）")
+    parser.add_argument("--top", type=int, default=20, help="ワークフローごと・ランナーごとに表示する件数（0はすべて）")
+    parser.add_argument("--workers", type=int, default=None, help="未解析ファイルの解析に使うワーカープロセス数（0はCPUコア数）")
+    args = parser.parse_args()
+    if os.path.isfile(args.path):
+        show_workflow_matrix(args.path)
+    else:
+        # workflow_parser がこのモジュールを読み込むため、インデックスを使う集計はスクリプトとして実行した場合だけ読み込む
+        from get_workflow_utils import show_matrix_fanout
+        show_matrix_fanout(args.path, args.top, args.workers)
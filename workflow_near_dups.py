@@ -0,0 +1,269 @@
+# このスクリプトは、ワークフローデータセット内の「ほぼ同じ」ファイル（ニアデュプリケート）をクラスタリングする機能を提供します。
+# バージョン指定・ブランチ名・matrixの値だけが異なるコピーは完全一致の重複排除では見つからないため、
+# シングル（連続するトークン列）のMinHash署名と、LSH（locality-sensitive hashing）のバンド分割で候補ペアを探します。
+# 候補の探索はファイル数にほぼ比例する計算量で、署名とバンドのキーは一時ファイルに書き出すため
+# 100万ファイル規模でもメモリ使用量は一定の範囲に収まります。
+#
+# 使い方:
+#   python workflow_near_dups.py github_workflows_dataset --threshold 0.8 --report near_dups.json
+#   python workflow_near_dups.py github_workflows_dataset --keep-one   # クラスタごとに1ファイルだけ残す
+
+import argparse
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import json
+import mmap
+import os
+import re
+import tempfile
+import zlib
+
+from workflow_store import is_store_dir
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+# 正規化: コメント・アクションのバージョン指定・コミットSHAなど、コピー間で変わりやすい部分を取り除く
+_COMMENT_RE = re.compile(r'(^|\s)#.*$', re.MULTILINE)
+_ACTION_REF_RE = re.compile(r'@[\w.\-/]+')
+_SHA_RE = re.compile(r'\b[0-9a-f]{40}\b')
+_TOKEN_RE = re.compile(r'[A-Za-z_][\w\-./]*|\d+|\S')
+
+def _tokens(text):
+    """比較用に正規化したトークン列を返す"""
+    text = _COMMENT_RE.sub(r'\1', text)
+    text = _ACTION_REF_RE.sub('@REF', text)
+    text = _SHA_RE.sub('SHA', text)
+    return _TOKEN_RE.findall(text.lower())
+
+def workflow_signature(text, num_perm=DEFAULT_NUM_PERM, shingle_size=DEFAULT_SHINGLE_SIZE):
+    """
+    ワークフローの内容からMinHash署名を計算する
+
+    シングルごとにハッシュを1回だけ計算し、num_perm個のビンのうち1つに振り分けて
+    ビンごとの最小値を取る one-permutation hashing を使います。空のビンは次の
+    空でないビンの値で埋めます（densification）。
+
+    Args:
+        text (str): ワークフローの内容
+        num_perm (int): 署名の長さ
+        shingle_size (int): シングルを構成するトークン数
+
+    Returns:
+        array: 長さnum_permの署名（unsigned int）
+    """
+    tokens = _tokens(text)
+    empty = 0xFFFFFFFF
+    signature = array('I', [empty]) * num_perm
+    if len(tokens) < shingle_size:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    for shingle in shingles:
+        h = (zlib.crc32(shingle.encode('utf-8')) * 0x9E3779B1) & 0xFFFFFFFF
+        bin_index = h % num_perm
+        value = h // num_perm
+        if value < signature[bin_index]:
+            signature[bin_index] = value
+    # 空のビンを右隣（循環）の空でないビンの値で埋める
+    original = array('I', signature)
+    for i in range(num_perm):
+        if original[i] == empty:
+            offset = 1
+            while original[(i + offset) % num_perm] == empty:
+                offset += 1
+            # 埋めた値が元のビンの値と偶然一致しないよう、距離に応じて値をずらす
+            signature[i] = (original[(i + offset) % num_perm] + offset * 0x61C88647) & 0xFFFFFFFF
+    return signature
+
+def estimate_similarity(sig_a, sig_b):
+    """2つの署名から推定したJaccard類似度を返す"""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+def choose_bands(threshold, num_perm=DEFAULT_NUM_PERM):
+    """
+    類似度のしきい値に対して、偽陽性と偽陰性の確率の和が最小になるバンド数と行数を選ぶ
+
+    Args:
+        threshold (float): 類似度のしきい値（0〜1）
+        num_perm (int): 署名の長さ
+
+    Returns:
+        tuple: (バンド数, 1バンドあたりの行数)
+    """
+    def integrate(f, a, b, steps=200):
+        width = (b - a) / steps
+        return sum(f(a + (k + 0.5) * width) for k in range(steps)) * width
+
+    best = None
+    for bands in range(1, num_perm + 1):
+        if num_perm % bands:
+            continue
+        rows = num_perm // bands
+        false_positive = integrate(lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold)
+        false_negative = integrate(lambda s: (1 - s ** rows) ** bands, threshold, 1.0)
+        error = false_positive + false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+def _signature_for_file(args):
+    """ワーカープロセスで1ファイルの署名を計算する（読み込めない場合はNone）"""
+    file_path, num_perm, shingle_size = args
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return workflow_signature(f.read(), num_perm, shingle_size).tobytes()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"{file_path} の処理中にエラー: {e}")
+        return None
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+def find_near_duplicate_clusters(directory, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                                 shingle_size=DEFAULT_SHINGLE_SIZE, workers=None, extensions=(".yml", ".yaml")):
+    """
+    ディレクトリ内のワークフローファイルをニアデュプリケートごとにクラスタリングする
+
+    1. 各ファイルのMinHash署名を一時ファイルに書き出し、バンドごとのキーを (キー, ファイル番号) として
+       バンド別の一時ファイルに書き出す
+    2. バンドごとにキーでソートし、同じバケットに入ったファイルを代表ファイルと比較して、
+       推定類似度がしきい値以上であれば Union-Find で結合する
+
+    Args:
+        directory (str): ワークフローファイルが格納されているディレクトリ
+        threshold (float): 同じクラスタとみなす推定Jaccard類似度のしきい値
+        num_perm (int): 署名の長さ
+        shingle_size (int): シングルを構成するトークン数
+        workers (int): 署名の計算に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        extensions (tuple): 対象とする拡張子
+
+    Returns:
+        list: 2ファイル以上からなるクラスタのリスト。各クラスタはファイル名をソートしたリストで、
+              先頭のファイルを代表とします。
+    """
+    if not os.path.isdir(directory):
+        print(f"{directory} は存在しないかディレクトリではありません")
+        return []
+    bands, rows = choose_bands(threshold, num_perm)
+    file_names = sorted(f for f in os.listdir(directory) if f.endswith(extensions))
+    args = ((os.path.join(directory, f), num_perm, shingle_size) for f in file_names)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sig_path = os.path.join(tmp_dir, "signatures.bin")
+        band_paths = [os.path.join(tmp_dir, f"band_{b}.bin") for b in range(bands)]
+        band_files = [open(p, 'wb') for p in band_paths]
+        valid = bytearray(len(file_names))
+        try:
+            with open(sig_path, 'wb') as sig_file:
+                if workers and workers > 1:
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                    results = executor.map(_signature_for_file, args, chunksize=256)
+                else:
+                    executor = None
+                    results = map(_signature_for_file, args)
+                empty_signature = bytes(4 * num_perm)
+                for doc_id, sig_bytes in enumerate(results):
+                    if sig_bytes is None:
+                        sig_file.write(empty_signature)
+                        continue
+                    valid[doc_id] = 1
+                    sig_file.write(sig_bytes)
+                    for b in range(bands):
+                        key = zlib.crc32(sig_bytes[b * rows * 4:(b + 1) * rows * 4])
+                        array('Q', [(key << 32) | doc_id]).tofile(band_files[b])
+                if executor is not None:
+                    executor.shutdown()
+        finally:
+            for f in band_files:
+                f.close()
+
+        parent = array('I', range(len(file_names)))
+        if not file_names:
+            return []
+        with open(sig_path, 'rb') as sig_file, \
+             mmap.mmap(sig_file.fileno(), 0, access=mmap.ACCESS_READ) as sig_map, \
+             memoryview(sig_map) as raw, raw.cast('I') as signatures:
+
+            def signature(doc_id):
+                return signatures[doc_id * num_perm:(doc_id + 1) * num_perm].tolist()
+
+            # 1バンド分のキーだけをメモリに載せて処理する
+            for band_path in band_paths:
+                entries = array('Q')
+                with open(band_path, 'rb') as f:
+                    entries.frombytes(f.read())
+                entries = sorted(entries)
+                start = 0
+                while start < len(entries):
+                    key = entries[start] >> 32
+                    end = start + 1
+                    while end < len(entries) and entries[end] >> 32 == key:
+                        end += 1
+                    if end - start > 1:
+                        head = entries[start] & 0xFFFFFFFF
+                        head_sig = signature(head)
+                        for k in range(start + 1, end):
+                            doc_id = entries[k] & 0xFFFFFFFF
+                            root_a, root_b = _find(parent, head), _find(parent, doc_id)
+                            if root_a != root_b and estimate_similarity(head_sig, signature(doc_id)) >= threshold:
+                                parent[max(root_a, root_b)] = min(root_a, root_b)
+                    start = end
+                del entries
+
+    clusters = {}
+    for doc_id in range(len(file_names)):
+        if valid[doc_id]:
+            clusters.setdefault(_find(parent, doc_id), []).append(file_names[doc_id])
+    return sorted((members for members in clusters.values() if len(members) > 1), key=lambda c: (-len(c), c[0]))
+
+def remove_near_duplicates(directory, clusters):
+    """
+    クラスタごとに代表ファイル（先頭）だけを残し、残りを削除する
+
+    Returns:
+        int: 削除したファイル数
+    """
+    if is_store_dir(directory):
+        print(f"{directory} はストアのため削除しません（ファイルはマニフェストから参照されます）")
+        return 0
+    removed = 0
+    for members in clusters:
+        for fname in members[1:]:
+            fpath = os.path.join(directory, fname)
+            try:
+                os.remove(fpath)
+                removed += 1
+                print(f"ニアデュプリケートのため削除: {fpath} (代表: {members[0]})")
+            except OSError as e:
+                print(f"{fpath} の削除中にエラー: {e}")
+    return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークフローファイルのニアデュプリケートをクラスタリングする")
+    parser.add_argument("directory")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="同じクラスタとみなす類似度のしきい値")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM, help="MinHash署名の長さ")
+    parser.add_argument("--shingle-size", type=int, default=DEFAULT_SHINGLE_SIZE, help="シングルを構成するトークン数")
+    parser.add_argument("--workers", type=int, default=None, help="署名の計算に使うワーカープロセス数（0はCPUコア数）")
+    parser.add_argument("--report", help="クラスタの一覧を書き出すJSONファイル")
+    parser.add_argument("--keep-one", action="store_true", help="クラスタごとに代表ファイルだけを残して削除する")
+    args = parser.parse_args()
+
+    clusters = find_near_duplicate_clusters(args.directory, args.threshold, args.num_perm, args.shingle_size, args.workers)
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(f"クラスタ数: {len(clusters)}, 代表以外のファイル数: {duplicates}")
+    for members in clusters[:10]:
+        print(f"- {members[0]} ほか {len(members) - 1} ファイル")
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump([{"representative": c[0], "members": c} for c in clusters], f, ensure_ascii=False, indent=2)
+        print(f"クラスタの一覧を保存しました: {args.report}")
+    if args.keep_one:
+        remove_near_duplicates(args.directory, clusters)
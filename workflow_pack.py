@@ -0,0 +1,363 @@
+# このスクリプトは、大量のワークフローファイルを少数の「パック」シャードにまとめて保存・参照する機能を提供します。
+# ワークフローごとに小さなファイルを作る代わりに、内容をサイズ上限付きのシャード（shard-00000.pack）に追記し、
+# キー（owner/repo/パス）ごとのオフセットをシャードのインデックス（shard-00000.idx）に記録します。
+# 書き込み中のシャードのエントリはレコードごとにジャーナル（shard-00000.idx.partial）へ追記されるため、
+# 途中で中断した場合も書き込み済みのレコードを読み込め、次に書き込むときにインデックスに変換されます。
+# 読み込み側はシャードをメモリマップし、任意のワークフローをコピーせずに（memoryviewとして）参照できます。
+# 内容はレコード単位でzlib圧縮することもでき、圧縮した場合もランダムアクセスできます。
+#
+# 使い方:
+#   python workflow_pack.py pack github_workflows_dataset github_workflows_pack --compress
+#   python workflow_pack.py stats github_workflows_pack
+
+import argparse
+import json
+import mmap
+import os
+import threading
+import zlib
+
+PACK_VERSION = 1
+SHARD_PREFIX = "shard-"
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+JOURNAL_SUFFIX = ".idx.partial"
+DEFAULT_SHARD_BYTES = 64 * 1024 * 1024
+
+def _shard_number(file_name):
+    """シャードのファイル名から番号を取り出す（シャードでなければNone）"""
+    if not file_name.startswith(SHARD_PREFIX):
+        return None
+    stem = file_name[len(SHARD_PREFIX):].split(".", 1)[0]
+    return int(stem) if stem.isdigit() else None
+
+def is_pack_dir(path):
+    """パックのシャード（インデックスまたはジャーナル）を含むディレクトリかどうか"""
+    return os.path.isdir(path) and any(
+        name.endswith((INDEX_SUFFIX, JOURNAL_SUFFIX)) and _shard_number(name) is not None for name in os.listdir(path)
+    )
+
+def _shard_indexes(pack_dir):
+    """
+    シャードごとのインデックスかジャーナルのファイル名を番号順に返す（インデックスがあればそちらを使う）
+
+    Returns:
+        list: [(シャード番号, ファイル名)]
+    """
+    names = {}
+    for name in os.listdir(pack_dir):
+        number = _shard_number(name)
+        if number is None:
+            continue
+        if name.endswith(INDEX_SUFFIX) or (name.endswith(JOURNAL_SUFFIX) and number not in names):
+            names[number] = name
+    return sorted(names.items())
+
+def _read_index(index_path):
+    """
+    シャードのインデックス（またはジャーナル）を読み込む
+
+    ジャーナルの場合は、中断で途中までしか書かれていない最後の行と、シャードに内容が書き込まれていない
+    エントリを除きます。
+
+    Returns:
+        dict: 'version', 'compressed', 'entries'（[キー, オフセット, 長さ, コミット] のリスト）
+    """
+    if not index_path.endswith(JOURNAL_SUFFIX):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    shard_path = index_path[:-len(JOURNAL_SUFFIX)] + PACK_SUFFIX
+    shard_size = os.path.getsize(shard_path) if os.path.exists(shard_path) else 0
+    index = {"version": None, "compressed": False, "entries": []}
+    with open(index_path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            if not line.endswith("\n"):
+                break
+            try:
+                item = json.loads(line)
+            except ValueError:
+                break
+            if i == 0:
+                index.update(item)
+            elif item[1] + item[2] <= shard_size:
+                index["entries"].append(item)
+    return index
+
+def read_location(location):
+    """
+    PackReader.location() が返す位置からワークフローの内容を読み込む
+
+    メモリマップを共有できない別プロセス（ProcessPoolExecutorのワーカー）から使うための関数です。
+
+    Args:
+        location (tuple): (シャードのパス, オフセット, 長さ, 圧縮の有無)
+
+    Returns:
+        bytes: ワークフローの内容
+    """
+    shard_path, offset, length, compressed = location
+    with open(shard_path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    return zlib.decompress(data) if compressed else data
+
+def _write_index(index_path, index):
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, index_path)
+
+class PackWriter:
+    """
+    ワークフローの内容をシャードに追記するライター
+
+    シャードが max_shard_bytes を超えると次のシャードに切り替えます。
+    add() は内容と、ジャーナルへのエントリをフラッシュしてから戻るため、プロセスが中断しても書き込み済みの
+    レコードは失われません（シャードを閉じたときにジャーナルはインデックスに置き換えられ、中断したシャードの
+    ジャーナルは次に PackWriter を作成したときにインデックスに変換されます）。
+    既存のパックディレクトリに追記する場合は新しい番号のシャードが作られ、
+    同じキーは後から書いたものが優先されます。複数スレッドから同時に利用できます。
+    """
+
+    def __init__(self, pack_dir, max_shard_bytes=DEFAULT_SHARD_BYTES, compress=False):
+        """
+        Args:
+            pack_dir (str): シャードを保存するディレクトリ
+            max_shard_bytes (int): 1シャードあたりの最大バイト数（目安）
+            compress (bool): 内容をレコード単位でzlib圧縮するかどうか
+        """
+        self.pack_dir = pack_dir
+        self.max_shard_bytes = max_shard_bytes
+        self.compress = compress
+        self.records_written = 0
+        self.bytes_written = 0
+        os.makedirs(pack_dir, exist_ok=True)
+        numbers = [n for n in map(_shard_number, os.listdir(pack_dir)) if n is not None]
+        self._next_shard = max(numbers) + 1 if numbers else 0
+        self._file = None
+        self._journal = None
+        self._shard_path = None
+        self._entries = []
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._recover_shards()
+
+    def _recover_shards(self):
+        """前回中断したシャードのジャーナルをインデックスに変換する"""
+        for name in os.listdir(self.pack_dir):
+            if not name.endswith(JOURNAL_SUFFIX) or _shard_number(name) is None:
+                continue
+            journal_path = os.path.join(self.pack_dir, name)
+            index_path = journal_path[:-len(JOURNAL_SUFFIX)] + INDEX_SUFFIX
+            # インデックスを書き込んだ後、ジャーナルを削除する前に中断した場合はインデックスをそのまま使う
+            if not os.path.exists(index_path):
+                index = _read_index(journal_path)
+                if index["version"] is None:
+                    index.update(version=PACK_VERSION, compressed=self.compress)
+                _write_index(index_path, index)
+            os.remove(journal_path)
+
+    def _journal_line(self, item):
+        self._journal.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self._journal.flush()
+
+    def _open_shard(self):
+        self._shard_path = os.path.join(self.pack_dir, f"{SHARD_PREFIX}{self._next_shard:05d}{PACK_SUFFIX}")
+        self._next_shard += 1
+        self._file = open(self._shard_path, 'wb')
+        self._journal = open(self._shard_path[:-len(PACK_SUFFIX)] + JOURNAL_SUFFIX, 'w', encoding='utf-8')
+        self._journal_line({"version": PACK_VERSION, "compressed": self.compress})
+        self._entries = []
+        self._offset = 0
+
+    def _close_shard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._journal.close()
+        index = {"version": PACK_VERSION, "compressed": self.compress, "entries": self._entries}
+        base_path = self._shard_path[:-len(PACK_SUFFIX)]
+        _write_index(base_path + INDEX_SUFFIX, index)
+        os.remove(base_path + JOURNAL_SUFFIX)
+        self._file = None
+        self._journal = None
+
+    def add(self, key, content, commit=None):
+        """
+        ワークフローの内容をシャードに追記する
+
+        Args:
+            key (str): ワークフローのキー（例: owner/repo/.github/workflows/ci.yml）
+            content (str | bytes): ファイルの内容
+            commit (str): 取得元のコミット（またはツリー）SHA。不明な場合はNone
+
+        Returns:
+            tuple: (シャードのファイル名, オフセット, 長さ)
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        data = zlib.compress(content) if self.compress else content
+        with self._lock:
+            if self._file is None or (self._offset and self._offset + len(data) > self.max_shard_bytes):
+                self._close_shard()
+                self._open_shard()
+            offset = self._offset
+            self._file.write(data)
+            self._file.flush()
+            self._offset += len(data)
+            entry = [key, offset, len(data), commit]
+            # 内容を書き込んでからエントリを記録するため、ジャーナルのエントリは常に読み込める
+            self._journal_line(entry)
+            self._entries.append(entry)
+            self.records_written += 1
+            self.bytes_written += len(data)
+            return os.path.basename(self._shard_path), offset, len(data)
+
+    def close(self):
+        """書き込み中のシャードを閉じてインデックスを書き込む"""
+        with self._lock:
+            self._close_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class PackReader:
+    """
+    パックディレクトリのシャードをメモリマップし、キーでワークフローを参照するリーダー
+
+    get() は圧縮していないシャードではコピーを伴わない memoryview を返します。
+    memoryview を保持したまま close() した場合、シャードのマップはガベージコレクションで解放されます。
+    """
+
+    def __init__(self, pack_dir):
+        self.pack_dir = pack_dir
+        self._shards = [] # [(シャードのパス, ファイル, mmap | None, 圧縮の有無)]
+        self._entries = {} # キー -> (シャード番号, オフセット, 長さ, コミット)
+        # 書き込み中（または中断した）シャードはジャーナルから読み込む
+        for _, index_name in _shard_indexes(pack_dir):
+            index = _read_index(os.path.join(pack_dir, index_name))
+            if index.get("version") != PACK_VERSION:
+                print(f"未対応のバージョンのため読み飛ばします: {index_name}")
+                continue
+            shard_path = os.path.join(pack_dir, index_name.split(".", 1)[0] + PACK_SUFFIX)
+            shard_file = open(shard_path, 'rb')
+            # 空のファイルはメモリマップできない
+            shard_map = None
+            if os.fstat(shard_file.fileno()).st_size:
+                shard_map = mmap.mmap(shard_file.fileno(), 0, access=mmap.ACCESS_READ)
+            shard_no = len(self._shards)
+            self._shards.append((shard_path, shard_file, shard_map, index["compressed"]))
+            for key, offset, length, commit in index["entries"]:
+                # 同じキーは後のシャードのものが優先される
+                self._entries.pop(key, None)
+                self._entries[key] = (shard_no, offset, length, commit)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def shard_count(self):
+        """読み込んだシャードの数"""
+        return len(self._shards)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def keys(self):
+        """キーを書き込み順に返す"""
+        return self._entries.keys()
+
+    def get(self, key):
+        """
+        キーに対応するワークフローの内容を返す
+
+        Returns:
+            memoryview | bytes: 圧縮していない場合はシャードを直接参照するmemoryview、圧縮している場合は展開したbytes
+
+        Raises:
+            KeyError: キーが存在しない場合
+        """
+        shard_no, offset, length, _ = self._entries[key]
+        _, _, shard_map, compressed = self._shards[shard_no]
+        if shard_map is None:
+            return b""
+        view = memoryview(shard_map)[offset:offset + length]
+        if compressed:
+            with view:
+                return zlib.decompress(view)
+        return view
+
+    def get_text(self, key):
+        """キーに対応するワークフローの内容を文字列で返す"""
+        data = self.get(key)
+        return str(data, 'utf-8')
+
+    def commit(self, key):
+        """キーに対応するワークフローの取得元コミットを返す（不明な場合はNone）"""
+        return self._entries[key][3]
+
+    def location(self, key):
+        """別プロセスから read_location() で読み込むための (シャードのパス, オフセット, 長さ, 圧縮の有無) を返す"""
+        shard_no, offset, length, _ = self._entries[key]
+        shard_path, _, _, compressed = self._shards[shard_no]
+        return shard_path, offset, length, compressed
+
+    def items(self):
+        """(キー, 内容) を書き込み順に返す"""
+        for key in self._entries:
+            yield key, self.get(key)
+
+    def close(self):
+        for _, shard_file, shard_map, _ in self._shards:
+            if shard_map is not None:
+                try:
+                    shard_map.close()
+                except BufferError:
+                    pass # 参照中のmemoryviewがある場合は、それが解放されたときに閉じられる
+            shard_file.close()
+        self._shards = []
+        self._entries = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def pack_directory(directory, pack_dir, max_shard_bytes=DEFAULT_SHARD_BYTES, compress=False, extensions=(".yml", ".yaml")):
+    """
+    ディレクトリ内のワークフローファイルをパックに変換する（キーはファイル名）
+
+    Returns:
+        int: パックに追加したファイル数
+    """
+    count = 0
+    with PackWriter(pack_dir, max_shard_bytes, compress) as writer:
+        for fname in sorted(os.listdir(directory)):
+            if fname.endswith(extensions):
+                with open(os.path.join(directory, fname), 'rb') as f:
+                    writer.add(fname, f.read())
+                count += 1
+    return count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークフローのパックシャードの操作")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    pack_parser = subparsers.add_parser("pack", help="ディレクトリ内のワークフローファイルをパックに変換する")
+    pack_parser.add_argument("directory")
+    pack_parser.add_argument("pack_dir")
+    pack_parser.add_argument("--compress", action="store_true", help="内容をzlibで圧縮する")
+    pack_parser.add_argument("--shard-bytes", type=int, default=DEFAULT_SHARD_BYTES, help="1シャードあたりの最大バイト数")
+    stats_parser = subparsers.add_parser("stats", help="パックのワークフロー数とシャード数を表示する")
+    stats_parser.add_argument("pack_dir")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        count = pack_directory(args.directory, args.pack_dir, args.shard_bytes, args.compress)
+        print(f"{count} ファイルをパックしました: {args.pack_dir}")
+    elif args.command == "stats":
+        with PackReader(args.pack_dir) as reader:
+            print(f"ワークフロー数: {len(reader)}, シャード数: {reader.shard_count}")
@@ -0,0 +1,465 @@
+# このスクリプトは、1つのワークフローYAMLファイルを解析してコンパクトなレコードに変換する機能を提供します。
+# レコードにはトリガー・usesアクション・runキーワード・検出言語（スコア順）・ジョブ数・ステップ数・ランナーラベル・
+# トップレベルのキー・ジョブIDと、ジョブから呼び出す再利用可能ワークフロー（jobs.<id>.uses）、
+# マトリックスを展開したジョブ数（workflow_matrix.py）が含まれ、
+# ワークフローインデックス（workflow_index.py）や各種分析関数から利用されます。
+# トリガーだけが必要な場合は、YAMLのイベント列を読むだけで `on` 以外の値を構築しない高速な経路も利用できます
+# （速くなるのはlibyamlのローダーを使う場合だけです。summarize_triggers_bytes を参照）。
+# 大量のファイルはProcessPoolExecutorで複数プロセスに分散して解析できます。
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import hashlib
+from itertools import repeat
+import os
+import yaml
+
+from language_rules import DEFAULT_MATCHER
+from workflow_matrix import workflow_fanout
+
+# libyamlが利用できる場合はC実装のローダーを使い、なければ純Python実装にフォールバックする
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def extract_triggers(data):
+    """
+    YAMLの解析結果からトリガー名のリストを取り出す
+
+    PyYAMLは `on:` キーを True として読み込むため、'on' と True の両方を確認します。
+
+    Args:
+        data: yaml.safe_load の結果
+
+    Returns:
+        list | None: トリガー名のリスト。トリガーが定義されていない場合はNone。
+    """
+    # 'on'キーまたはTrueキーのどちらかが存在するかを判定
+    if not data or ('on' not in data and True not in data):
+        return None
+    # 'on'またはTrueのどちらかからトリガー情報を取得
+    triggers = data.get('on') or data.get(True)
+    if isinstance(triggers, dict):
+        return [str(t) for t in triggers]
+    elif isinstance(triggers, list):
+        return [str(t) for t in triggers]
+    elif isinstance(triggers, str):
+        return [triggers]
+    return []
+
+_MERGE_TAG = "tag:yaml.org,2002:merge"
+_TIMESTAMP_TAG = "tag:yaml.org,2002:timestamp"
+_CHECKED_FIRST_CHARS = frozenset("0123456789<")
+
+class _AmbiguousYaml(Exception):
+    """イベントを読むだけではトリガーを確定できない構造（アンカー・エイリアス・明示的なタグ・マージキーなど）"""
+
+def _next_event(loader):
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent) or getattr(event, "anchor", None) or getattr(event, "tag", None):
+        raise _AmbiguousYaml()
+    return event
+
+def _scalar_value(loader, event):
+    """スカラーのイベントを yaml.load と同じ値に変換する"""
+    tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+    if tag == _MERGE_TAG:
+        raise _AmbiguousYaml()
+    return loader.construct_object(yaml.ScalarNode(tag, event.value, style=event.style))
+
+def _check_scalar(loader, event):
+    """
+    yaml.load が構築時にエラーにする可能性のあるスカラーなら _AmbiguousYaml を送出する
+
+    暗黙の型がタイムスタンプ（2024-13-01 のような存在しない日付はエラーになる）とマージキー（<<）の場合です。
+    どちらもプレーンなスカラーで、先頭が数字か '<' のものだけが該当します。
+    """
+    if event.implicit[0] and event.value[:1] in _CHECKED_FIRST_CHARS:
+        if loader.resolve(yaml.ScalarNode, event.value, event.implicit) in (_TIMESTAMP_TAG, _MERGE_TAG):
+            raise _AmbiguousYaml()
+
+def _skip_value(loader, event):
+    """
+    値（スカラー・シーケンス・マッピング）のイベントを読み飛ばす
+
+    値は構築しませんが、yaml.load と同じ結果を保証できない構造（_next_event を参照）や、yaml.load がエラーにする構造
+    （コレクションのキー・マージキー・不正なタイムスタンプ）を含む場合は _AmbiguousYaml を送出します。
+    ファイルの大部分はここで読み飛ばすため、_next_event を介さずにイベントの種類ごとに判定します。
+    """
+    get_event = loader.get_event
+    stack = [] # コレクションごとに、マッピングで次がキーなら True・値なら False、シーケンスなら None
+    while True:
+        kind = type(event)
+        if kind is yaml.ScalarEvent:
+            if event.anchor or event.tag:
+                raise _AmbiguousYaml()
+            if event.value[:1] in _CHECKED_FIRST_CHARS:
+                _check_scalar(loader, event)
+            if stack and stack[-1] is not None:
+                stack[-1] = not stack[-1]
+        elif kind is yaml.MappingEndEvent or kind is yaml.SequenceEndEvent:
+            stack.pop()
+        elif kind is yaml.MappingStartEvent or kind is yaml.SequenceStartEvent:
+            if event.anchor or event.tag:
+                raise _AmbiguousYaml()
+            if stack and stack[-1] is not None:
+                if stack[-1]:
+                    raise _AmbiguousYaml() # コレクションをキーにしたマッピング
+                stack[-1] = True
+            stack.append(True if kind is yaml.MappingStartEvent else None)
+        else:
+            raise _AmbiguousYaml() # エイリアスなど
+        if not stack:
+            return
+        event = get_event()
+
+def _read_trigger_value(loader):
+    """
+    `on` の値のイベントを読み、extract_triggers と同じトリガー名のリストを返す
+
+    Returns:
+        tuple: (トリガー名のリスト, 値が空（None・空文字列・空のコレクションなど）かどうか)
+    """
+    event = _next_event(loader)
+    if isinstance(event, yaml.ScalarEvent):
+        value = _scalar_value(loader, event)
+        return ([value] if isinstance(value, str) else []), not value
+    names = {} # 重複したキーは yaml.load と同じく1つにまとめる（順序は最初に現れた位置）
+    is_mapping = isinstance(event, yaml.MappingStartEvent)
+    while True:
+        event = _next_event(loader)
+        if isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+            break
+        if not isinstance(event, yaml.ScalarEvent):
+            raise _AmbiguousYaml()
+        value = _scalar_value(loader, event)
+        if is_mapping:
+            names.setdefault(value, None)
+            _skip_value(loader, _next_event(loader))
+        else:
+            names[len(names)] = value
+    return [str(name) for name in (names if is_mapping else names.values())], not names
+
+def _read_triggers(loader):
+    """
+    イベント列を最後まで読み、extract_triggers と同じトリガー名のリストを返す
+
+    トップレベルのキーのうち `on` と True に等しいキー（yes や 1 など）の値だけを読み、ほかの値は構築せずに読み飛ばします。
+    同じキーが複数ある場合は yaml.load と同じく最後の値を使います。
+    ルートがマッピングでない場合や、判断できない構造の場合、ドキュメントが複数ある場合は _AmbiguousYaml を送出します。
+    """
+    _next_event(loader) # StreamStartEvent
+    event = _next_event(loader)
+    if isinstance(event, yaml.StreamEndEvent):
+        return None
+    if not isinstance(_next_event(loader), yaml.MappingStartEvent):
+        raise _AmbiguousYaml()
+    values = {} # 'on' / True -> (トリガー名のリスト, 値が空かどうか)
+    while True:
+        event = _next_event(loader)
+        if isinstance(event, yaml.MappingEndEvent):
+            break
+        if not isinstance(event, yaml.ScalarEvent):
+            raise _AmbiguousYaml()
+        key = _scalar_value(loader, event)
+        # PyYAMLは `on:` を True として読み込む（extract_triggers と同じく 'on' と True の両方を確認する）
+        if key == 'on' or key == True:
+            values['on' if key == 'on' else True] = _read_trigger_value(loader)
+        else:
+            _skip_value(loader, _next_event(loader))
+    # 2つ目のドキュメントがあれば yaml.load はエラーになるため、最後まで確認する
+    _next_event(loader) # DocumentEndEvent
+    if not isinstance(_next_event(loader), yaml.StreamEndEvent):
+        raise _AmbiguousYaml()
+    if not values:
+        return None
+    # extract_triggers と同じく data.get('on') or data.get(True)（どちらも空なら空のリスト）
+    if 'on' in values and not values['on'][1]:
+        return values['on'][0]
+    if True in values:
+        return values[True][0]
+    return []
+
+def summarize_triggers_bytes(raw):
+    """
+    ワークフローファイルの内容からトリガーだけを読み取る（トリガーだけが必要な検索のための高速な経路）
+
+    YAMLのイベント列を最後まで読みますが、値を構築するのはトップレベルのキーと `on` の値だけです。
+    アンカー・エイリアス・明示的なタグ・マージキー・複雑なキー・マッピング以外のルートなど、
+    イベント列だけでは yaml.load と同じ結果を保証できない構造の場合や、構文エラーがある場合は
+    ファイル全体を解析するため、結果は常に summarize_workflow_bytes と同じになります。
+    字句解析と構文解析は省かないため、速くなるのは値を構築する処理の分だけです。サンプルのデータセットでは、
+    libyaml のローダー（CSafeLoader）で summarize_workflow_bytes の約2.5倍ですが、純Python実装のローダーでは
+    約1.2倍にとどまります（benchmarks/bench_trigger_search.py）。
+
+    Args:
+        raw (bytes): ファイルの内容
+
+    Returns:
+        dict: summarize_workflow_bytes のレコードのうち 'triggers', 'parse_error', 'yaml_error', 'trigger_error'
+    """
+    record = {"triggers": None, "parse_error": None, "yaml_error": False, "trigger_error": None}
+    try:
+        text = raw.decode('utf-8')
+    except Exception as e:
+        record["parse_error"] = str(e)
+        return record
+    loader = YAML_LOADER(text)
+    try:
+        record["triggers"] = _read_triggers(loader)
+        return record
+    except Exception:
+        # 判断できない構造やエラーの場合は、エラーの内容も含めて通常の解析と同じ結果にする
+        pass
+    finally:
+        loader.dispose()
+
+    try:
+        data = yaml.load(text, Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        record["parse_error"] = str(e)
+        record["yaml_error"] = True
+        return record
+    except Exception as e:
+        record["parse_error"] = str(e)
+        return record
+    try:
+        record["triggers"] = extract_triggers(data)
+    except Exception as e:
+        record["trigger_error"] = str(e)
+    return record
+
+def iter_steps(workflow_content):
+    """
+    ワークフロー内の全ジョブのステップを順番に返す（構造が想定と異なる部分は読み飛ばす）
+
+    Args:
+        workflow_content: yaml.safe_load の結果
+
+    Yields:
+        dict: ステップの定義
+    """
+    if not isinstance(workflow_content, dict) or not isinstance(workflow_content.get('jobs'), dict):
+        return
+    for job_name, job_details in workflow_content['jobs'].items():
+        if isinstance(job_details, dict) and isinstance(job_details.get('steps'), list):
+            for step in job_details['steps']:
+                if isinstance(step, dict):
+                    yield step
+
+def extract_runner_labels(workflow_content):
+    """
+    全ジョブの `runs-on` からランナーラベルを重複なく取り出す
+
+    `runs-on` は文字列・リスト・{group, labels} の辞書のいずれかで指定されます。
+    式（${{ matrix.os }} など）はそのままの文字列として扱います。
+
+    Args:
+        workflow_content: yaml.safe_load の結果
+
+    Returns:
+        list: ランナーラベルのリスト（出現順）
+    """
+    labels = []
+    if not isinstance(workflow_content, dict) or not isinstance(workflow_content.get('jobs'), dict):
+        return labels
+    for job_details in workflow_content['jobs'].values():
+        if not isinstance(job_details, dict):
+            continue
+        runs_on = job_details.get('runs-on')
+        if isinstance(runs_on, dict):
+            runs_on = runs_on.get('labels') or runs_on.get('group')
+        if isinstance(runs_on, str):
+            runs_on = [runs_on]
+        if isinstance(runs_on, list):
+            for label in runs_on:
+                if isinstance(label, str) and label not in labels:
+                    labels.append(label)
+    return labels
+
+def classify_languages(workflow_content, matcher=DEFAULT_MATCHER):
+    """
+    ワークフローの `uses` アクションと `run` コマンドから主要言語と言語ごとのスコアを求める
+
+    判定には language_rules.LANGUAGE_RULES のルール表を使います。
+
+    Args:
+        workflow_content: yaml.safe_load の結果
+        matcher (LanguageMatcher): ルール表をコンパイルしたマッチャー
+
+    Returns:
+        tuple: (主要言語 または None, [(言語, スコア), ...]（スコアの高い順）)
+    """
+    return matcher.classify(iter_steps(workflow_content))
+
+def rank_languages(workflow_content, matcher=DEFAULT_MATCHER):
+    """
+    ワークフローで検出された言語をスコアの高い順に返す
+
+    Returns:
+        list: [(言語, スコア), ...]（スコアの高い順）
+    """
+    return classify_languages(workflow_content, matcher)[1]
+
+def detect_language(workflow_content, matcher=DEFAULT_MATCHER):
+    """
+    ワークフローの主要言語（言語を特定できた最後のステップの言語）を推測する
+
+    Args:
+        workflow_content: yaml.safe_load の結果
+        matcher (LanguageMatcher): ルール表をコンパイルしたマッチャー
+
+    Returns:
+        str | None: 検出された言語名。特定できなかった場合はNone。
+    """
+    return classify_languages(workflow_content, matcher)[0]
+
+def _collect_actions_and_keywords(workflow_content):
+    """ステップから `uses` アクション一覧とrunキーワード一覧を集める"""
+    uses = []
+    run_keywords = set()
+    for step in iter_steps(workflow_content):
+        if isinstance(step.get('uses'), str):
+            if step['uses'] not in uses:
+                uses.append(step['uses'])
+        elif isinstance(step.get('run'), str):
+            run_keywords.update(DEFAULT_MATCHER.run_labels(step['run']))
+    return uses, sorted(run_keywords)
+
+def summarize_workflow_bytes(raw):
+    """
+    ワークフローファイルの内容を解析し、インデックス用のレコードを作成する
+
+    解析エラーは例外として送出せず、レコードのエラー項目に記録します。
+
+    Args:
+        raw (bytes): ファイルの内容
+
+    Returns:
+        dict: 'sha256', 'triggers', 'uses', 'run_keywords', 'language'（主要言語）,
+              'languages'（[言語, スコア] のスコア順リスト。先頭が主要言語とは限らない）, 'jobs'（ジョブ数）, 'steps'（ステップ数）,
+              'runs_on'（ランナーラベル）, 'keys'（トップレベルのキー）, 'job_ids'（ジョブIDのリスト）,
+              'calls'（再利用可能ワークフローを呼び出すジョブの [ジョブID, uses] のリスト）,
+              'fanout'（workflow_matrix.workflow_fanout の結果）と各段階のエラー情報を含むレコード
+    """
+    record = {
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "triggers": None,
+        "uses": [],
+        "run_keywords": [],
+        "language": None,
+        "languages": [],
+        "jobs": 0,
+        "steps": 0,
+        "runs_on": [],
+        "keys": [],
+        "job_ids": [],
+        "calls": [],
+        "fanout": workflow_fanout(None),
+        "parse_error": None,
+        "yaml_error": False,
+        "trigger_error": None,
+        "language_error": None,
+    }
+    try:
+        data = yaml.load(raw.decode('utf-8'), Loader=YAML_LOADER)
+    except yaml.YAMLError as e:
+        record["parse_error"] = str(e)
+        record["yaml_error"] = True
+        return record
+    except Exception as e:
+        record["parse_error"] = str(e)
+        return record
+
+    try:
+        record["triggers"] = extract_triggers(data)
+    except Exception as e:
+        record["trigger_error"] = str(e)
+    try:
+        record["language"], ranked = classify_languages(data)
+        record["languages"] = [[lang, score] for lang, score in ranked]
+    except Exception as e:
+        record["language_error"] = str(e)
+    record["uses"], record["run_keywords"] = _collect_actions_and_keywords(data)
+    if isinstance(data, dict) and isinstance(data.get('jobs'), dict):
+        record["jobs"] = len(data['jobs'])
+        record["job_ids"] = [str(job_id) for job_id in data['jobs']]
+        record["calls"] = [[str(job_id), job['uses']] for job_id, job in data['jobs'].items()
+                           if isinstance(job, dict) and isinstance(job.get('uses'), str)]
+    record["fanout"] = workflow_fanout(data)
+    record["steps"] = sum(1 for _ in iter_steps(data))
+    record["runs_on"] = extract_runner_labels(data)
+    if isinstance(data, dict):
+        # PyYAMLは `on:` キーを True として読み込む
+        record["keys"] = ["on" if key is True else str(key) for key in data]
+    return record
+
+def read_workflow_file(file_path):
+    """ワークフローファイルの内容をbytesで読み込む"""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+def summarize_workflow_file(file_path):
+    """
+    ワークフローファイルを読み込み、インデックス用のレコードを作成する
+
+    Args:
+        file_path (str): ワークフローファイルのパス
+
+    Returns:
+        dict: summarize_workflow_bytes のレコード
+    """
+    return summarize_workflow_bytes(read_workflow_file(file_path))
+
+def _error_record(message):
+    """ファイルを読み込めなかった場合のレコードを作成する"""
+    record = summarize_workflow_bytes(b"")
+    record["sha256"] = None
+    record["parse_error"] = message
+    return record
+
+def _summarize_chunk(file_paths, read=read_workflow_file, summarize=summarize_workflow_bytes):
+    """ワーカープロセスでファイルのまとまりを解析する（エラーはレコードに記録して返す）"""
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append((file_path, summarize(read(file_path))))
+        except Exception as e:
+            results.append((file_path, _error_record(str(e))))
+    return results
+
+def summarize_workflow_files(file_paths, workers=None, chunksize=64, read=read_workflow_file,
+                             summarize=summarize_workflow_bytes):
+    """
+    複数のワークフローファイルを解析し、ファイルパスをキーとしたレコードの辞書を返す
+
+    workersが2以上の場合はファイルをchunksize個ずつProcessPoolExecutorに分散して解析します。
+    個々のファイルのエラーはレコードに記録され、実行全体は止まりません。
+
+    Args:
+        file_paths (list): 解析するファイルパス（readを指定した場合はreadに渡す読み込み元）のリスト
+        workers (int): ワーカープロセス数。None/1は逐次実行、0はCPUコア数
+        chunksize (int): 1回のタスクで各ワーカーに渡すファイル数
+        read (callable): 読み込み元から内容（bytes）を返す関数。ワーカーに渡すためモジュールの関数である必要があります
+                         （パックの場合は workflow_pack.read_location）
+        summarize (callable): 内容からレコードを作成する関数（トリガーだけが必要な場合は summarize_triggers_bytes）。
+                              readと同じくモジュールの関数である必要があります
+
+    Returns:
+        dict: {ファイルパス: レコード}
+    """
+    file_paths = list(file_paths)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if not workers or workers < 2 or len(file_paths) <= chunksize:
+        return dict(_summarize_chunk(file_paths, read, summarize))
+
+    chunks = [file_paths[i:i + chunksize] for i in range(0, len(file_paths), chunksize)]
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_results in executor.map(_summarize_chunk, chunks, repeat(read), repeat(summarize)):
+                results.update(chunk_results)
+    except BrokenProcessPool as e:
+        print(f"ワーカープロセスが異常終了したため、残りのファイルを逐次解析します: {e}")
+        remaining = [p for p in file_paths if p not in results]
+        results.update(_summarize_chunk(remaining, read, summarize))
+    return results
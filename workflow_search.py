@@ -0,0 +1,451 @@
+# このスクリプトは、ワークフローインデックスの解析結果から転置インデックスを作成し、ブール式による検索を提供します。
+# トリガー名・usesアクション（バージョン指定あり／なし）・runs-onラベル・トップレベルのキーを語とし、
+# 語ごとにワークフローIDのポスティングリストを保持します。検索式は AND / OR / NOT と括弧で組み合わせられます。
+#
+# ポスティングリストは <workflows_dir>/.workflow_search/ に保存され、ファイルが追加・変更された場合は
+# 差分のワークフローだけを追記します（ワークフローIDは追加順に振るため、リストは常に昇順のまま追記できます）。
+# 削除・変更されたワークフローはIDを欠番にし、欠番が半数を超えたら作成し直します。
+# 各リストはIDの配列とビットマップのうち小さい方で保存し、検索時はPythonの整数をビットマップとして
+# AND / OR / NOT をまとめて計算するため、一度読み込んだ語の検索は1ミリ秒未満で終わります。
+#
+# 使い方:
+#   python workflow_search.py github_workflows_dataset "schedule AND actions/cache AND NOT ubuntu-latest"
+#   python workflow_search.py github_workflows_dataset "trigger:push AND (runs-on:windows-latest OR runs-on:macos-latest)" --count
+
+import argparse
+from array import array
+import json
+import mmap
+import os
+import re
+import time
+
+from workflow_index import WorkflowIndex
+
+SEARCH_DIRNAME = ".workflow_search"
+SEARCH_VERSION = 1
+
+# 語の種類（検索式では "trigger:push" のように種類を指定できる。指定しない場合はすべての種類で探す）
+TERM_FIELDS = ("trigger", "uses", "runs-on", "key")
+
+# ポスティングリストの保存形式
+SPARSE = "s" # ワークフローIDの配列（uint32）
+DENSE = "d" # ワークフローIDをビット位置とするビットマップ（リトルエンディアン）
+
+_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|[^\s()]+')
+_NONZERO_RE = re.compile(rb"[^\x00]")
+
+def workflow_terms(rec):
+    """
+    インデックスのレコードから検索語の集合を作る（語はすべて小文字）
+
+    Returns:
+        set: "trigger:push", "uses:actions/cache", "uses:actions/cache@v4", "runs-on:ubuntu-latest", "key:concurrency" など
+    """
+    terms = set()
+    for trigger in rec["triggers"] or ():
+        terms.add(f"trigger:{trigger}".lower())
+    for uses in rec["uses"]:
+        uses = uses.lower()
+        terms.add(f"uses:{uses}")
+        terms.add(f"uses:{uses.split('@', 1)[0]}")
+    for label in rec.get("runs_on") or ():
+        terms.add(f"runs-on:{label}".lower())
+    for key in rec.get("keys") or ():
+        terms.add(f"key:{key}".lower())
+    return terms
+
+def _record_signature(rec):
+    """ワークフローの内容が変わったかどうかの判定に使う値"""
+    return rec["sha256"] or f"{rec['size']}:{rec['mtime_ns']}"
+
+def _dense_from_ids(ids, doc_count):
+    bitmap = bytearray((doc_count + 7) // 8)
+    for doc_id in ids:
+        bitmap[doc_id >> 3] |= 1 << (doc_id & 7)
+    return bitmap
+
+def iter_bitmap(bitmap, data=None):
+    """
+    ビットマップ（int）の立っているビット位置を昇順に返す
+
+    Args:
+        bitmap (int): ビットマップ
+        data (bytes): ビットマップのバイト列（既にある場合）
+    """
+    if data is None:
+        data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    # 0のバイトは正規表現でまとめて読み飛ばす
+    for match in _NONZERO_RE.finditer(data):
+        base = match.start() << 3
+        byte = data[match.start()]
+        while byte:
+            low = byte & -byte
+            yield base + low.bit_length() - 1
+            byte ^= low
+
+class QuerySyntaxError(ValueError):
+    """検索式の構文が正しくない場合の例外"""
+
+class WorkflowSearchIndex:
+    """
+    ワークフローの転置インデックス
+
+    paths[ID] がワークフローのパス（パックの場合はキー）で、削除済みのIDは None です。
+    update() でインデックスに追従させ、search() / count() / paths_for() で検索します。
+    """
+
+    def __init__(self, workflows_dir, search_dir=None):
+        """
+        Args:
+            workflows_dir (str): ワークフローファイルが格納されているフォルダ（またはパックディレクトリ）のパス
+            search_dir (str): 転置インデックスの保存先。Noneの場合は <workflows_dir>/.workflow_search
+        """
+        self.workflows_dir = workflows_dir
+        self.search_dir = search_dir or os.path.join(workflows_dir, SEARCH_DIRNAME)
+        self._reset()
+        self.load()
+
+    def _reset(self):
+        self.paths = []
+        self.signatures = []
+        self.doc_ids = {}
+        self.generation = 0
+        self._terms = {} # 語 -> (保存形式, オフセット, 長さ)
+        self._file = None
+        self._map = None
+        self._pending = {} # 未保存の語 -> array('I')（保存済みのIDを含む）
+        self._bitmaps = {} # 語 -> int（検索用のキャッシュ）
+        self._live = 0
+
+    # --- 読み込み・保存 ---
+
+    def _postings_path(self, generation):
+        return os.path.join(self.search_dir, f"postings-{generation}.bin")
+
+    def load(self):
+        """保存済みの転置インデックスを読み込む（存在しない・形式が異なる場合は空のまま）"""
+        meta_path = os.path.join(self.search_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("version") != SEARCH_VERSION:
+                return
+            postings_file = open(self._postings_path(meta["generation"]), 'rb')
+        except (OSError, ValueError) as e:
+            print(f"転置インデックス {self.search_dir} を読み込めなかったため再作成します: {e}")
+            return
+        self.paths = meta["paths"]
+        self.signatures = meta["signatures"]
+        self.doc_ids = {path: doc_id for doc_id, path in enumerate(self.paths) if path is not None}
+        self.generation = meta["generation"]
+        self._terms = {term: tuple(entry) for term, entry in meta["terms"].items()}
+        self._file = postings_file
+        if os.fstat(postings_file.fileno()).st_size:
+            self._map = mmap.mmap(postings_file.fileno(), 0, access=mmap.ACCESS_READ)
+        live_offset, live_length = meta["live"]
+        self._live = int.from_bytes(self._slice(live_offset, live_length), 'little')
+
+    def _slice(self, offset, length):
+        return self._map[offset:offset + length] if self._map is not None else b""
+
+    def _stored_ids(self, term):
+        """保存済みのポスティングリストをIDの配列で返す"""
+        kind, offset, length = self._terms[term]
+        data = self._slice(offset, length)
+        if kind == DENSE:
+            return array('I', iter_bitmap(None, data))
+        ids = array('I')
+        ids.frombytes(data)
+        return ids
+
+    def save(self):
+        """
+        転置インデックスを新しい世代のファイルに書き込み、meta.json を置き換える
+
+        変更のない語は前の世代のファイルからそのままコピーします。
+        """
+        os.makedirs(self.search_dir, exist_ok=True)
+        generation = self.generation + 1
+        doc_count = len(self.paths)
+        terms = {}
+        with open(self._postings_path(generation), 'wb') as f:
+            offset = 0
+            for term in sorted(self._terms.keys() | self._pending.keys()):
+                ids = self._pending.get(term)
+                if ids is None:
+                    kind, old_offset, length = self._terms[term]
+                    data = self._slice(old_offset, length)
+                # IDの配列（4バイト/件）とビットマップ（1ビット/ワークフロー）の小さい方で保存する
+                elif len(ids) * 32 > doc_count:
+                    kind, data = DENSE, _dense_from_ids(ids, doc_count)
+                else:
+                    kind, data = SPARSE, ids.tobytes()
+                f.write(data)
+                terms[term] = (kind, offset, len(data))
+                offset += len(data)
+            live = self._live.to_bytes((doc_count + 7) // 8, 'little')
+            f.write(live)
+        meta = {
+            "version": SEARCH_VERSION,
+            "generation": generation,
+            "paths": self.paths,
+            "signatures": self.signatures,
+            "terms": terms,
+            "live": [offset, len(live)],
+        }
+        tmp_path = os.path.join(self.search_dir, "meta.json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.search_dir, "meta.json"))
+
+        old_path = self._postings_path(self.generation)
+        self.close()
+        if os.path.exists(old_path):
+            os.remove(old_path)
+        self.generation = generation
+        self._terms = terms
+        self._pending = {}
+        self._file = open(self._postings_path(generation), 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- 更新 ---
+
+    def _add(self, rec):
+        doc_id = len(self.paths)
+        self.paths.append(rec["path"])
+        self.signatures.append(_record_signature(rec))
+        self.doc_ids[rec["path"]] = doc_id
+        self._live |= 1 << doc_id
+        for term in workflow_terms(rec):
+            ids = self._pending.get(term)
+            if ids is None:
+                ids = self._pending[term] = self._stored_ids(term) if term in self._terms else array('I')
+            ids.append(doc_id)
+            self._bitmaps.pop(term, None)
+
+    def _delete(self, path):
+        doc_id = self.doc_ids.pop(path)
+        self.paths[doc_id] = None
+        self.signatures[doc_id] = None
+        self._live &= ~(1 << doc_id)
+
+    def update(self, index=None, save=True, workers=None):
+        """
+        ワークフローインデックスの現在の内容に追従させる
+
+        Args:
+            index (WorkflowIndex): 最新化済みのインデックス。Noneの場合はworkflows_dirのインデックスを更新して使う
+            save (bool): 変更があった場合にディスクへ保存するかどうか
+            workers (int): 未解析ファイルの解析に使うワーカープロセス数
+
+        Returns:
+            dict: 'added'（追加数）, 'removed'（削除数）, 'rebuilt'（作成し直したかどうか）
+        """
+        if index is None:
+            index = WorkflowIndex(self.workflows_dir)
+            index.update(workers=workers)
+        records = {rec["path"]: rec for rec in index.iter_records()}
+        removed = 0
+        for path, doc_id in list(self.doc_ids.items()):
+            rec = records.get(path)
+            if rec is None or _record_signature(rec) != self.signatures[doc_id]:
+                self._delete(path)
+                removed += 1
+
+        # 欠番が半数を超えたらIDを振り直す
+        rebuilt = len(self.doc_ids) * 2 < len(self.paths)
+        if rebuilt:
+            generation = self.generation
+            self.close()
+            self._reset()
+            self.generation = generation
+        added = 0
+        for path, rec in records.items():
+            if path not in self.doc_ids:
+                self._add(rec)
+                added += 1
+        if save and (added or removed or rebuilt):
+            self.save()
+        return {"added": added, "removed": removed, "rebuilt": rebuilt}
+
+    # --- 検索 ---
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def terms(self, field=None):
+        """語の一覧を返す（field を指定した場合はその種類の語のみ、種類の接頭辞を除いて返す）"""
+        terms = sorted(self._terms.keys() | self._pending.keys())
+        if field is None:
+            return terms
+        prefix = f"{field}:"
+        return [term[len(prefix):] for term in terms if term.startswith(prefix)]
+
+    def term_bitmap(self, term):
+        """語のポスティングリストをビットマップ（int）で返す（存在しない語は0）"""
+        bitmap = self._bitmaps.get(term)
+        if bitmap is not None:
+            return bitmap
+        ids = self._pending.get(term)
+        if ids is not None:
+            bitmap = int.from_bytes(_dense_from_ids(ids, len(self.paths)), 'little')
+        elif term in self._terms:
+            kind, offset, length = self._terms[term]
+            if kind == DENSE:
+                bitmap = int.from_bytes(self._slice(offset, length), 'little')
+            else:
+                bitmap = int.from_bytes(_dense_from_ids(self._stored_ids(term), len(self.paths)), 'little')
+        else:
+            bitmap = 0
+        self._bitmaps[term] = bitmap
+        return bitmap
+
+    def _resolve(self, word):
+        """検索式の語をビットマップにする。種類の指定がない場合はすべての種類の和"""
+        word = word.lower()
+        field = word.split(":", 1)[0]
+        if field in TERM_FIELDS and ":" in word:
+            return self.term_bitmap(word)
+        bitmap = 0
+        for field in TERM_FIELDS:
+            bitmap |= self.term_bitmap(f"{field}:{word}")
+        return bitmap
+
+    def search(self, query):
+        """
+        検索式に一致するワークフローのビットマップを返す
+
+        検索式の優先順位は NOT > AND > OR で、AND は省略できます（"push schedule" は "push AND schedule"）。
+        空白を含む語はダブルクォートで囲みます。
+
+        Args:
+            query (str): 検索式（例: "schedule AND actions/cache AND NOT ubuntu-latest"）
+
+        Returns:
+            int: 一致したワークフローIDのビットが立ったビットマップ
+
+        Raises:
+            QuerySyntaxError: 検索式の構文が正しくない場合
+        """
+        tokens = _TOKEN_RE.findall(query)
+        pos = 0
+
+        def peek():
+            return tokens[pos].upper() if pos < len(tokens) else None
+
+        def parse_or():
+            nonlocal pos
+            bitmap = parse_and()
+            while peek() == "OR":
+                pos += 1
+                bitmap |= parse_and()
+            return bitmap
+
+        def parse_and():
+            nonlocal pos
+            bitmap = parse_not()
+            while peek() not in (None, "OR", ")"):
+                if peek() == "AND":
+                    pos += 1
+                bitmap &= parse_not()
+            return bitmap
+
+        def parse_not():
+            nonlocal pos
+            if peek() == "NOT":
+                pos += 1
+                return self._live & ~parse_not()
+            return parse_term()
+
+        def parse_term():
+            nonlocal pos
+            token = peek()
+            if token is None or token in ("AND", "OR", ")"):
+                raise QuerySyntaxError(f"{pos + 1}番目の語の位置に検索語が必要です: {query}")
+            word = tokens[pos]
+            pos += 1
+            if word == "(":
+                bitmap = parse_or()
+                if peek() != ")":
+                    raise QuerySyntaxError(f"括弧が閉じられていません: {query}")
+                pos += 1
+                return bitmap
+            return self._resolve(word.strip('"'))
+
+        bitmap = parse_or()
+        if pos != len(tokens):
+            raise QuerySyntaxError(f"対応しない閉じ括弧があります: {query}")
+        return bitmap & self._live
+
+    def count(self, query):
+        """検索式に一致するワークフロー数を返す"""
+        return self.search(query).bit_count()
+
+    def paths_for(self, query, limit=None):
+        """検索式に一致するワークフローのパスをID順（追加順）に返す"""
+        result = []
+        for doc_id in iter_bitmap(self.search(query)):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(self.paths[doc_id])
+        return result
+
+def load_search_index(workflows_dir, workers=None):
+    """
+    ディレクトリ（またはパックディレクトリ）のインデックスを最新化し、追従させた転置インデックスを返す
+
+    Args:
+        workflows_dir (str): ワークフローファイルが格納されているフォルダのパス
+        workers (int): 未解析ファイルの解析に使うワーカープロセス数。None/1は逐次実行、0はCPUコア数
+
+    Returns:
+        WorkflowSearchIndex: 転置インデックス
+    """
+    search_index = WorkflowSearchIndex(workflows_dir)
+    search_index.update(workers=workers)
+    return search_index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークフローを転置インデックスで検索する")
+    parser.add_argument("directory")
+    parser.add_argument("query", nargs="?", help='検索式（例: "schedule AND actions/cache AND NOT ubuntu-latest"）')
+    parser.add_argument("--workers", type=int, default=None, help="未解析ファイルの解析に使うワーカープロセス数（0はCPUコア数）")
+    parser.add_argument("--count", action="store_true", help="一致したワークフロー数のみを表示する")
+    parser.add_argument("--limit", type=int, default=20, help="表示するパスの件数")
+    parser.add_argument("--terms", choices=TERM_FIELDS, help="指定した種類の語の一覧を表示する")
+    args = parser.parse_args()
+
+    search_index = load_search_index(args.directory, args.workers)
+    print(f"ワークフロー数: {len(search_index)}")
+    if args.terms:
+        for term in search_index.terms(args.terms):
+            print(f"- {term}")
+    if args.query:
+        start = time.perf_counter()
+        try:
+            bitmap = search_index.search(args.query)
+        except QuerySyntaxError as e:
+            parser.error(str(e))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"'{args.query}': {bitmap.bit_count()}個（{elapsed:.3f} ミリ秒）")
+        if not args.count:
+            for path in search_index.paths_for(args.query, args.limit):
+                print(path)
@@ -0,0 +1,177 @@
+# このスクリプトは、ワークフローファイルを内容のSHA-256で名前付けして保存するコンテンツアドレス型ストアを提供します。
+# 同じ内容のファイルは一度だけ書き込まれ、(リポジトリ, パス, コミット) とハッシュの対応はマニフェスト（JSON Lines）に追記されます。
+# ファイル名の衝突による上書きが起きず、重複排除も書き込み時にファイル1つ分のメモリで行えます。
+# また、既存ディレクトリの重複ファイルをハッシュの比較で削除するコマンドも含まれています。
+#
+# 使い方:
+#   python workflow_store.py dedup github_workflows_dataset
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+MANIFEST_FILENAME = "manifest.jsonl"
+BLOB_EXTENSION = ".yml"
+HASH_CHUNK_SIZE = 1 << 16
+
+def is_store_dir(path):
+    """WorkflowStore のストア（マニフェストを含むディレクトリ）かどうか"""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILENAME))
+
+def file_sha256(file_path, chunk_size=HASH_CHUNK_SIZE):
+    """
+    ファイルのSHA-256をチャンク単位で読み込みながら計算する（ファイルサイズによらずメモリ使用量は一定）
+
+    Args:
+        file_path (str): ファイルのパス
+        chunk_size (int): 一度に読み込むバイト数
+
+    Returns:
+        str: 16進数のハッシュ値
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class WorkflowStore:
+    """
+    ワークフローファイルのコンテンツアドレス型ストア
+
+    内容は store_dir/<sha256>.yml として一度だけ書き込まれ、
+    store_dir/manifest.jsonl に {"repo", "path", "commit", "commit_kind", "sha256"} の行が追記されます。
+    commit_kind は commit の種類で、"commit"（デフォルトブランチのコミットSHA）か "blob"（ファイルのblob SHA）です。
+    (リポジトリ, パス) ごとの最新のハッシュ値は最初の put / lookup でマニフェストから一度だけ読み込んでメモリに保持するため、
+    同じストアに別のプロセスが同時に書き込む場合は、その追記を反映しません。
+    ファイルはディレクトリ直下に置かれるため、get_workflow_utils の分析関数をそのまま適用できます
+    （ファイルはマニフェストから参照されるため、分析関数はストアのファイルを削除せずに集計から除外します）。
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.manifest_path = os.path.join(store_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._latest = None # (リポジトリ, パス) -> 最新のハッシュ値
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _latest_index(self):
+        """(リポジトリ, パス) -> 最新のハッシュ値 の辞書を返す（初回だけマニフェストを読み込む。ロックを取得して呼ぶ）"""
+        if self._latest is None:
+            self._latest = {(entry["repo"], entry["path"]): entry["sha256"] for entry in self.iter_manifest()}
+        return self._latest
+
+    def blob_path(self, sha256):
+        """ハッシュ値に対応するファイルのパスを返す"""
+        return os.path.join(self.store_dir, sha256 + BLOB_EXTENSION)
+
+    def put(self, content, repo=None, path=None, commit=None, commit_kind=None):
+        """
+        内容を保存し、マニフェストに記録する。同じ内容が既にあれば書き込みを省略する
+
+        (リポジトリ, パス) の最新の記録が同じハッシュ値の場合は、マニフェストにも追記しません。
+
+        Args:
+            content (str | bytes): ファイルの内容
+            repo (str): リポジトリ名（owner/name）
+            path (str): リポジトリ内のファイルパス
+            commit (str): 取得元のコミットSHA、またはファイルのblob SHA。不明な場合はNone
+            commit_kind (str): commit の種類（"commit" または "blob"）。省略した場合、commit があれば "commit"
+
+        Returns:
+            tuple: (ハッシュ値, 新しく書き込んだかどうか)
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        sha256 = hashlib.sha256(content).hexdigest()
+        blob_path = self.blob_path(sha256)
+        written = False
+        if not os.path.exists(blob_path):
+            # 一時ファイルに書いてから置き換えるため、途中で中断しても壊れたファイルは残らない
+            tmp_path = f"{blob_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, blob_path)
+            written = True
+        if commit is None:
+            commit_kind = None
+        elif commit_kind is None:
+            commit_kind = "commit"
+        entry = {"repo": repo, "path": path, "commit": commit, "commit_kind": commit_kind, "sha256": sha256}
+        with self._lock:
+            latest = self._latest_index()
+            if latest.get((repo, path)) != sha256:
+                with open(self.manifest_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                latest[(repo, path)] = sha256
+        return sha256, written
+
+    def iter_manifest(self):
+        """マニフェストの各行を順番に返す（後の行ほど新しい）"""
+        if not os.path.exists(self.manifest_path):
+            return
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def lookup(self, repo, path):
+        """
+        (リポジトリ, パス) の最新のハッシュ値を返す
+
+        Returns:
+            str | None: ハッシュ値。記録がなければNone。
+        """
+        with self._lock:
+            return self._latest_index().get((repo, path))
+
+def dedupe_directory(directory, extensions=(".yml", ".yaml"), dry_run=False):
+    """
+    ディレクトリ内の内容が完全一致する重複ファイルを削除する（1つだけ残す）
+
+    内容そのものではなくSHA-256を比較するため、保持するのはファイルごとのハッシュ値だけです。
+
+    Args:
+        directory (str): チェックするディレクトリ
+        extensions (tuple): 対象とする拡張子
+        dry_run (bool): Trueの場合は削除せずに表示だけ行う
+
+    Returns:
+        int: 削除した（dry_runの場合は削除対象の）ファイル数
+    """
+    seen = set()
+    removed = 0
+    if not os.path.isdir(directory):
+        print(f"{directory} は存在しないかディレクトリではありません")
+        return 0
+    for fname in os.listdir(directory):
+        if fname.endswith(extensions):
+            fpath = os.path.join(directory, fname)
+            try:
+                digest = file_sha256(fpath)
+                if digest in seen:
+                    if dry_run:
+                        print(f"重複のため削除対象（dry-run）: {fpath}")
+                    else:
+                        os.remove(fpath)
+                        print(f"重複のため削除: {fpath}")
+                    removed += 1
+                else:
+                    seen.add(digest)
+            except Exception as e:
+                print(f"{fpath} の処理中にエラー: {e}")
+    return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ワークフローファイルのコンテンツアドレス型ストアの操作")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    dedup_parser = subparsers.add_parser("dedup", help="ディレクトリ内の重複ファイルをハッシュの比較で削除する")
+    dedup_parser.add_argument("directory")
+    dedup_parser.add_argument("--dry-run", action="store_true", help="削除せずに対象を表示する")
+    args = parser.parse_args()
+
+    if args.command == "dedup":
+        count = dedupe_directory(args.directory, dry_run=args.dry_run)
+        print(f"重複ファイル数: {count}")